@@ -0,0 +1,155 @@
+from typing import Any, Callable, Iterable
+
+from src import serializer as srl
+from src.tournament.interactive_tournament import InteractiveTournament
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+FORMAT_NAME = 'chess-organizer/compact'
+FORMAT_VERSION = 3  # 2: optional persisted stats of finished tournaments, 3: optional federation ids of players
+
+RESULT_CODES: tuple[GameResult | None, ...] = (None, *GameResult)
+RESULT_TO_CODE: dict[GameResult | None, int] = {result: code for code, result in enumerate(RESULT_CODES)}
+
+INTERACTIVE_TOURNAMENT = 'i'
+ENCODED_VALUE = 'e'
+
+
+def is_compact(encoded: srl.BasicSerializableType) -> bool:
+    return type(encoded) is dict and encoded.get('__format__') == FORMAT_NAME
+
+
+def can_be_compacted(data: Any) -> bool:
+    return type(data) is dict and type(data.get('players')) is list and type(data.get('tournaments')) is list
+
+
+class CompactFormat:
+    """
+    Versioned format of the application database ({'players': [...], 'tournaments': [...], ...}) where the schema
+    is implied by position:
+
+        player:      [name, rating, hash_id(, federation_id)]
+        tournament:  ['i', [name, category, start, finish], [elo_k_value, scorer], [player, ...],
+                      [[flat pairs, result codes], ...], is_finished(, [stats checksum, stats])]
+
+    Pairs of a round are stored as one flat list of player ids and results as indexes in RESULT_CODES. Anything
+    else (other tournament types, other top level entries) is stored as ['e', envelope] and handled by the usual
+    Serializer classes.
+    """
+
+    def __init__(self, encode: Callable[[Any], srl.BasicSerializableType],
+                 decode: Callable[[srl.BasicSerializableType], Any]):
+        self._encode_value = encode
+        self._decode_value = decode
+
+    def encode(self, data: dict) -> dict:
+        return self.combine(data.keys(), {key: self.encode_entry(key, value) for key, value in data.items()})
+
+    def encode_entry(self, key: str, value: Any) -> srl.BasicSerializableType:
+        """Encodes one top level entry as combine() expects it"""
+
+        if key == 'players':
+            return [self.encode_player(player) for player in value]
+
+        if key == 'tournaments':
+            return [self.encode_tournament(tournament) for tournament in value]
+
+        return self._encode_value(value)
+
+    @staticmethod
+    def combine(keys: Iterable[str], entries: dict[str, srl.BasicSerializableType]) -> dict:
+        """Builds the file content from top level entries encoded one by one (see encode_entry())"""
+
+        keys = list(keys)
+
+        return {
+            '__format__': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'keys': keys,
+            'players': entries['players'],
+            'tournaments': entries['tournaments'],
+            'other': {key: entries[key] for key in keys if key not in ('players', 'tournaments')},
+        }
+
+    def decode(self, encoded: dict) -> dict:
+        if encoded['version'] > FORMAT_VERSION:
+            raise ValueError(f'Compact format version {encoded["version"]} is newer than supported {FORMAT_VERSION}')
+
+        data = {}
+
+        for key in encoded['keys']:
+            if key == 'players':
+                data[key] = [self.decode_player(player) for player in encoded['players']]
+            elif key == 'tournaments':
+                data[key] = [self.decode_tournament(tournament) for tournament in encoded['tournaments']]
+            else:
+                data[key] = self._decode_value(encoded['other'][key])
+
+        return data
+
+    @staticmethod
+    def encode_player(player: Player) -> list:
+        encoded = [player.name, player.rating, player.hash_id]
+
+        if player.federation_id:
+            encoded.append(player.federation_id)
+
+        return encoded
+
+    @staticmethod
+    def decode_player(encoded: list) -> Player:
+        name, rating, hash_id, *federation_id = encoded
+        return Player(name, rating, hash_id=hash_id, federation_id=federation_id[0] if federation_id else 0)
+
+    def encode_tournament(self, tournament: Any) -> list:
+        if type(tournament) is not InteractiveTournament:
+            return [ENCODED_VALUE, self._encode_value(tournament)]
+
+        data = srl.TournamentDataSerializer().encode(tournament.data)
+        settings = srl.TournamentSettingsSerializer().encode(tournament.get_settings())
+        rounds = []
+
+        for round_ in tournament.iter_rounds():
+            rounds.append([
+                [player for pair in round_.pairs for player in pair],
+                [RESULT_TO_CODE[result] for result in round_.results],
+            ])
+
+        encoded = [
+            INTERACTIVE_TOURNAMENT,
+            [data['name'], data['category'], data['start_timestamp'], data['finish_timestamp']],
+            [settings['elo_k_value'], settings['scorer']],
+            [self.encode_player(player) for player in tournament.players],
+            rounds,
+            tournament.is_finished(),
+        ]
+
+        if tournament.is_finished():
+            encoded.append([tournament.get_stats_checksum(), srl.RoundStatsSerializer().encode(tournament.stats)])
+
+        return encoded
+
+    def decode_tournament(self, encoded: list) -> Any:
+        if encoded[0] == ENCODED_VALUE:
+            return self._decode_value(encoded[1])
+
+        kind, (name, category, start, finish), (elo_k_value, scorer), players, rounds, is_finished, *stats = encoded
+
+        data = {
+            'data': srl.TournamentDataSerializer().decode({
+                'name': name, 'category': category, 'start_timestamp': start, 'finish_timestamp': finish,
+            }),
+            'players': [self.decode_player(player) for player in players],
+            'rounds': [
+                [list(zip(flat_pairs[::2], flat_pairs[1::2])), [RESULT_CODES[code] for code in codes]]
+                for flat_pairs, codes in rounds
+            ],
+            'is_finished': is_finished,
+            'settings': srl.TournamentSettingsSerializer().decode({'elo_k_value': elo_k_value, 'scorer': scorer}),
+        }
+
+        if stats:
+            checksum, encoded_stats = stats[0]
+            data['stats'] = {'checksum': checksum, 'final': srl.RoundStatsSerializer().decode(encoded_stats)}
+
+        return srl.InteractiveTournamentSerializer.from_dict(data)
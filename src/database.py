@@ -1,61 +1,563 @@
+import copy
 import json
 import os
+import threading
 
-from typing import Any
+from typing import Any, Iterator
 
 from src import serializer as srl
+from src.compact_format import FORMAT_NAME, CompactFormat, can_be_compacted, is_compact
+from src.migrations import SCHEMA_VERSION, UNVERSIONED, pending_migrations, upgrade_file, upgrade_record
+from src.storage.file_lock import FileLock
+from src.storage.json_stream import JsonStream
+from src.storage.warm_cache import WarmCache
+from src.tournament.player import Player
+from src.tournament.tournament_metadata import TournamentMetadata
 
 
 SERIALIZERS = [
     srl.DefaultSerializer(),
     srl.NestedSerializer(),
     srl.InteractiveTournamentSerializer(),
+    srl.KnockoutTournamentSerializer(),
     srl.PlayerSerializer(),
     srl.GameResultSerializer(),
     srl.TournamentSettingsSerializer(),
     srl.TournamentDataSerializer(),
+    srl.RoundStatsSerializer(),
 ]
 
+INDEX_VERSION = 1
+
+# Top level lists the compact format stores positionally, other entries stay in the envelope format
+COMPACT_LISTS = ('players', 'tournaments')
+
 
 class Database:
-    def __init__(self, filename: str, default_data: Any = None, *serializers: srl.Serializer):
+    def __init__(self, filename: str, default_data: Any = None, *serializers: srl.Serializer,
+                 compact_format: bool = False):
         self._filename = filename if filename.endswith('.json') else (filename + '.json')
         self.default_data = default_data
-        self.serializers = SERIALIZERS + list(serializers)
+        self.serializers = [self.__bind(serializer) for serializer in SERIALIZERS + list(serializers)]
+        self.compact_format = compact_format
+        self._compact_codec = CompactFormat(self._encode, self._decode)
+        self._exclusive_lock: FileLock | None = None
+
+        self._encoders: dict[type, tuple[str | int, srl.Serializer]] = {}
+        self._decoders: dict[str | int, srl.Serializer] = {}
+        self.__register_serializers()
+
+    def __bind(self, serializer: srl.Serializer) -> srl.Serializer:
+        """Copies the serializer so that its super encoders point to this database only"""
+
+        if not isinstance(serializer, srl.Serializer):
+            raise TypeError(f'{serializer!r} is not a Serializer')
 
-    def _setup_serializers_super_encoders(self):
+        serializer = copy.copy(serializer)
+        serializer.super_encode = self._encode
+        serializer.super_decode = self._decode
+        return serializer
+
+    def __register_serializers(self):
         for serializer in self.serializers:
-            serializer.super_encode = self._encode
-            serializer.super_decode = self._decode
+            unique_id = serializer.get_unique_id()
 
-    def _encode(self, obj: Any) -> srl.BasicSerializableType:
+            if unique_id in self._decoders:
+                raise ValueError(f'Serializer id {unique_id} is registered twice')
+
+            self._decoders[unique_id] = serializer
+
+            for type_ in serializer.types:
+                self._encoders.setdefault(type_, (unique_id, serializer))
+
+    def __find_serializer(self, obj: Any) -> tuple[str | int, srl.Serializer]:
         for serializer in self.serializers:
             if serializer.can_serialize(obj):
-                return {
-                    '__serializer__': serializer.get_unique_id(),
-                    '__data__': serializer.encode(obj)
-                }
+                return serializer.get_unique_id(), serializer
 
         raise ValueError(f'No serializer found for type {type(obj)}')
 
+    def _encode(self, obj: Any) -> srl.BasicSerializableType:
+        unique_id, serializer = self._encoders.get(type(obj)) or self.__find_serializer(obj)
+
+        return {
+            '__serializer__': unique_id,
+            '__data__': serializer.encode(obj)
+        }
+
     def _decode(self, data: srl.BasicSerializableType) -> Any:
-        for serializer in self.serializers:
-            if data['__serializer__'] == serializer.get_unique_id():
-                return serializer.decode(data['__data__'])
+        serializer = self._decoders.get(data['__serializer__'])
 
-        raise ValueError(f'Cannot parse type {type(data)}')
+        if serializer is None:
+            raise ValueError(f'Cannot parse type {data["__serializer__"]}')
 
-    def write(self, data: Any):
-        self._setup_serializers_super_encoders()
+        return serializer.decode(data['__data__'])
 
-        with open(self._filename, 'w') as f:
-            json.dump(self._encode(data), f, indent=2)
+    def _encode_file(self, data: Any) -> srl.BasicSerializableType:
+        """Encodes the whole file content, in the compact format when it is enabled and data has its layout"""
 
-    def read(self) -> Any:
-        self._setup_serializers_super_encoders()
+        if self.compact_format and can_be_compacted(data):
+            return self._compact_codec.encode(data)
+
+        return {'version': SCHEMA_VERSION, **self._encode(data)}
+
+    def _decode_file(self, encoded: srl.BasicSerializableType) -> Any:
+        """
+        Decodes the whole file content, detecting whether it is in the compact or the envelope format. Files of
+        older schema versions are migrated first.
+        """
 
+        encoded = upgrade_file(encoded)
+
+        if is_compact(encoded):
+            return self._compact_codec.decode(encoded)
+
+        return self._decode(encoded)
+
+    def _write_encoded(self, encoded: srl.BasicSerializableType):
+        tmp_filename = self._filename + '.tmp'
+
+        with open(tmp_filename, 'w') as f:
+            if is_compact(encoded):
+                json.dump(encoded, f, separators=(',', ':'))
+            else:
+                json.dump(encoded, f, indent=2)
+
+        os.replace(tmp_filename, self._filename)
+
+    def _create_if_missing(self):
+        if not os.path.isfile(self._filename):
+            self._write_encoded(self._encode_file(self.default_data))
+
+    def _read_encoded(self) -> srl.BasicSerializableType:
+        self._create_if_missing()
+
+        with open(self._filename, 'r') as f:
+            return json.load(f)
+
+    @property
+    def _index_filename(self) -> str:
+        return os.path.splitext(self._filename)[0] + '.index.json'
+
+    def _file_stamp(self) -> list[int] | None:
         if not os.path.isfile(self._filename):
-            self.write(self.default_data)
+            return None
+
+        stat = os.stat(self._filename)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _write_index(self, data: Any):
+        """Writes the tournaments metadata next to the database file, stamped with the file it describes"""
+
+        if type(data) is not dict or type(data.get('tournaments')) is not list:
+            return
+
+        try:
+            tournaments = [TournamentMetadata.of(tournament).to_list() for tournament in data['tournaments']]
+        except ValueError:
+            return
+
+        tmp_filename = self._index_filename + '.tmp'
+
+        with open(tmp_filename, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'source': self._file_stamp(), 'tournaments': tournaments}, f)
+
+        os.replace(tmp_filename, self._index_filename)
+
+    def _read_index(self) -> list[TournamentMetadata] | None:
+        """Returns the tournaments metadata if the index still describes the database file"""
+
+        try:
+            with open(self._index_filename, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if index.get('version') != INDEX_VERSION or index.get('source') != self._file_stamp():
+            return None
+
+        return [TournamentMetadata.from_list(tournament) for tournament in index['tournaments']]
+
+    def write(self, data: Any):
+        self._write_encoded(self._encode_file(data))
+        self._write_index(data)
+
+    def read(self) -> Any:
+        return self._decode_file(self._read_encoded())
+
+    # Methods below expect the {'players': [...], 'tournaments': [...], ...} layout of the application database
+
+    def read_players(self) -> list[Player]:
+        return self.read()['players']
+
+    def read_tournaments(self) -> list:
+        return self.read()['tournaments']
+
+    def read_tournaments_metadata(self) -> list[TournamentMetadata]:
+        index = self._read_index()
+
+        if index is None:
+            data = self.read()
+            self._write_index(data)
+            index = [TournamentMetadata.of(tournament) for tournament in data['tournaments']]
+
+        return index
+
+    # Streaming reads walk the file instead of loading it, only the requested entries are decoded
+
+    def iter_entries(self, key: str) -> Iterator[Any]:
+        """Yields items of the top level list under key one at a time, e.g. iter_entries('tournaments')"""
+
+        for compact, encoded in self.iter_encoded_entries(key):
+            yield self.decode_entry_item(key, encoded, compact)
+
+    def iter_encoded_entries(self, key: str) -> Iterator[tuple[bool, srl.BasicSerializableType]]:
+        """
+        Yields items of the top level list under key as they are stored, with whether they are in the compact
+        format, see decode_entry_item()
+        """
+
+        self._create_if_missing()
+
+        with open(self._filename, 'r') as f:
+            stream = JsonStream(f)
+            compact, version = self.__find_entry(stream, key, items=True)
+            steps = pending_migrations(version)
+
+            for _ in stream.iter_array():
+                yield compact, upgrade_record(key, stream.read_value(), compact, steps)
+
+    def decode_entry_item(self, key: str, encoded: srl.BasicSerializableType, compact: bool) -> Any:
+        if not compact:
+            return self._decode(encoded)
+
+        if key == 'players':
+            return self._compact_codec.decode_player(encoded)
+
+        return self._compact_codec.decode_tournament(encoded)
+
+    def read_entry(self, key: str, index: int | None = None) -> Any:
+        """Decodes the top level entry under key, or only its item at index, without decoding the rest"""
+
+        self._create_if_missing()
 
         with open(self._filename, 'r') as f:
-            return self._decode(json.load(f))
+            stream = JsonStream(f)
+            compact, version = self.__find_entry(stream, key, items=index is not None)
+            steps = pending_migrations(version)
+
+            if index is not None:
+                stream.find_index(index)
+                return self.decode_entry_item(key, upgrade_record(key, stream.read_value(), compact, steps), compact)
+
+            if compact:
+                return [self.decode_entry_item(key, upgrade_record(key, item, compact, steps), compact)
+                        for item in stream.read_value()]
+
+            encoded = stream.read_value()
+
+            if key not in COMPACT_LISTS:
+                encoded = upgrade_record(key, encoded, compact, steps)
+            elif steps:
+                encoded['__data__'] = [upgrade_record(key, item, compact, steps) for item in encoded['__data__']]
+
+            return self._decode(encoded)
+
+    def iter_players(self) -> Iterator[Player]:
+        return self.iter_entries('players')
+
+    def iter_tournaments(self) -> Iterator[Any]:
+        return self.iter_entries('tournaments')
+
+    def __find_entry(self, stream: JsonStream, key: str, items: bool) -> tuple[bool, int]:
+        """
+        Moves the stream to the encoded entry under key (or to the list of its items) in either file format and
+        returns whether it is a list of the compact format and the schema version of the file (written before the
+        entries)
+        """
+
+        nested_id = srl.NestedSerializer().get_unique_id()
+        version = UNVERSIONED
+
+        for root_key in stream.iter_object():
+            if root_key == '__format__':
+                if stream.read_value() != FORMAT_NAME:
+                    raise ValueError('Unknown database file format')
+            elif root_key == 'version':
+                version = stream.read_value()
+                pending_migrations(version)
+            elif root_key == '__serializer__':
+                if stream.read_value() != nested_id:
+                    raise ValueError('Database file does not hold a dict')
+            elif root_key == key and key in COMPACT_LISTS:
+                return True, version
+            elif root_key == '__data__' or (root_key == 'other' and key not in COMPACT_LISTS):
+                stream.find_key(key)
+
+                if items:
+                    self.__enter_list(stream, nested_id)
+
+                return False, version
+            else:
+                stream.skip_value()
+
+        raise KeyError(key)
+
+    @staticmethod
+    def __enter_list(stream: JsonStream, nested_id: str | int):
+        for envelope_key in stream.iter_object():
+            if envelope_key == '__serializer__':
+                if stream.read_value() != nested_id:
+                    raise ValueError('Entry is not a list')
+            elif envelope_key == '__data__':
+                return
+            else:
+                stream.skip_value()
+
+        raise ValueError('Entry has no data')
+
+    def update_players(self, players: list[Player]):
+        db = self.read()
+        db['players'] = players
+        self.write(db)
+
+    def update_tournament(self, tournament_id: int, tournament: Any):
+        db = self.read()
+        db['tournaments'][tournament_id] = tournament
+        self.write(db)
+
+    def add_tournament(self, tournament: Any) -> int:
+        db = self.read()
+        db['tournaments'].append(tournament)
+        self.write(db)
+        return len(db['tournaments']) - 1
+
+    def commit(self):
+        pass
+
+    def lock_exclusively(self):
+        """
+        Takes the lock a program keeps while it has the database file open, until close(). Another program doing the
+        same fails with LockTimeout instead of overwriting the file behind this one.
+        """
+
+        lock = FileLock(os.path.splitext(self._filename)[0] + '.lock', timeout=0)
+        lock.acquire()
+        self._exclusive_lock = lock
+
+    def _release_exclusive_lock(self):
+        if self._exclusive_lock is not None:
+            self._exclusive_lock.release()
+            self._exclusive_lock = None
+
+    def close(self):
+        self.commit()
+        self._release_exclusive_lock()
+
+
+class CachedDatabase(Database):
+    """
+    Keeps the decoded database in memory and writes it back behind the caller. Only tournaments and top level
+    entries marked dirty are encoded again, the rest is written from cached encoded fragments (of whichever file
+    format is written).
+    """
+
+    def __init__(self, filename: str, default_data: Any = None, *serializers: srl.Serializer,
+                 compact_format: bool = False, flush_delay: float | None = 1.0, warm_cache: bool = False):
+        super().__init__(filename, default_data, *serializers, compact_format=compact_format)
+        self.flush_delay = flush_delay
+        self._warm_cache = WarmCache(self._filename, self.__decode_warm_cache) if warm_cache else None
+
+        self._data: dict | None = None
+        self._encoded: dict[str, srl.BasicSerializableType] = {}
+        self._encoded_tournaments: list[srl.BasicSerializableType | None] = []
+        self._encoded_compact = False  # format of the cached fragments
+        self._dirty_keys: set[str] = set()
+        self._dirty_tournaments: set[int] = set()
+
+        self._lock = threading.RLock()
+        self._flush_timer: threading.Timer | None = None
+
+    @property
+    def is_dirty(self) -> bool:
+        return len(self._dirty_keys) > 0 or len(self._dirty_tournaments) > 0
+
+    def read(self) -> Any:
+        with self._lock:
+            if self._data is None:
+                self.__load()
+
+            return self._data
+
+    def __load(self):
+        data = self._warm_cache.load() if self._warm_cache is not None else None
+        encoded = None
+
+        if data is None:
+            encoded = self._read_encoded()
+            data = self._decode_file(encoded)
+
+            if type(data) is not dict or type(data.get('tournaments')) is not list:
+                raise ValueError('CachedDatabase needs a dict with a tournaments list at the top level')
+
+        self._data = data
+
+        if encoded is None:
+            self._encoded = {}
+            self._encoded_tournaments = [None for _ in data['tournaments']]
+        elif is_compact(encoded):
+            self._encoded = {'players': encoded['players'], **encoded['other']}
+            self._encoded_tournaments = list(encoded['tournaments'])
+        else:
+            self._encoded = dict(encoded['__data__'])
+            self._encoded_tournaments = list(self._encoded.pop('tournaments')['__data__'])
+
+        self._encoded_compact = encoded is not None and is_compact(encoded)
+
+        self._dirty_keys.clear()
+        self._dirty_tournaments.clear()
+
+        if encoded is not None and self._warm_cache is not None:
+            self._warm_cache.schedule()
+
+    def __decode_warm_cache(self, content: bytes) -> Any:
+        return self._decode_file(json.loads(content))
+
+    def read_tournaments_metadata(self) -> list[TournamentMetadata]:
+        with self._lock:
+            if self._data is None:
+                return super().read_tournaments_metadata()
+
+            return [TournamentMetadata.of(tournament) for tournament in self._data['tournaments']]
+
+    def iter_entries(self, key: str) -> Iterator[Any]:
+        with self._lock:
+            loaded = self._data is not None
+            items = list(self._data[key]) if loaded else None
+
+        yield from items if loaded else super().iter_entries(key)
+
+    def read_entry(self, key: str, index: int | None = None) -> Any:
+        with self._lock:
+            if self._data is None:
+                return super().read_entry(key, index)
+
+            return self._data[key] if index is None else self._data[key][index]
+
+    def write(self, data: Any):
+        with self._lock:
+            self._data = data
+            self._encoded.clear()
+            self._encoded_tournaments = [None for _ in data['tournaments']]
+            self._dirty_keys = set(data.keys()) - {'tournaments'}
+            self._dirty_tournaments = set(range(len(data['tournaments'])))
+
+        self._schedule_flush()
+
+    def update_players(self, players: list[Player]):
+        with self._lock:
+            self.read()['players'] = players
+            self._dirty_keys.add('players')
+
+        self._schedule_flush()
+
+    def update_tournament(self, tournament_id: int, tournament: Any):
+        with self._lock:
+            self.read()['tournaments'][tournament_id] = tournament
+            self._dirty_tournaments.add(tournament_id % len(self._encoded_tournaments))
+
+        self._schedule_flush()
+
+    def add_tournament(self, tournament: Any) -> int:
+        with self._lock:
+            tournaments = self.read()['tournaments']
+            tournaments.append(tournament)
+            self._encoded_tournaments.append(None)
+            self._dirty_tournaments.add(len(tournaments) - 1)
+
+        self._schedule_flush()
+        return len(tournaments) - 1
+
+    def mark_dirty(self, key: str):
+        with self._lock:
+            self._dirty_keys.add(key)
+
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.flush_delay is None:
+            return
+
+        with self._lock:
+            if self._flush_timer is not None:
+                return
+
+            self._flush_timer = threading.Timer(self.flush_delay, self.commit)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def commit(self):
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+            if self._data is None or not self.is_dirty:
+                return
+
+            self._write_encoded(self.__encode_dirty())
+
+            self._write_index(self._data)
+
+            self._dirty_keys.clear()
+            self._dirty_tournaments.clear()
+
+            if self._warm_cache is not None:
+                self._warm_cache.schedule()
+
+    def close(self):
+        """Commits and writes a pending warm cache rebuild"""
+
+        self.commit()
+
+        if self._warm_cache is not None:
+            self._warm_cache.flush()
+
+        self._release_exclusive_lock()
+
+    def __encode_dirty(self) -> srl.BasicSerializableType:
+        tournaments = self._data['tournaments']
+        compact = self.compact_format and can_be_compacted(self._data)
+
+        if compact != self._encoded_compact:
+            self._encoded = {}
+            self._encoded_tournaments = []
+            self._encoded_compact = compact
+
+        if len(tournaments) != len(self._encoded_tournaments):
+            self._encoded_tournaments = [None for _ in tournaments]
+            self._dirty_tournaments = set(range(len(tournaments)))
+
+        not_encoded = {i for i, encoded in enumerate(self._encoded_tournaments) if encoded is None}
+        encode_tournament = self._compact_codec.encode_tournament if compact else self._encode
+
+        for tournament_id in self._dirty_tournaments | not_encoded:
+            self._encoded_tournaments[tournament_id] = encode_tournament(tournaments[tournament_id])
+
+        for key in self._dirty_keys | (self._data.keys() - self._encoded.keys() - {'tournaments'}):
+            if key not in self._data:
+                self._encoded.pop(key, None)
+            elif compact:
+                self._encoded[key] = self._compact_codec.encode_entry(key, self._data[key])
+            else:
+                self._encoded[key] = self._encode(self._data[key])
+
+        if compact:
+            return self._compact_codec.combine(self._data.keys(),
+                                               {**self._encoded, 'tournaments': self._encoded_tournaments})
+
+        nested_id = srl.NestedSerializer().get_unique_id()
+        top_level = {key: self._encoded[key] for key in self._data if key != 'tournaments'}
+        top_level['tournaments'] = {'__serializer__': nested_id, '__data__': self._encoded_tournaments}
+
+        return {'version': SCHEMA_VERSION, '__serializer__': nested_id, '__data__': top_level}
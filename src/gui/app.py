@@ -1,4 +1,5 @@
 import tkinter as tk
+from tkinter import messagebox
 
 from src.database import Database
 from src.gui.content_frame import ContentFrame
@@ -11,17 +12,22 @@ from src.gui.subwindows.player_explorer import PlayerExplorer
 from src.gui.subwindows.tournament_creator import TournamentCreator
 from src.gui.subwindows.tournament_data_view import TournamentDataView
 from src.gui.subwindows.tournament_explorer import TournamentExplorer
+from src.storage.autosave_writer import AutosaveWriter
+from src.storage.sharded_database import WriteConflictError
 from src.tournament.interactive_tournament import InteractiveTournament
 from src.tournament.pairing.dutch_pairer import DutchPairer
 from src.tournament.player import Player
 from src.tournament.round import GameResult, Round
 
+AUTOSAVE_CHECK_INTERVAL = 1000  # ms
+
 
 class App(tk.Tk, NavbarListener):
     def __init__(self, database: Database):
         super().__init__()
 
         self.database = database
+        self.autosave = AutosaveWriter(database)
 
         self.tournament_id: int | None = None
         self.tournament: InteractiveTournament | None = None
@@ -30,6 +36,7 @@ class App(tk.Tk, NavbarListener):
         self.bind('<Control-D>', lambda *_: DeveloperConsole(self))
 
         self.__define_layout()
+        self.after(AUTOSAVE_CHECK_INTERVAL, self.__report_autosave_errors)
 
     def __define_layout(self):
         self.geometry('1200x800')
@@ -61,9 +68,20 @@ class App(tk.Tk, NavbarListener):
         self.leaderboard_bar.update_leaderboard(self.tournament)
 
         if self.tournament is not None and autosave:
-            db = self.database.read()
-            db['tournaments'][self.tournament_id] = self.tournament
-            self.database.write(db)
+            self.autosave.save_tournament(self.tournament_id, self.tournament)
+
+    def __report_autosave_errors(self):
+        error = self.autosave.pop_write_error()
+
+        if isinstance(error, WriteConflictError):
+            question = f'{error}.\nReload the tournament and drop the changes made here?'
+
+            if messagebox.askyesno('Autosave conflict', question, parent=self):
+                self.reload_tournament()
+        elif error is not None:
+            messagebox.showerror('Autosave failed', f'Changes could not be saved:\n{error}', parent=self)
+
+        self.after(AUTOSAVE_CHECK_INTERVAL, self.__report_autosave_errors)
 
     def __update_content_view(self, page: int):
         self.content_frame.update_tournament_view(tournament=self.tournament, page=page)
@@ -73,25 +91,34 @@ class App(tk.Tk, NavbarListener):
         if self.tournament is not None:
             self.unload_tournament()
 
-        db = self.database.read()
-
+        self.autosave.flush()
         self.tournament_id = tournament_id
-        self.tournament = db['tournaments'][tournament_id]
+        self.tournament = self.database.read_tournaments()[tournament_id]
+        self.autosave.mark_tournament_saved(tournament_id, self.tournament)
         self.__auto_save_and_refresh_view(autosave=False)
 
+    def reload_tournament(self):
+        """Replaces the opened tournament with the one in the database, changes not saved are dropped"""
+
+        if self.tournament is None:
+            return
+
+        tournament_id = self.tournament_id
+        self.tournament = None
+        self.load_tournament(tournament_id)
+
     def unload_tournament(self):
         if self.tournament is None:
             return
 
+        self.autosave.save_tournament(self.tournament_id, self.tournament)
         self.tournament_id = None
         self.tournament = None
-        self.__auto_save_and_refresh_view()
+        self.__auto_save_and_refresh_view(autosave=False)
 
     def create_new_tournament(self, tournament: InteractiveTournament):
-        db = self.database.read()
-        db['tournaments'].append(tournament)
-        self.database.write(db)
-        self.load_tournament(len(db['tournaments']) - 1)
+        self.autosave.flush()
+        self.load_tournament(self.database.add_tournament(tournament))
 
     def add_player_to_tournament(self, player: Player):
         self.tournament.add_player(player)
@@ -145,6 +172,10 @@ class App(tk.Tk, NavbarListener):
             return
 
         results = {(x - 1, result) for x in self.content_frame.table.get_selection()}
+
+        if not results:
+            return
+
         self.tournament.set_results_from_iterable(results)
 
         self.__auto_save_and_refresh_view()
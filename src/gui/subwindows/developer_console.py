@@ -95,6 +95,7 @@ class DeveloperConsole(TransientToplevel):
             'db': self.parent.database.read(),
             'dbp': self.parent.database.read().get('players', None),
             'dbt': self.parent.database.read().get('tournaments', None),
+            'autosave': self.parent.autosave,
         }
 
         namespace['namespace'] = list(namespace.keys())
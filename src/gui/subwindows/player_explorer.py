@@ -1,3 +1,4 @@
+import bisect
 import tkinter as tk
 from typing import Callable
 
@@ -6,7 +7,7 @@ from src.gui.subwindows.player_editor import PlayerEditor
 from src.gui.widgets.image_button import ImageButton
 from src.gui.widgets.table_frame import TableFrame
 from src.gui.widgets.transient_toplevel import TransientToplevel
-from src.tournament.player import Player
+from src.tournament.player import Player, players_fingerprint
 
 
 class PlayerExplorer(TransientToplevel):
@@ -25,14 +26,14 @@ class PlayerExplorer(TransientToplevel):
         self.minsize(400, 180)
 
         self.table = TableFrame(self)
-        self.__update_table(self.database.read())
+        self.__update_table(self.database.read_players())
 
         create_player_btn = ImageButton(self, 'plus.png', 64, command=self.__show_player_creation_window)
 
         self.table.place(x=0, y=0, relwidth=1, relheight=1)
         create_player_btn.place(x=-78, relx=1, y=-78, rely=1, width=70, height=70)
 
-    def __update_table(self, db):
+    def __update_table(self, players: list[Player]):
         headers = ['#', 'Gracz', 'Ranking', '', '', '']
         rows = [
             [
@@ -43,7 +44,7 @@ class PlayerExplorer(TransientToplevel):
                 self.__create_edit_player_btn(i),
                 self.__create_delete_player_btn(i),
             ]
-            for i, player in enumerate(db['players'])
+            for i, player in enumerate(players)
         ]
 
         self.table.set_data([headers, *rows])
@@ -62,33 +63,34 @@ class PlayerExplorer(TransientToplevel):
                            command=lambda i=index: self._show_player_editor(i))
 
     def _add_player_to_tournament(self, player_id: int):
-        db = self.database.read()
-        self._add_player(db['players'][player_id])
+        self._add_player(self.database.read_players()[player_id])
 
     def _delete_player(self, player_id: int):
-        db = self.database.read()
-        del db['players'][player_id]
-        self.database.write(db)
-        self.__update_table(db)
+        players = self.database.read_players()
+        del players[player_id]
+        self.database.update_players(players)
+        self.__update_table(players)
 
     def _show_player_editor(self, player_id: int):
-        db = self.database.read()
         PlayerEditor(self, lambda p, i=player_id: self.__save_player_to_db(i, p),
-                     player_to_edit=db['players'][player_id])
+                     player_to_edit=self.database.read_players()[player_id])
 
     def __show_player_creation_window(self):
         PlayerEditor(self, self.__add_new_player_to_db)
 
     def __save_player_to_db(self, player_id: int, player: Player):
-        db = self.database.read()
-        db['players'][player_id] = player
-        db['players'].sort()
-        self.database.write(db)
-        self.__update_table(db)
+        players = self.database.read_players()
+        fingerprint = players_fingerprint(players)
+        players[player_id] = player
+        players.sort()
+
+        if players_fingerprint(players) != fingerprint:
+            self.database.update_players(players)
+
+        self.__update_table(players)
 
     def __add_new_player_to_db(self, player: Player):
-        db = self.database.read()
-        db['players'].append(player)
-        db['players'].sort()
-        self.database.write(db)
-        self.__update_table(db)
+        players = self.database.read_players()
+        bisect.insort(players, player)
+        self.database.update_players(players)
+        self.__update_table(players)
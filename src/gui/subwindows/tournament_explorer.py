@@ -32,12 +32,12 @@ class TournamentExplorer(TransientToplevel):
         rows = [
             [
                 i + 1,
-                tournament.data.name,
-                self.__parse_time(tournament.data.start_timestamp),
-                self.__parse_time_difference(tournament.data.start_timestamp, tournament.data.finish_timestamp),
+                metadata.data.name,
+                self.__parse_time(metadata.data.start_timestamp),
+                self.__parse_time_difference(metadata.data.start_timestamp, metadata.data.finish_timestamp),
                 self._create_open_btn(i),
             ]
-            for i, tournament in enumerate(self.database.read()['tournaments'])
+            for i, metadata in enumerate(self.database.read_tournaments_metadata())
         ]
 
         self.table.set_data([headers, *rows])
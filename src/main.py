@@ -1,19 +1,57 @@
-from src.database import Database
+from src.database import CachedDatabase, Database
 from src.gui.app import App
+from src.storage.file_lock import LockTimeout
+from src.storage.journaled_database import JournaledDatabase
+from src.storage.sharded_database import ShardedDatabase
+from src.storage.sqlite_database import SqliteDatabase
 
-
-GLOBAL_DATABASE = Database('database.tmp.json', default_data={
+DEFAULT_DATA = {
     'players': [],
     'tournaments': [],
     'settings': {},
-})
+}
+
+# The single file backends (json, journal, sqlite) have one writer by design, a second program opening the same
+# database exits. Several windows or computers sharing a folder need the 'sharded' backend, which locks and merges
+# every tournament on its own.
+DATABASE_BACKEND = 'journal'
+
+
+def create_database(backend: str) -> Database:
+    if backend == 'json':
+        return CachedDatabase('database.tmp.json', default_data=DEFAULT_DATA, compact_format=True, warm_cache=True)
+
+    if backend == 'journal':
+        return JournaledDatabase('database.tmp.json', default_data=DEFAULT_DATA, compact_format=True,
+                                 warm_cache=True)
+
+    if backend == 'sqlite':
+        return SqliteDatabase('database.tmp.sqlite3', default_data=DEFAULT_DATA)
+
+    if backend == 'sharded':  # safe to open from several processes at once
+        return ShardedDatabase('database.tmp', default_data=DEFAULT_DATA)
+
+    raise ValueError(f'Unknown database backend {backend}')
+
+
+GLOBAL_DATABASE = create_database(DATABASE_BACKEND)
 
 
 def main():
+    if DATABASE_BACKEND != 'sharded':
+        try:
+            GLOBAL_DATABASE.lock_exclusively()
+        except LockTimeout:
+            raise SystemExit('The database is already open in another window, use the sharded backend to open it '
+                             'in several at once') from None
+
     app = App(GLOBAL_DATABASE)
 
     app.mainloop()
 
+    app.autosave.close()
+    GLOBAL_DATABASE.close()
+
 
 if __name__ == '__main__':
     main()
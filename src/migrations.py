@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from src import serializer as srl
+from src.compact_format import FORMAT_VERSION, is_compact
+
+# One schema version for both file formats. Files in the envelope format written before it existed have none,
+# they are version 1.
+SCHEMA_VERSION = FORMAT_VERSION
+UNVERSIONED = 1
+
+RECORD_LISTS = ('players', 'tournaments')
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """
+    Step of the database schema from version - 1 to version. Each function gets one encoded record as it is stored
+    (compact tells in which file format) and returns it in the new schema, missing functions leave records as they
+    are. Other entries are the top level values besides players and tournaments, passed with their key.
+    """
+
+    version: int
+    description: str
+    tournament: Callable[[Any, bool], Any] | None = None
+    player: Callable[[Any, bool], Any] | None = None
+    other: Callable[[str, Any, bool], Any] | None = None
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(2, 'Finished tournaments may carry their final stats, older records simply have none'),
+    Migration(3, 'Players may carry a federation id, older records simply have none'),
+)
+
+
+def pending_migrations(version: int, migrations: Iterable[Migration] = MIGRATIONS) -> list[Migration]:
+    """Steps bringing a file of version up to SCHEMA_VERSION, in order"""
+
+    if version > SCHEMA_VERSION:
+        raise ValueError(f'Database file version {version} is newer than supported {SCHEMA_VERSION}')
+
+    steps = sorted((migration for migration in migrations if migration.version > version), key=lambda m: m.version)
+
+    if [step.version for step in steps] != list(range(version + 1, SCHEMA_VERSION + 1)):
+        raise ValueError(f'No migration path from version {version} to {SCHEMA_VERSION}')
+
+    return steps
+
+
+def upgrade_record(key: str, record: Any, compact: bool, steps: Iterable[Migration]) -> Any:
+    """Applies the steps to a record of the top level entry key (an item of players or tournaments or other value)"""
+
+    for step in steps:
+        if key == 'tournaments' and step.tournament is not None:
+            record = step.tournament(record, compact)
+        elif key == 'players' and step.player is not None:
+            record = step.player(record, compact)
+        elif key not in RECORD_LISTS and step.other is not None:
+            record = step.other(key, record, compact)
+
+    return record
+
+
+def file_version(encoded: srl.BasicSerializableType) -> int:
+    return encoded.get('version', UNVERSIONED) if type(encoded) is dict else UNVERSIONED
+
+
+def upgrade_file(encoded: srl.BasicSerializableType) -> srl.BasicSerializableType:
+    """Brings a whole encoded database file (already in memory) to SCHEMA_VERSION, records are replaced in place"""
+
+    version = file_version(encoded)
+    steps = pending_migrations(version)
+
+    if not steps:
+        return encoded
+
+    compact = is_compact(encoded)
+
+    if compact:
+        lists, other = encoded, encoded['other']
+    elif type(encoded.get('__data__')) is dict:
+        lists = {key: value['__data__'] for key, value in encoded['__data__'].items()
+                 if key in RECORD_LISTS and type(value) is dict and type(value.get('__data__')) is list}
+        other = encoded['__data__']
+    else:
+        lists, other = {}, {}
+
+    for key in RECORD_LISTS:
+        if key in lists:
+            lists[key][:] = [upgrade_record(key, record, compact, steps) for record in lists[key]]
+
+    for key, value in other.items():
+        if key not in RECORD_LISTS:
+            other[key] = upgrade_record(key, value, compact, steps)
+
+    return {**encoded, 'version': SCHEMA_VERSION}
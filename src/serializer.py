@@ -5,8 +5,10 @@ from typing import Any, Union
 
 from src.tournament import scoring
 from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.knockout_tournament import KnockoutTournament
 from src.tournament.player import Player
-from src.tournament.round import GameResult
+from src.tournament.round import GameResult, Round
+from src.tournament.round_stats import RoundStats
 from src.tournament.tournament import TournamentSettings
 
 BASIC_FLAT_TYPES = (str, int, float, bool, NoneType)
@@ -15,6 +17,9 @@ type BasicSerializableType = dict | list | Union[*BASIC_FLAT_TYPES]
 
 
 class Serializer(ABC):
+    # Exact types handled by the serializer, used for dispatch without calling can_serialize
+    types: tuple[type, ...] = ()
+
     @abstractmethod
     def can_serialize(self, value: Any) -> bool:
         ...
@@ -38,6 +43,8 @@ class Serializer(ABC):
 
 
 class DefaultSerializer(Serializer):
+    types = BASIC_FLAT_TYPES
+
     def can_serialize(self, value) -> bool:
         return type(value) in BASIC_FLAT_TYPES
 
@@ -49,6 +56,8 @@ class DefaultSerializer(Serializer):
 
 
 class NestedSerializer(Serializer):
+    types = (dict, list)
+
     def can_serialize(self, value) -> bool:
         return type(value) in (dict, list)
 
@@ -66,69 +75,101 @@ class NestedSerializer(Serializer):
 
 
 class InteractiveTournamentSerializer(Serializer):
+    types = (InteractiveTournament,)
+
     def can_serialize(self, value) -> bool:
         return type(value) is InteractiveTournament
 
     def encode(self, value: InteractiveTournament) -> BasicSerializableType:
-        return self.super_encode({
+        return self.super_encode(self.to_dict(value))
+
+    @staticmethod
+    def to_dict(value: InteractiveTournament) -> dict[str, Any]:
+        data = {
             'data': value.data,
             'players': list(value.players),
-            'rounds': [
-                [
-                    [list(pair) for pair in value.get_round(i).pairs],
-                    value.get_round(i).results,
-                ]
-                for i in range(value.round_count)
-            ],
+            'rounds': [[[list(pair) for pair in round_.pairs], list(round_.results)] for round_ in value.iter_rounds()],
             'is_finished': value.is_finished(),
             'settings': value.get_settings(),
-        })
+        }
+
+        if value.is_finished():
+            data['stats'] = {'checksum': value.get_stats_checksum(), 'final': value.stats}
+
+        return data
 
     def decode(self, data: BasicSerializableType) -> InteractiveTournament:
-        data = self.super_decode(data)
+        return self.from_dict(self.super_decode(data))
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> InteractiveTournament:
+        players = tuple(data['players'])
+        rounds = [
+            Round.from_results(len(players), tuple((a, b) for a, b in pairs), results)
+            for pairs, results in data['rounds']
+        ]
 
-        tournament = InteractiveTournament()
-        tournament.set_settings(data['settings'])
+        tournament = InteractiveTournament.from_state(data['data'], players, data['settings'], rounds,
+                                                      data['is_finished'])
+        stats = data.get('stats')
+
+        # stats persisted with finished tournaments are adopted only if they were calculated from the same rounds
+        if stats is not None and stats['checksum'] == tournament.get_stats_checksum():
+            tournament.adopt_stats(stats['final'])
+
+        return tournament
 
-        for player_data in data['players']:
-            player = player_data
-            tournament.add_player(player)
 
-        for round_data in data['rounds']:
-            pairs, results = round_data
+class KnockoutTournamentSerializer(Serializer):
+    types = (KnockoutTournament,)
 
-            tournament.next_round(tuple((a, b) for a, b in pairs))
+    def can_serialize(self, value) -> bool:
+        return type(value) is KnockoutTournament
+
+    def encode(self, value: KnockoutTournament) -> BasicSerializableType:
+        return self.super_encode({
+            'data': value.data,
+            'players': list(value.players),
+            'results': [[node, result] for node, result in value.get_decided_matches()],
+        })
 
-            for table, result in enumerate(results):
-                tournament.set_result(table, result)
+    def decode(self, data: BasicSerializableType) -> KnockoutTournament:
+        data = self.super_decode(data)
 
-        if data['is_finished']:
-            tmp_func = getattr(tournament, '_update_ratings')
-            setattr(tournament, '_update_ratings', lambda *_: 0)
-            tournament.finish()
-            setattr(tournament, '_update_ratings', tmp_func)
+        tournament = KnockoutTournament(tuple(data['players']), data['data'])
 
-        tournament.data = data['data']
+        for node, result in sorted(data['results'], key=lambda item: -item[0]):
+            tournament.set_result(node, result)
 
         return tournament
 
 
 class PlayerSerializer(Serializer):
+    types = (Player,)
+
     def can_serialize(self, value) -> bool:
         return type(value) is Player
 
     def encode(self, obj: Player) -> BasicSerializableType:
-        return {
+        data = {
             'name': obj.name,
             'rating': obj.rating,
             'hash_id': obj.hash_id,
         }
 
+        if obj.federation_id:
+            data['federation_id'] = obj.federation_id
+
+        return data
+
     def decode(self, data: BasicSerializableType) -> Player:
-        return Player(data['name'], rating=data['rating'], hash_id=data['hash_id'])
+        return Player(data['name'], rating=data['rating'], hash_id=data['hash_id'],
+                      federation_id=data.get('federation_id', 0))
 
 
 class GameResultSerializer(Serializer):
+    types = (GameResult,)
+
     def can_serialize(self, value) -> bool:
         return type(value) is GameResult
 
@@ -140,6 +181,8 @@ class GameResultSerializer(Serializer):
 
 
 class TournamentSettingsSerializer(Serializer):
+    types = (TournamentSettings,)
+
     def can_serialize(self, value) -> bool:
         return type(value) is TournamentSettings
 
@@ -168,6 +211,8 @@ class TournamentSettingsSerializer(Serializer):
 
 
 class TournamentDataSerializer(Serializer):
+    types = (TournamentData,)
+
     def can_serialize(self, value) -> bool:
         return type(value) is TournamentData
 
@@ -200,3 +245,35 @@ class TournamentDataSerializer(Serializer):
             return None
 
         return datetime.fromtimestamp(time_utc)
+
+
+class RoundStatsSerializer(Serializer):
+    types = (RoundStats,)
+
+    FIELDS = ('round_count', 'color_balance', 'paused', 'color_repetition', 'wins', 'draws', 'losses',
+              'recent_rating_changes')
+
+    def can_serialize(self, value) -> bool:
+        return type(value) is RoundStats
+
+    def encode(self, value: RoundStats) -> BasicSerializableType:
+        return {
+            'players_count': value.players_count,
+            'ratings': value.ratings,
+            'elo_k_value': value.elo_k_value,
+            # [player_a, player_b, games] for a < b, the full matrix is mostly zeros
+            'played_together': [[a, b, games] for a, row in enumerate(value.played_together)
+                                for b, games in enumerate(row) if a < b and games > 0],
+            **{field: getattr(value, field) for field in self.FIELDS},
+        }
+
+    def decode(self, data: BasicSerializableType) -> RoundStats:
+        stats = RoundStats(data['players_count'], tuple(data['ratings']), data['elo_k_value'])
+
+        for field in self.FIELDS:
+            setattr(stats, field, data[field])
+
+        for a, b, games in data['played_together']:
+            stats.played_together[a][b] = stats.played_together[b][a] = games
+
+        return stats
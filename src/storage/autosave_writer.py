@@ -0,0 +1,194 @@
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+from src import serializer as srl
+from src.database import Database
+from src.tournament.interactive_tournament import InteractiveTournament
+from src.tournament.player import Player, players_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_tournament(tournament: Any) -> Callable[[], Any]:
+    """
+    Copies the tournament state on the calling thread and returns a function building an independent tournament
+    from the copy. Only the cheap copy is done by the caller, rebuilding happens on the writer thread.
+    """
+
+    if type(tournament) is not InteractiveTournament:
+        tournament_copy = copy.deepcopy(tournament)
+        return lambda: tournament_copy
+
+    state = srl.InteractiveTournamentSerializer.to_dict(tournament)
+    state['data'] = copy.copy(state['data'])
+    state['rounds'] = [[pairs, list(results)] for pairs, results in state['rounds']]
+
+    return lambda: srl.InteractiveTournamentSerializer.from_dict(state)
+
+
+def tournament_fingerprint(tournament: Any) -> Hashable | None:
+    """None for tournaments without a fingerprint, they are always written"""
+
+    return tournament.get_fingerprint() if type(tournament) is InteractiveTournament else None
+
+
+class AutosaveWriter:
+    """
+    Writes database updates on a background thread. Saves of the same entity submitted within interval seconds are
+    coalesced, only the latest snapshot is written. Saves whose content fingerprint matches the last one written (or
+    marked as saved) are skipped before anything is copied.
+    """
+
+    def __init__(self, database: Database, interval: float = .5):
+        self.database = database
+        self.interval = interval
+
+        self._pending: dict[Hashable, tuple[Callable[[], None], Hashable | None]] = {}
+        self._fingerprints: dict[Hashable, Hashable] = {}
+        self._first_pending_time: float | None = None
+        self._writing = False
+        self._closed = False
+
+        self.last_write_latency: float | None = None
+        self.last_write_error: Exception | None = None
+        self._unreported_error: Exception | None = None
+        self.writes_count = 0
+        self.coalesced_count = 0
+        self.skipped_count = 0
+
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self.__run, name='autosave-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def pop_write_error(self) -> Exception | None:
+        """Returns the last failed write not reported yet, for the UI to poll"""
+
+        with self._condition:
+            error, self._unreported_error = self._unreported_error, None
+            return error
+
+    def mark_tournament_saved(self, tournament_id: int, tournament: Any):
+        """Records the state of the tournament as the one in the database, e.g. right after reading it"""
+
+        self.__mark_saved(('tournament', tournament_id), tournament_fingerprint(tournament))
+
+    def mark_players_saved(self, players: list[Player]):
+        self.__mark_saved(('players',), players_fingerprint(players))
+
+    def __mark_saved(self, key: Hashable, fingerprint: Hashable | None):
+        with self._condition:
+            if fingerprint is None:
+                self._fingerprints.pop(key, None)
+            else:
+                self._fingerprints[key] = fingerprint
+
+    def save_tournament(self, tournament_id: int, tournament: Any):
+        key = ('tournament', tournament_id)
+        fingerprint = tournament_fingerprint(tournament)
+
+        if self.__is_saved(key, fingerprint):
+            return
+
+        build_tournament = snapshot_tournament(tournament)
+        self.__submit(key, lambda: self.database.update_tournament(tournament_id, build_tournament()), fingerprint)
+
+    def save_players(self, players: list[Player]):
+        key = ('players',)
+        fingerprint = players_fingerprint(players)
+
+        if self.__is_saved(key, fingerprint):
+            return
+
+        players = list(players)
+        self.__submit(key, lambda: self.database.update_players(players), fingerprint)
+
+    def __is_saved(self, key: Hashable, fingerprint: Hashable | None) -> bool:
+        with self._condition:
+            if fingerprint is None or self._fingerprints.get(key) != fingerprint:
+                return False
+
+            self.skipped_count += 1
+            return True
+
+    def __submit(self, key: Hashable, write: Callable[[], None], fingerprint: Hashable | None):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('AutosaveWriter is closed')
+
+            if key in self._pending:
+                self.coalesced_count += 1
+
+            self._pending[key] = write, fingerprint
+
+            if fingerprint is None:
+                self._fingerprints.pop(key, None)
+            else:
+                self._fingerprints[key] = fingerprint
+
+            if self._first_pending_time is None:
+                self._first_pending_time = time.monotonic()
+
+            self._condition.notify_all()
+
+    def flush(self):
+        """Blocks until everything submitted so far is written"""
+
+        with self._condition:
+            self._first_pending_time = 0 if self._pending else self._first_pending_time
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: not self._pending and not self._writing)
+
+    def close(self):
+        self.flush()
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join()
+
+    def __run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+
+                if self._closed and not self._pending:
+                    return
+
+                deadline = self._first_pending_time + self.interval
+                self._condition.wait_for(lambda: self._closed or time.monotonic() >= self._first_pending_time +
+                                         self.interval, timeout=max(0., deadline - time.monotonic()))
+
+                writes = list(self._pending.items())
+                self._pending.clear()
+                self._first_pending_time = None
+                self._writing = True
+
+            start = time.perf_counter()
+
+            for key, (write, fingerprint) in writes:
+                try:
+                    write()
+                except Exception as e:
+                    logger.error(f'Autosave failed: {e!r}')
+                    self.last_write_error = e
+
+                    with self._condition:
+                        self._unreported_error = e
+
+                        if fingerprint is not None and self._fingerprints.get(key) == fingerprint:
+                            del self._fingerprints[key]  # not saved, the next save has to write it
+
+            with self._condition:
+                self.last_write_latency = time.perf_counter() - start
+                self.writes_count += 1
+                self._writing = False
+                self._condition.notify_all()
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import sys
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, TextIO
+
+from src.storage.json_stream import JsonStream
+
+MANIFEST_VERSION = 1
+
+LITERAL = 't'
+CHUNK = 'c'
+
+# Segments of a file are stored in groups (content addressed like chunks), so that a snapshot of a file with many
+# tournaments lists a few group hashes and a change rewrites only its group
+SEGMENTS_PER_GROUP = 64
+
+
+class BackupException(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class BackupResult:
+    snapshot_id: str
+    chunks_count: int
+    new_chunks_count: int
+    new_bytes: int
+
+
+def database_files(filename: str) -> list[str]:
+    """
+    Files making up a json database: the journal (if the journaled backend is used) and the database file. The
+    journal goes first, a compaction in between then leaves a newer snapshot and replay skips what it already has.
+    """
+
+    return [os.path.splitext(filename)[0] + '.journal', filename]
+
+
+def entry_spans(f: TextIO) -> list[tuple[int, int]]:
+    """
+    Where the chunks of a database file are (character offsets): every tournament and the players block, in the
+    compact and in the envelope format. A file of another layout has no chunks.
+    """
+
+    spans = []
+
+    try:
+        _walk(JsonStream(f), spans, in_envelope=False)
+    except ValueError:
+        return []
+
+    return spans
+
+
+def _walk(stream: JsonStream, spans: list[tuple[int, int]], in_envelope: bool):
+    for key in stream.iter_object():
+        if key == 'players':
+            spans.append(stream.skip_value())
+        elif key == 'tournaments' and not in_envelope:
+            spans.extend(stream.skip_value() for _ in stream.iter_array())
+        elif key == 'tournaments':
+            for envelope_key in stream.iter_object():
+                if envelope_key == '__data__':
+                    spans.extend(stream.skip_value() for _ in stream.iter_array())
+                else:
+                    stream.skip_value()
+        elif key == '__data__' and not in_envelope:
+            _walk(stream, spans, in_envelope=True)
+        else:
+            stream.skip_value()
+
+
+def _write_atomically(path: str, data: bytes):
+    tmp_path = path + '.tmp'
+
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+class BackupStore:
+    """
+    Incremental backups in a directory. Files are split into chunks (tournaments and the players block of database
+    files, other files as a whole) stored once under their content hash. The list of chunks and the text between
+    them is stored the same way in groups, a snapshot lists the groups of every file. A backup writes only what is
+    not stored yet, so it grows with what changed, and restoring a snapshot gives files byte for byte equal to the
+    backed up ones.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._objects_directory = os.path.join(directory, 'objects')
+        self._snapshots_directory = os.path.join(directory, 'snapshots')
+
+    def __object_path(self, digest: str) -> str:
+        return os.path.join(self._objects_directory, digest[:2], digest[2:])
+
+    def __snapshot_path(self, snapshot_id: str) -> str:
+        return os.path.join(self._snapshots_directory, snapshot_id + '.json')
+
+    @staticmethod
+    def __digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def __store_object(self, text: str, counts: Counter) -> tuple[str, bool]:
+        """Returns the hash of text and whether it was not stored yet"""
+
+        data = text.encode()
+        digest = self.__digest(data)
+        path = self.__object_path(digest)
+
+        if os.path.isfile(path):
+            return digest, False
+
+        compressed = zlib.compress(data)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomically(path, compressed)
+
+        counts['new_bytes'] += len(compressed)
+        return digest, True
+
+    def __store_chunk(self, text: str, counts: Counter) -> str:
+        digest, new = self.__store_object(text, counts)
+        counts['chunks'] += 1
+        counts['new_chunks'] += new
+        return digest
+
+    def __read_object(self, digest: str) -> str:
+        try:
+            with open(self.__object_path(digest), 'rb') as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            raise BackupException(f'Cannot read object {digest}: {e}') from e
+
+        if self.__digest(data) != digest:
+            raise BackupException(f'Object {digest} is corrupted')
+
+        return data.decode()
+
+    def __backup_file(self, filename: str, counts: Counter) -> list[str]:
+        segments = self.__split_file(filename, counts)
+
+        return [self.__store_object(json.dumps(segments[i:i + SEGMENTS_PER_GROUP]), counts)[0]
+                for i in range(0, len(segments), SEGMENTS_PER_GROUP)]
+
+    def __split_file(self, filename: str, counts: Counter) -> list[list[str]]:
+        segments = []
+
+        with open(filename, 'r', encoding='utf-8', newline='') as f:
+            spans = entry_spans(f)
+            f.seek(0)
+            position = 0
+
+            for start, end in spans or [(0, None)]:
+                if literal := f.read(start - position):
+                    segments.append([LITERAL, literal])
+
+                chunk = f.read(end - start) if end is not None else f.read()
+                segments.append([CHUNK, self.__store_chunk(chunk, counts)])
+                position = end
+
+            if tail := f.read():
+                segments.append([LITERAL, tail])
+
+        return segments
+
+    def backup(self, filenames: Iterable[str]) -> BackupResult:
+        """Backs up the files (missing ones are recorded as such, restoring removes them) as a new snapshot"""
+
+        counts = Counter()
+        files = {}
+
+        for filename in filenames:
+            name = os.path.basename(filename)
+
+            if name in files:
+                raise BackupException(f'File {name} is backed up twice')
+
+            files[name] = self.__backup_file(filename, counts) if os.path.isfile(filename) else None
+
+        created = datetime.now()
+        snapshot_id = created.strftime('%Y-%m-%dT%H-%M-%S-%f')
+
+        while os.path.exists(self.__snapshot_path(snapshot_id)):
+            snapshot_id += '-1'
+
+        os.makedirs(self._snapshots_directory, exist_ok=True)
+        _write_atomically(self.__snapshot_path(snapshot_id), json.dumps({
+            'version': MANIFEST_VERSION,
+            'created': created.isoformat(),
+            'files': files,
+        }).encode())
+
+        return BackupResult(snapshot_id, counts['chunks'], counts['new_chunks'], counts['new_bytes'])
+
+    def snapshots(self) -> list[str]:
+        if not os.path.isdir(self._snapshots_directory):
+            return []
+
+        return sorted(name.removesuffix('.json') for name in os.listdir(self._snapshots_directory)
+                      if name.endswith('.json'))
+
+    def __read_manifest(self, snapshot_id: str) -> dict:
+        try:
+            with open(self.__snapshot_path(snapshot_id), 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise BackupException(f'Snapshot {snapshot_id} does not exist') from None
+
+        if manifest['version'] > MANIFEST_VERSION:
+            raise BackupException(f'Snapshot version {manifest["version"]} is newer than supported {MANIFEST_VERSION}')
+
+        for name in manifest['files']:
+            if os.path.basename(name) != name or name in ('', '.', '..'):
+                raise BackupException(f'Snapshot {snapshot_id} has an invalid file name {name!r}')
+
+        return manifest
+
+    def restore(self, snapshot_id: str, directory: str) -> list[str]:
+        """
+        Restores the files of the snapshot into directory (removing those that did not exist) and returns the
+        paths of the restored ones. Every file is rebuilt (and its chunks checked) before any is replaced.
+        """
+
+        manifest = self.__read_manifest(snapshot_id)
+        rebuilt: list[tuple[str, str | None]] = []
+
+        try:
+            for name, groups in manifest['files'].items():
+                path = os.path.join(directory, name)
+
+                if groups is None:
+                    rebuilt.append((path, None))
+                    continue
+
+                with open(path + '.tmp', 'w', encoding='utf-8', newline='') as f:
+                    rebuilt.append((path, f.name))
+
+                    for group in groups:
+                        for kind, value in json.loads(self.__read_object(group)):
+                            f.write(value if kind == LITERAL else self.__read_object(value))
+        except BaseException:
+            for _, tmp_path in rebuilt:
+                if tmp_path is not None and os.path.isfile(tmp_path):
+                    os.remove(tmp_path)
+
+            raise
+
+        for path, tmp_path in rebuilt:
+            if tmp_path is not None:
+                os.replace(tmp_path, path)
+            elif os.path.isfile(path):
+                os.remove(path)
+
+        return [path for path, tmp_path in rebuilt if tmp_path is not None]
+
+
+def main(args: Iterable[str]):
+    """
+    create BACKUP_DIRECTORY DATABASE_FILE
+    list BACKUP_DIRECTORY
+    restore BACKUP_DIRECTORY SNAPSHOT_ID TARGET_DIRECTORY
+    """
+
+    command, directory, *rest = args
+    store = BackupStore(directory)
+
+    if command == 'create':
+        database_filename, = rest
+        result = store.backup(database_files(database_filename))
+        print(f'{result.snapshot_id}: {result.new_chunks_count} of {result.chunks_count} chunks new '
+              f'({result.new_bytes} bytes)')
+    elif command == 'list':
+        for snapshot_id in store.snapshots():
+            print(snapshot_id)
+    elif command == 'restore':
+        snapshot_id, target_directory = rest
+
+        for path in store.restore(snapshot_id, target_directory):
+            print(f'restored {path}')
+    else:
+        raise ValueError(f'Unknown command {command}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,106 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+from src import serializer as srl
+from src.database import Database
+from src.tournament.interactive_tournament import InteractiveTournament
+from src.tournament.tournament_metadata import TournamentMetadata
+
+type EncodedItem = tuple[int, bool, srl.BasicSerializableType]
+
+
+@dataclass(frozen=True, slots=True)
+class LoadResult:
+    index: int
+    value: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def validate_tournament(tournament: Any):
+    """Checks what decoding alone does not: the type is known and stats and scores can be calculated"""
+
+    TournamentMetadata.of(tournament)
+
+    if type(tournament) is InteractiveTournament and tournament.round_count > 0:
+        tournament.get_scores()
+
+
+class _Worker:
+    """Decodes, validates and processes tournaments, one instance lives in every worker process"""
+
+    def __init__(self, serializers: tuple[srl.Serializer, ...], function: Callable[[Any], Any] | None):
+        self.database = Database('bulk_loader', None, *serializers)
+        self.function = function
+
+    def process(self, item: EncodedItem) -> LoadResult:
+        index, compact, encoded = item
+
+        try:
+            tournament = self.database.decode_entry_item('tournaments', encoded, compact)
+            validate_tournament(tournament)
+            return LoadResult(index, self.function(tournament) if self.function is not None else tournament)
+        except Exception as e:
+            return LoadResult(index, error=f'{type(e).__name__}: {e}')
+
+
+_worker: _Worker | None = None
+
+
+def _init_worker(serializers: tuple[srl.Serializer, ...], function: Callable[[Any], Any] | None):
+    global _worker
+    _worker = _Worker(serializers, function)
+
+
+def _process_batch(batch: list[EncodedItem]) -> list[LoadResult]:
+    return [_worker.process(item) for item in batch]
+
+
+def map_tournaments(filename: str, function: Callable[[Any], Any] | None, *serializers: srl.Serializer,
+                    max_workers: int | None = None, batch_size: int = 8) -> Iterator[LoadResult]:
+    """
+    Decodes and validates every tournament of the database file in worker processes, applies function (which has
+    to be picklable, e.g. module level) to each and yields the results in order. A tournament that fails is reported
+    in its result and does not stop the others. The file is streamed and only a few batches per worker are in
+    flight, so memory does not grow with the file. Changes not committed to the file yet are not seen.
+    """
+
+    max_workers = max_workers or os.cpu_count() or 1
+    database = Database(filename, None, *serializers)
+    items: Iterator[EncodedItem] = (
+        (index, compact, encoded)
+        for index, (compact, encoded) in enumerate(database.iter_encoded_entries('tournaments'))
+    )
+
+    if max_workers == 1:
+        worker = _Worker(serializers, function)
+        yield from (worker.process(item) for item in items)
+        return
+
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(serializers, function)) as executor:
+        pending = deque()
+
+        while True:
+            while len(pending) < 2 * max_workers and (batch := list(islice(items, batch_size))):
+                pending.append(executor.submit(_process_batch, batch))
+
+            if not pending:
+                return
+
+            yield from pending.popleft().result()
+
+
+def load_tournaments(filename: str, *serializers: srl.Serializer, max_workers: int | None = None,
+                     batch_size: int = 8) -> list[LoadResult]:
+    return list(map_tournaments(filename, None, *serializers, max_workers=max_workers, batch_size=batch_size))
+
+
+def failed(results: Iterable[LoadResult]) -> list[LoadResult]:
+    return [result for result in results if not result.ok]
@@ -0,0 +1,68 @@
+import logging
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+if fcntl is None:
+    logger.warning('fcntl is not available, files are not locked between processes')
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+class FileLock:
+    """
+    Exclusive advisory lock between processes (flock on a lock file, which is never removed). Each acquire() opens
+    the file anew, so threads of one process exclude each other too. Without fcntl (Windows) locking is skipped.
+    """
+
+    def __init__(self, path: str, timeout: float | None = 10.0, poll_interval: float = .01):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def acquire(self):
+        if self._file is not None:
+            raise RuntimeError(f'Lock {self.path} is already held')
+
+        if fcntl is None:
+            return
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        lock_file = open(self.path, 'a')
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._file = lock_file
+                return
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    lock_file.close()
+                    raise LockTimeout(f'Lock {self.path} is held by someone else') from None
+
+                time.sleep(self.poll_interval)
+
+    def release(self):
+        if self._file is None:
+            return
+
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *_):
+        self.release()
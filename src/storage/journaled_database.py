@@ -0,0 +1,458 @@
+import dataclasses
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from src import serializer as srl
+from src.database import Database
+from src.storage.warm_cache import WarmCache
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+from src.tournament.tournament_metadata import TournamentMetadata
+
+type PlayerKey = tuple[str, float, int, int]
+type RoundShape = tuple[tuple[tuple[int, int], ...], tuple[GameResult | None, ...]]
+type Event = dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class TournamentShape:
+    """Plain copy of everything the journal events can change in an InteractiveTournament"""
+
+    players: tuple[Player, ...]
+    rounds: tuple[RoundShape, ...]
+    is_finished: bool
+    data: TournamentData
+    settings: tuple[float, str]
+
+    @classmethod
+    def of(cls, tournament: InteractiveTournament) -> 'TournamentShape':
+        rounds = tuple((tuple((a, b) for a, b in round_.pairs), tuple(round_.results))
+                       for round_ in tournament.iter_rounds())
+
+        settings = tournament.get_settings()
+
+        return cls(
+            players=tournament.players,
+            rounds=rounds,
+            is_finished=tournament.is_finished(),
+            data=dataclasses.replace(tournament.data),
+            settings=(settings.elo_k_value, settings.scorer.__class__.__name__),
+        )
+
+
+def _player_key(player: Player) -> PlayerKey:
+    return player.name, player.rating, player.hash_id, player.federation_id
+
+
+def _key_player(key: list) -> Player:
+    name, rating, hash_id, *federation_id = key  # journals written before federation ids have no such item
+    return Player(name, rating, hash_id=hash_id, federation_id=federation_id[0] if federation_id else 0)
+
+
+def diff_tournament(old: TournamentShape, new: TournamentShape) -> list[Event] | None:
+    """
+    Returns events changing old into new in the order they have to be replayed or None if the change cannot be
+    expressed with the journal events (the tournament has to be stored whole then)
+    """
+
+    if old.settings != new.settings or (old.is_finished and not new.is_finished):
+        return None
+
+    common = 0
+
+    while common < min(len(old.rounds), len(new.rounds)) and old.rounds[common][0] == new.rounds[common][0]:
+        common += 1
+
+    if any(old.rounds[i][1] != new.rounds[i][1] for i in range(common - 1)):
+        return None
+
+    events: list[Event] = [{'op': 'remove_last_round'} for _ in range(len(old.rounds) - common)]
+
+    old_players = {_player_key(p) for p in old.players}
+    new_players = {_player_key(p) for p in new.players}
+
+    if old_players != new_players:
+        if common > 0:
+            return None
+
+        events += [{'op': 'remove_player', 'player': list(key)} for key in sorted(old_players - new_players)]
+        events += [{'op': 'add_player', 'player': list(key)} for key in sorted(new_players - old_players)]
+
+    if common > 0:
+        events += _result_events(old.rounds[common - 1][1], new.rounds[common - 1][1])
+
+    for pairs, results in new.rounds[common:]:
+        events.append({'op': 'next_round', 'pairs': [list(pair) for pair in pairs]})
+        events += _result_events(tuple(None for _ in results), results)
+
+    if new.is_finished and not old.is_finished:
+        events.append({'op': 'finish'})
+
+    if events or old.data != new.data:
+        events.append({'op': 'set_data', 'data': srl.TournamentDataSerializer().encode(new.data)})
+
+    return events
+
+
+def _result_events(old: tuple[GameResult | None, ...], new: tuple[GameResult | None, ...]) -> list[Event]:
+    return [
+        {'op': 'set_result', 'table': table, 'result': result.name if result is not None else None}
+        for table, (old_result, result) in enumerate(zip(old, new))
+        if old_result != result
+    ]
+
+
+def apply_event(tournament: InteractiveTournament, event: Event):
+    match event['op']:
+        case 'add_player':
+            tournament.add_player(_key_player(event['player']))
+        case 'remove_player':
+            tournament.remove_player(_key_player(event['player']))
+        case 'next_round':
+            tournament.next_round(tuple((a, b) for a, b in event['pairs']))
+        case 'set_result':
+            tournament.set_result(event['table'], GameResult[event['result']] if event['result'] is not None else None)
+        case 'remove_last_round':
+            tournament.remove_last_round()
+        case 'finish':
+            update_ratings = getattr(tournament, '_update_ratings')
+            setattr(tournament, '_update_ratings', lambda *_: 0)
+            tournament.finish()
+            setattr(tournament, '_update_ratings', update_ratings)
+        case 'set_data':
+            tournament.data = srl.TournamentDataSerializer().decode(event['data'])
+        case op:
+            raise ValueError(f'Unknown journal operation {op}')
+
+
+class JournaledDatabase(Database):
+    """
+    Keeps the database in memory, next to the snapshot file it appends small events to a journal file (one json
+    line per event). Startup replays the journal tail over the snapshot, compaction folds it back into the snapshot.
+
+    There is a single writer by design: the journal seq and the snapshot assume nobody else appends, so programs
+    take lock_exclusively(). ShardedDatabase is the backend for several processes.
+    """
+
+    def __init__(self, filename: str, default_data: Any = None, *serializers: srl.Serializer,
+                 compact_format: bool = False, sync_every: int = 1, compact_after: int | None = 500,
+                 warm_cache: bool = False):
+        super().__init__(filename, default_data, *serializers, compact_format=compact_format)
+        self._journal_filename = os.path.splitext(self._filename)[0] + '.journal'
+        self._warm_cache = WarmCache(self._filename, self.__decode_warm_cache) if warm_cache else None
+        self.sync_every = sync_every
+        self.compact_after = compact_after
+
+        self._data: dict | None = None
+        self._shapes: list[TournamentShape | None] = []
+        self._journal = None
+        self._seq = 0
+        self._journal_events = 0
+        self._unsynced_batches = 0
+
+        self._lock = threading.RLock()
+        self._compaction: threading.Thread | None = None
+
+    @property
+    def journal_filename(self) -> str:
+        return self._journal_filename
+
+    @property
+    def journal_length(self) -> int:
+        return self._journal_events
+
+    # ---- snapshot and journal files ----
+
+    def __write_snapshot(self, encoded: srl.BasicSerializableType, seq: int):
+        tmp_path = self._filename + '.tmp'
+
+        with open(tmp_path, 'w') as f:
+            json.dump({**encoded, '__journal_seq__': seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self._filename)
+
+    def __read_snapshot(self) -> tuple[srl.BasicSerializableType, int]:
+        if not os.path.isfile(self._filename):
+            self.__write_snapshot(self._encode_file(self.default_data), 0)
+
+        with open(self._filename, 'r') as f:
+            encoded = json.load(f)
+
+        return encoded, encoded.pop('__journal_seq__', 0)
+
+    def __read_journal(self, after_seq: int) -> Iterator[Event]:
+        """Yields events newer than after_seq, a torn last line (crash while appending) ends the journal"""
+
+        if not os.path.isfile(self._journal_filename):
+            return
+
+        with open(self._journal_filename, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    return
+
+                if event['seq'] > after_seq:
+                    yield event
+
+    def __rewrite_journal(self, events: list[Event]):
+        if self._journal is not None:
+            self._journal.close()
+
+        tmp_path = self._journal_filename + '.tmp'
+
+        with open(tmp_path, 'w') as f:
+            f.writelines(json.dumps(event) + '\n' for event in events)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self._journal_filename)
+
+        self._journal = open(self._journal_filename, 'a')
+        self._journal_events = len(events)
+
+    def __append(self, events: list[Event]):
+        for event in events:
+            self._seq += 1
+            event['seq'] = self._seq
+
+        self._journal.write(''.join(json.dumps(event) + '\n' for event in events))
+        self._journal.flush()
+        self._journal_events += len(events)
+        self._unsynced_batches += 1
+
+        if self._unsynced_batches >= self.sync_every:
+            self.sync()
+
+        if self.compact_after is not None and self._journal_events >= self.compact_after:
+            self.compact(background=True)
+
+    def sync(self):
+        with self._lock:
+            if self._journal is not None and self._unsynced_batches > 0:
+                os.fsync(self._journal.fileno())
+                self._unsynced_batches = 0
+
+    # ---- replaying ----
+
+    def __load(self) -> dict:
+        """
+        Replays the journal over the snapshot, or only its events newer than the warm cache over the cached state
+        (the cache is valid while the snapshot file is the one it was made from)
+        """
+
+        cached = self._warm_cache.load() if self._warm_cache is not None else None
+
+        if cached is not None:
+            data, seq = cached
+            events = list(self.__read_journal(seq))
+            self.__apply_events(data, iter(events))
+            kept_events = list(self.__read_journal(0))
+        else:
+            encoded, seq = self.__read_snapshot()
+            events = list(self.__read_journal(seq))
+            data = self.__replay(encoded, iter(events))
+            kept_events = events
+
+        self._seq = events[-1]['seq'] if events else seq
+        self.__rewrite_journal(kept_events)  # drops a torn last line
+
+        self._data = data
+        self._shapes = [self.__shape(t) for t in data['tournaments']]
+
+        if cached is None and self._warm_cache is not None:
+            self._warm_cache.schedule()
+
+        return data
+
+    def __decode_warm_cache(self, content: bytes) -> tuple[dict, int]:
+        """The snapshot with its seq, loading replays the journal after it"""
+
+        encoded = json.loads(content)
+        seq = encoded.pop('__journal_seq__', 0)
+        return self.__replay(encoded, iter(())), seq
+
+    def __replay(self, encoded: srl.BasicSerializableType, events: Iterator[Event]) -> dict:
+        data = self._decode_file(encoded)
+
+        if type(data) is not dict or type(data.get('tournaments')) is not list:
+            raise ValueError('JournaledDatabase needs a dict with a tournaments list at the top level')
+
+        self.__apply_events(data, events)
+        return data
+
+    def __apply_events(self, data: dict, events: Iterator[Event]):
+        for event in events:
+            match event['op']:
+                case 'put':
+                    data[event['key']] = self._decode(event['value'])
+                case 'put_tournament':
+                    tournament = self._decode(event['value'])
+
+                    if event['tournament'] == len(data['tournaments']):
+                        data['tournaments'].append(tournament)
+                    else:
+                        data['tournaments'][event['tournament']] = tournament
+                case _:
+                    apply_event(data['tournaments'][event['tournament']], event)
+
+    @staticmethod
+    def __shape(tournament: Any) -> TournamentShape | None:
+        if type(tournament) is not InteractiveTournament:
+            return None
+
+        return TournamentShape.of(tournament)
+
+    # ---- Database interface ----
+
+    def read(self) -> dict:
+        with self._lock:
+            return self._data if self._data is not None else self.__load()
+
+    def read_tournaments_metadata(self) -> list[TournamentMetadata]:
+        """Uses the index written with the snapshot while the database is not loaded and the journal is empty"""
+
+        with self._lock:
+            if self._data is None and not self.__has_journal_events():
+                index = self._read_index()
+
+                if index is not None:
+                    return index
+
+            return [TournamentMetadata.of(tournament) for tournament in self.read()['tournaments']]
+
+    def iter_entries(self, key: str) -> Iterator[Any]:
+        """Streams the snapshot while the database is not loaded and the journal is empty"""
+
+        with self._lock:
+            streamed = self._data is None and not self.__has_journal_events()
+            items = None if streamed else list(self.read()[key])
+
+        yield from super().iter_entries(key) if streamed else items
+
+    def read_entry(self, key: str, index: int | None = None) -> Any:
+        with self._lock:
+            if self._data is None and not self.__has_journal_events():
+                return super().read_entry(key, index)
+
+            return self.read()[key] if index is None else self.read()[key][index]
+
+    def __has_journal_events(self) -> bool:
+        return os.path.isfile(self._journal_filename) and os.path.getsize(self._journal_filename) > 0
+
+    def write(self, data: dict):
+        if type(data) is not dict or type(data.get('tournaments')) is not list:
+            raise ValueError('JournaledDatabase needs a dict with a tournaments list at the top level')
+
+        with self._lock:
+            self.read()
+            self.__write_snapshot(self._encode_file(data), self._seq)
+            self._write_index(data)
+            self.__rewrite_journal([])
+
+            self._data = data
+            self._shapes = [self.__shape(t) for t in data['tournaments']]
+
+            if self._warm_cache is not None:
+                self._warm_cache.schedule()
+
+    def update_players(self, players: list[Player]):
+        with self._lock:
+            self.read()['players'] = players
+            self.__append([{'op': 'put', 'key': 'players', 'value': self._encode(players)}])
+
+    def add_tournament(self, tournament: Any) -> int:
+        with self._lock:
+            tournaments = self.read()['tournaments']
+            tournaments.append(tournament)
+            self._shapes.append(None)
+
+            self.__put_tournament(len(tournaments) - 1, tournament)
+            return len(tournaments) - 1
+
+    def update_tournament(self, tournament_id: int, tournament: Any):
+        with self._lock:
+            tournaments = self.read()['tournaments']
+            tournament_id %= len(tournaments)
+            tournaments[tournament_id] = tournament
+
+            old_shape = self._shapes[tournament_id]
+            new_shape = self.__shape(tournament)
+            events = diff_tournament(old_shape, new_shape) if old_shape is not None and new_shape is not None else None
+
+            if events is None:
+                self.__put_tournament(tournament_id, tournament)
+                return
+
+            if events:
+                self.__append([{**event, 'tournament': tournament_id} for event in events])
+                self._shapes[tournament_id] = new_shape
+
+    def __put_tournament(self, tournament_id: int, tournament: Any):
+        self.__append([{'op': 'put_tournament', 'tournament': tournament_id, 'value': self._encode(tournament)}])
+        self._shapes[tournament_id] = self.__shape(tournament)
+
+    def commit(self):
+        self.wait_for_compaction()
+        self.compact()
+
+    def close(self):
+        """Commits and writes a pending warm cache rebuild"""
+
+        self.commit()
+
+        if self._warm_cache is not None:
+            self._warm_cache.flush()
+
+        self._release_exclusive_lock()
+
+    # ---- compaction ----
+
+    def compact(self, *, background: bool = False):
+        """Folds the journal into the snapshot, the live objects are not touched so it can run in a thread"""
+
+        with self._lock:
+            if self._data is None or self._compaction is not None:
+                return
+
+            self.sync()
+
+            if background:
+                self._compaction = threading.Thread(target=self.__compact, daemon=True)
+                self._compaction.start()
+                return
+
+        self.__compact()
+
+    def wait_for_compaction(self):
+        compaction = self._compaction
+
+        if compaction is not None:
+            compaction.join()
+
+    def __compact(self):
+        try:
+            with self._lock:
+                seq = self._seq
+
+            encoded, snapshot_seq = self.__read_snapshot()
+            events = [event for event in self.__read_journal(snapshot_seq) if event['seq'] <= seq]
+            data = self.__replay(encoded, iter(events))
+            self.__write_snapshot(self._encode_file(data), seq)
+            self._write_index(data)
+
+            with self._lock:
+                self.sync()
+                self.__rewrite_journal(list(self.__read_journal(seq)))
+
+                if self._warm_cache is not None:
+                    self._warm_cache.schedule()
+        finally:
+            self._compaction = None
@@ -0,0 +1,256 @@
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+STRUCTURE = re.compile(r'[\[\]{}"]')
+STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+SCALAR = re.compile(r'[^ \t\n\r,\]}]*')
+
+
+class JsonStream:
+    """
+    Incremental reader of a single JSON document. Only a window of the file is kept in memory: objects and arrays
+    are walked key by key and item by item and values are materialized only when asked for with read_value().
+    Values that fit in the buffer are parsed by the json module, larger ones are scanned first (skipped ones are
+    not validated then and are dropped from the buffer as the scan goes).
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 1 << 20):
+        self._file = file
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+
+        self._buffer = ''
+        self._pos = 0
+        self._offset = 0  # of the buffer start in the document
+        self._eof = False
+
+    @property
+    def position(self) -> int:
+        """Character offset in the document of what is read next"""
+
+        return self._offset + self._pos
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f'{message} at character {self.position}')
+
+    def _fill(self) -> int | None:
+        """
+        Drops the consumed part of the buffer and appends the next chunk (at least as long as what is kept, so that
+        reading a large value stays linear). Returns how far the buffer shifted, None at the end of the document.
+        """
+
+        if self._eof:
+            return None
+
+        shift = self._pos
+        chunk = self._file.read(max(self.chunk_size, len(self._buffer) - shift))
+
+        if not chunk:
+            self._eof = True
+            return None
+
+        self._buffer = self._buffer[shift:] + chunk
+        self._pos = 0
+        self._offset += shift
+        return shift
+
+    def _peek(self) -> str:
+        """Skips whitespace and returns the next character, '' at the end of the document"""
+
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if self._fill() is None:
+                return ''
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise self._error(f'Expecting {char!r}')
+
+        self._pos += 1
+
+    def _string_end(self, index: int) -> int:
+        """Index right after the closing quote of the string whose content starts at index"""
+
+        while True:
+            match = STRING_TAIL.match(self._buffer, index)
+
+            if match is not None:
+                return match.end()
+
+            shift = self._fill()
+
+            if shift is None:
+                raise self._error('Unterminated string')
+
+            index -= shift
+
+    def _scan_value(self, keep: bool) -> int:
+        """
+        Returns the index right after the value at the current position. Unless keep is set, the position follows
+        the scan so that the part already scanned can be dropped from the buffer.
+        """
+
+        char = self._peek()
+
+        if char == '':
+            raise self._error('Expecting value')
+
+        if char == '"':
+            return self._string_end(self._pos + 1)
+
+        if char not in '[{':
+            while True:
+                end = SCALAR.match(self._buffer, self._pos).end()
+
+                if end < len(self._buffer) or self._fill() is None:
+                    return end
+
+        end = self._pos
+        depth = 0
+
+        while True:
+            match = STRUCTURE.search(self._buffer, end)
+
+            if match is None:
+                end = len(self._buffer)
+
+                if not keep:
+                    self._pos = end
+
+                shift = self._fill()
+
+                if shift is None:
+                    raise self._error('Unterminated value')
+
+                end -= shift
+                continue
+
+            end = match.end()
+
+            if match.group() == '"':
+                end = self._string_end(end)
+            elif match.group() in '[{':
+                depth += 1
+            else:
+                depth -= 1
+
+                if depth == 0:
+                    return end
+
+            if not keep:
+                self._pos = end
+
+    def _decode_buffered(self) -> tuple[Any, int] | None:
+        """Decodes the value at the current position if it is whole in the buffer, the common case"""
+
+        if self._peek() == '':
+            return None
+
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return None
+
+        # a number at the end of the buffer may continue in the next chunk
+        return (value, end) if end < len(self._buffer) or self._eof else None
+
+    def read_value(self) -> Any:
+        if (decoded := self._decode_buffered()) is not None:
+            value, self._pos = decoded
+            return value
+
+        end = self._scan_value(keep=True)
+        value = json.loads(self._buffer[self._pos:end])
+        self._pos = end
+        return value
+
+    def skip_value(self) -> tuple[int, int]:
+        """Skips the value at the current position and returns where it was, as character offsets in the document"""
+
+        self._peek()
+        start = self.position
+
+        if (decoded := self._decode_buffered()) is not None:
+            self._pos = decoded[1]
+        else:
+            self._pos = self._scan_value(keep=False)
+
+        return start, self.position
+
+    def iter_object(self) -> Iterator[str]:
+        """
+        Walks the object at the current position and yields its keys. The value of each key has to be consumed
+        (read, skipped or walked) before the next key is requested.
+        """
+
+        self._expect('{')
+
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            if self._peek() != '"':
+                raise self._error('Expecting property name')
+
+            end = self._string_end(self._pos + 1)
+            key = json.loads(self._buffer[self._pos:end])
+            self._pos = end
+            self._expect(':')
+
+            yield key
+
+            if self._peek() != ',':
+                self._expect('}')
+                return
+
+            self._pos += 1
+
+    def iter_array(self) -> Iterator[int]:
+        """Walks the array at the current position and yields indexes, items have to be consumed like in objects"""
+
+        self._expect('[')
+
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        index = 0
+
+        while True:
+            yield index
+
+            if self._peek() != ',':
+                self._expect(']')
+                return
+
+            self._pos += 1
+            index += 1
+
+    def find_key(self, key: str):
+        """Moves to the value of key in the object at the current position"""
+
+        for found in self.iter_object():
+            if found == key:
+                return
+
+            self.skip_value()
+
+        raise KeyError(key)
+
+    def find_index(self, index: int):
+        """Moves to the item at index (counted from the start) in the array at the current position"""
+
+        for found in self.iter_array():
+            if found == index:
+                return
+
+            self.skip_value()
+
+        raise IndexError(f'Index {index} out of range')
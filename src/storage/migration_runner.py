@@ -0,0 +1,209 @@
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, TextIO
+
+from src import serializer as srl
+from src.compact_format import FORMAT_NAME
+from src.database import Database
+from src.migrations import (MIGRATIONS, RECORD_LISTS, SCHEMA_VERSION, UNVERSIONED, Migration, pending_migrations,
+                            upgrade_record)
+from src.storage.json_stream import JsonStream
+
+PROGRESS_EVERY = 1000
+
+
+class MigrationException(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class MigrationReport:
+    from_version: int
+    to_version: int
+    records: int
+    characters: int  # bytes for the ascii files databases write
+    seconds: float
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else math.inf
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.characters / 1e6 / self.seconds if self.seconds > 0 else math.inf
+
+
+class _FileMigrator:
+    """
+    Copies a database file from the stream to out, applying migration steps to every record on the way. Only one
+    record is in memory at a time. The schema version has to be known before the first record: compact files always
+    store it first, envelope files without it are version 1.
+    """
+
+    def __init__(self, stream: JsonStream, out: TextIO, migrations: Iterable[Migration], validator: Database | None,
+                 progress: Callable[[int, int], Any] | None):
+        self.stream = stream
+        self.out = out
+        self.migrations = tuple(migrations)
+        self.validator = validator
+        self.progress = progress
+
+        self.compact = False
+        self.version: int | None = None
+        self.records = 0
+        self._steps: list[Migration] | None = None
+
+    def steps(self) -> list[Migration]:
+        if self._steps is None:
+            if self.version is None and self.compact:
+                raise MigrationException('Compact database file has no version before its records')
+
+            self.version = self.version if self.version is not None else UNVERSIONED
+            self._steps = pending_migrations(self.version, self.migrations)
+
+        return self._steps
+
+    def __write(self, value: Any):
+        self.out.write(json.dumps(value, separators=(',', ':')))
+
+    def __copy(self):
+        self.__write(self.stream.read_value())
+
+    def run(self):
+        self.out.write(f'{{"version":{SCHEMA_VERSION}')
+
+        for key in self.stream.iter_object():
+            if key == 'version':
+                if self._steps is not None:
+                    raise MigrationException('Database file version has to precede its records')
+
+                self.version = self.stream.read_value()
+                continue
+
+            self.out.write(',')
+            self.__write(key)
+            self.out.write(':')
+
+            if key == '__format__':
+                if self.stream.read_value() != FORMAT_NAME:
+                    raise MigrationException('Unknown database file format')
+
+                self.compact = True
+                self.__write(FORMAT_NAME)
+            elif self.compact and key in RECORD_LISTS:
+                self.__records(key)
+            elif self.compact and key == 'other':
+                self.__object(self.__other)
+            elif not self.compact and key == '__data__':
+                self.__object(self.__envelope_entry)
+            elif key in RECORD_LISTS or key == 'other':
+                raise MigrationException(f'Database file has {key!r} before its format')
+            else:
+                self.__copy()
+
+        self.out.write('}')
+        self.steps()  # a file without records still gets its version checked
+
+    def __object(self, write_value: Callable[[str], None]):
+        self.out.write('{')
+
+        for i, key in enumerate(self.stream.iter_object()):
+            self.out.write(',' if i > 0 else '')
+            self.__write(key)
+            self.out.write(':')
+            write_value(key)
+
+        self.out.write('}')
+
+    def __envelope_entry(self, key: str):
+        if key not in RECORD_LISTS:
+            self.__other(key)
+            return
+
+        self.__object(lambda envelope_key: self.__records(key) if envelope_key == '__data__' else self.__copy())
+
+    def __other(self, key: str):
+        value = upgrade_record(key, self.stream.read_value(), self.compact, self.steps())
+
+        if self.validator is not None:
+            self.validator.decode_entry_item(key, value, compact=False)
+
+        self.__write(value)
+
+    def __records(self, key: str):
+        self.out.write('[')
+
+        for i in self.stream.iter_array():
+            record = upgrade_record(key, self.stream.read_value(), self.compact, self.steps())
+
+            if self.validator is not None:
+                self.validator.decode_entry_item(key, record, self.compact)
+
+            self.out.write(',' if i > 0 else '')
+            self.__write(record)
+            self.records += 1
+
+            if self.progress is not None and self.records % PROGRESS_EVERY == 0:
+                self.progress(self.records, self.stream.position)
+
+        self.out.write(']')
+
+
+def migrate_file(source: str, target: str | None = None, *serializers: srl.Serializer,
+                 migrations: Iterable[Migration] = MIGRATIONS, validate: bool = True,
+                 progress: Callable[[int, int], Any] | None = None) -> MigrationReport:
+    """
+    Streams the database file record by record to the current schema version and replaces target (source by
+    default) with the result atomically. Every migrated record is decoded once to check it, unless validate is
+    off. progress is called with the records and characters done so far. A journal has to be compacted into the
+    file first, its events are not migrated.
+    """
+
+    journal = os.path.splitext(source)[0] + '.journal'
+
+    if os.path.isfile(journal) and os.path.getsize(journal) > 0:
+        raise MigrationException(f'{source} has journal events, compact the database first')
+
+    target = target if target is not None else source
+    tmp_path = target + '.migrating'
+    validator = Database('migration', None, *serializers) if validate else None
+    start = time.perf_counter()
+
+    try:
+        with open(source, 'r') as f, open(tmp_path, 'w') as out:
+            stream = JsonStream(f)
+            migrator = _FileMigrator(stream, out, migrations, validator, progress)
+            migrator.run()
+
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+        raise
+
+    os.replace(tmp_path, target)
+
+    return MigrationReport(migrator.version, SCHEMA_VERSION, migrator.records, stream.position,
+                           time.perf_counter() - start)
+
+
+def main(args: Iterable[str]):
+    source, *target = args
+
+    def print_progress(records: int, characters: int):
+        print(f'{records} records, {characters / 1e6:.1f} MB', end='\r', file=sys.stderr)
+
+    report = migrate_file(source, *target, progress=print_progress)
+    print(f'migrated {source} from version {report.from_version} to {report.to_version}: {report.records} records, '
+          f'{report.characters / 1e6:.1f} MB in {report.seconds:.2f} s ({report.records_per_second:.0f} records/s, '
+          f'{report.megabytes_per_second:.1f} MB/s)')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,249 @@
+import csv
+import dataclasses
+import itertools
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Iterable, Iterator, TextIO
+
+from src.database import Database
+from src.storage.trf import from_surname_first
+from src.tournament.player import Player, player_sort_key
+
+BATCH_SIZE = 10000
+
+# lower case column names (CSV) and tags (XML) of the federation lists, the first present one is used
+ID_COLUMNS = ('fideid', 'fide_id', 'id', 'id number', 'id_no')
+NAME_COLUMNS = ('name', 'player', 'full name')
+RATING_COLUMNS = ('rating', 'rtg', 'std', 'srtng')
+
+ADDED = 'added'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+SKIPPED = 'skipped'
+
+
+class RatingListException(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class RatingListReport:
+    rows: int
+    added: int
+    updated: int
+    unchanged: int
+    skipped: int
+    seconds: float
+
+
+def _column(columns: list[str], names: tuple[str, ...]) -> int | None:
+    return next((columns.index(name) for name in names if name in columns), None)
+
+
+def _row_player(name: str, rating: str, federation_id: str) -> Player | None:
+    """Player of one row, None for unrated rows"""
+
+    name, rating, federation_id = name.strip(), rating.strip(), federation_id.strip()
+
+    if not name or not rating or float(rating) <= 0:
+        return None
+
+    name = from_surname_first(name) if ',' in name else name
+    return Player(name, int(float(rating)), federation_id=int(federation_id) if federation_id else 0)
+
+
+def iter_csv(f: TextIO) -> Iterator[Player]:
+    header = f.readline()
+
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    columns = [column.strip().lower() for column in next(csv.reader([header], dialect), [])]
+    name, rating, federation_id = (_column(columns, names) for names in (NAME_COLUMNS, RATING_COLUMNS, ID_COLUMNS))
+
+    if name is None or rating is None:
+        raise RatingListException(f'Rating list has no name or rating column: {columns}')
+
+    for line_no, row in enumerate(csv.reader(f, dialect), start=2):
+        row += [''] * (len(columns) - len(row))
+
+        try:
+            player = _row_player(row[name], row[rating], row[federation_id] if federation_id is not None else '')
+        except ValueError as e:
+            raise RatingListException(f'Line {line_no}: {e}') from None
+
+        if player is not None:
+            yield player
+
+
+def iter_xml(f: IO) -> Iterator[Player]:
+    """Streams <player> elements (FIDE players_list_xml), each one is dropped once read"""
+
+    root = None
+
+    for event, element in ET.iterparse(f, events=('start', 'end')):
+        if root is None:
+            root = element
+
+        if event != 'end' or element.tag != 'player':
+            continue
+
+        values = {child.tag.lower(): child.text or '' for child in element}
+
+        try:
+            player = _row_player(*(next((values[tag] for tag in tags if tag in values), '')
+                                   for tags in (NAME_COLUMNS, RATING_COLUMNS, ID_COLUMNS)))
+        except ValueError as e:
+            raise RatingListException(f'Player {ET.tostring(element)[:100]!r}: {e}') from None
+
+        element.clear()
+        root.clear()
+
+        if player is not None:
+            yield player
+
+
+def iter_rating_list(path: str) -> Iterator[Player]:
+    if os.path.splitext(path)[1].lower() == '.xml':
+        with open(path, 'rb') as f:
+            yield from iter_xml(f)
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from iter_csv(f)
+
+
+class PlayerStore:
+    """
+    Players list with indexes by name and by federation id. Players are replaced at their positions (keeping their
+    identity, only the rating and a missing federation id change), so the list keeps its order until it is sorted
+    once at the end.
+    """
+
+    def __init__(self, players: Iterable[Player]):
+        self.players: list[Player] = list(players)
+        self._by_id: dict[int, int] = {}
+        self._by_name: dict[str, list[int]] = {}
+
+        for index, player in enumerate(self.players):
+            self.__index(index, player)
+
+    def __index(self, index: int, player: Player):
+        if player.federation_id > 0:
+            self._by_id[player.federation_id] = index
+
+        positions = self._by_name.setdefault(player.name, [])
+
+        if index not in positions:
+            positions.append(index)
+
+    def find(self, player: Player) -> int | None:
+        """Position of the player with the same federation id, or of the only one with the name and no id"""
+
+        if player.federation_id > 0 and player.federation_id in self._by_id:
+            return self._by_id[player.federation_id]
+
+        namesakes = [index for index in self._by_name.get(player.name, ()) if self.players[index].federation_id <= 0]
+        return namesakes[0] if len(namesakes) == 1 else None
+
+    def __distinct(self, player: Player) -> Player:
+        """The player with a hash_id none of its namesakes has, players equal by name and hash_id are one person"""
+
+        hash_ids = {self.players[index].hash_id for index in self._by_name.get(player.name, ())}
+
+        if player.hash_id not in hash_ids:
+            return player
+
+        return dataclasses.replace(player, hash_id=max(hash_ids) + 1)
+
+    def merge(self, player: Player, add_new: bool = True) -> str:
+        index = self.find(player)
+
+        if index is None:
+            if not add_new:
+                return SKIPPED
+
+            self.players.append(self.__distinct(player))
+            self.__index(len(self.players) - 1, self.players[-1])
+            return ADDED
+
+        current = self.players[index]
+        federation_id = player.federation_id if player.federation_id > 0 else current.federation_id
+
+        if (current.rating, current.federation_id) == (player.rating, federation_id):
+            return UNCHANGED
+
+        self.players[index] = dataclasses.replace(current, rating=player.rating, federation_id=federation_id)
+        self.__index(index, self.players[index])
+        return UPDATED
+
+    def sorted_players(self) -> list[Player]:
+        return sorted(self.players, key=player_sort_key)
+
+
+def import_rating_list(database: Database, players: Iterable[Player], add_new: bool = True,
+                       batch_size: int = BATCH_SIZE, progress: Callable[[int], Any] | None = None) -> RatingListReport:
+    """
+    Merges a rating list into the players of the database: ratings of known players are updated, unknown players
+    are added unless add_new is off. The list is consumed in batches (progress gets the rows done so far) and the
+    players are written once, only if something changed.
+    """
+
+    start = time.perf_counter()
+    store = PlayerStore(database.read_players())
+    counts = dict.fromkeys((ADDED, UPDATED, UNCHANGED, SKIPPED), 0)
+
+    for batch in itertools.batched(players, batch_size):
+        for player in batch:
+            counts[store.merge(player, add_new)] += 1
+
+        if progress is not None:
+            progress(sum(counts.values()))
+
+    if counts[ADDED] > 0 or counts[UPDATED] > 0:
+        database.update_players(store.sorted_players())
+
+    return RatingListReport(sum(counts.values()), counts[ADDED], counts[UPDATED], counts[UNCHANGED], counts[SKIPPED],
+                            time.perf_counter() - start)
+
+
+def _open_database(filename: str) -> Database:
+    """
+    The json database file of a closed program (locked until close()), in the compact format the program writes.
+    Journal events would be ignored, so the journal has to be compacted into the file first.
+    """
+
+    database = Database(filename, compact_format=True)
+    database.lock_exclusively()
+    journal = os.path.splitext(filename)[0] + '.journal'
+
+    if os.path.isfile(journal) and os.path.getsize(journal) > 0:
+        database.close()
+        raise RatingListException(f'{filename} has journal events, compact the database first')
+
+    return database
+
+
+def main(args: Iterable[str]):
+    database_filename, list_filename = args
+
+    def print_progress(rows: int):
+        print(f'{rows} rows', end='\r', file=sys.stderr)
+
+    database = _open_database(database_filename)
+
+    try:
+        report = import_rating_list(database, iter_rating_list(list_filename), progress=print_progress)
+    finally:
+        database.close()
+
+    print(f'{report.rows} rows: {report.added} added, {report.updated} updated, {report.unchanged} unchanged '
+          f'in {report.seconds:.2f} s')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,484 @@
+import dataclasses
+import json
+import os
+from collections.abc import MutableSequence
+from typing import Any, Callable, Iterator
+
+from src import serializer as srl
+from src.database import Database, SERIALIZERS
+from src.storage.file_lock import FileLock
+from src.storage.journaled_database import TournamentShape
+from src.tournament.interactive_tournament import InteractiveTournament
+from src.tournament.player import Player
+from src.tournament.round import Round
+from src.tournament.tournament_metadata import TournamentMetadata
+
+MANIFEST_VERSION = 1
+REVISION_KEY = '__revision__'
+
+
+class WriteConflictError(Exception):
+    pass
+
+
+def _merge_value(base: Any, theirs: Any, ours: Any, what: str) -> Any:
+    if ours == base or ours == theirs:
+        return theirs
+
+    if theirs == base:
+        return ours
+
+    raise WriteConflictError(f'{what} was changed by someone else')
+
+
+def merge_tournament(base: Any, theirs: Any, ours: Any) -> Any:
+    """
+    Three-way merge of a tournament changed here (ours) and by someone else (theirs) since base. Results of
+    different tables and the tournament data merge, other changes on both sides (players, rounds, finishing)
+    are a conflict.
+    """
+
+    if any(type(tournament) is not InteractiveTournament for tournament in (base, theirs, ours)):
+        raise WriteConflictError('Tournament was changed by someone else')
+
+    base_shape, their_shape, our_shape = (TournamentShape.of(tournament) for tournament in (base, theirs, ours))
+
+    if our_shape in (base_shape, their_shape):
+        return theirs
+
+    if their_shape == base_shape:
+        return ours
+
+    def structure(shape: TournamentShape) -> tuple:
+        players = tuple((player.name, player.rating, player.hash_id, player.federation_id) for player in shape.players)
+        return players, tuple(pairs for pairs, _ in shape.rounds), shape.is_finished, shape.settings
+
+    if not structure(base_shape) == structure(their_shape) == structure(our_shape) or our_shape.is_finished:
+        raise WriteConflictError('Tournament rounds or players were changed by someone else')
+
+    rounds = [
+        Round.from_results(len(ours.players), pairs, [
+            _merge_value(base_result, their_result, our_result, f'Result of table {table + 1}')
+            for table, (base_result, their_result, our_result) in enumerate(zip(base_results, their_results,
+                                                                                our_results))
+        ])
+        for (pairs, base_results), (_, their_results), (_, our_results) in zip(base_shape.rounds, their_shape.rounds,
+                                                                                our_shape.rounds)
+    ]
+    data = _merge_value(base_shape.data, their_shape.data, our_shape.data, 'Tournament data')
+
+    return InteractiveTournament.from_state(dataclasses.replace(data), ours.players, ours.get_settings(), rounds,
+                                            is_finished=False)
+
+
+def merge_players(base: list[Player], theirs: list[Player], ours: list[Player]) -> list[Player]:
+    """Players removed here are removed from theirs and players added here are added"""
+
+    def key(player: Player) -> tuple:
+        return player.name, player.rating, player.hash_id, player.federation_id
+
+    base_keys = {key(player) for player in base}
+    our_keys = {key(player) for player in ours}
+    their_keys = {key(player) for player in theirs}
+
+    merged = [player for player in theirs if key(player) in our_keys or key(player) not in base_keys]
+    merged += [player for player in ours if key(player) not in base_keys and key(player) not in their_keys]
+
+    return sorted(merged) if list(ours) == sorted(ours) else merged
+
+
+class _NotLoaded:
+    def __repr__(self):
+        return '<not loaded>'
+
+
+NOT_LOADED = _NotLoaded()
+
+
+class LazyShardList(MutableSequence):
+    """List of tournaments that decodes a shard only when its item is accessed"""
+
+    def __init__(self, shard_ids: list[str], load_shard: Callable[[str], Any]):
+        self._shard_ids: list[str | None] = list(shard_ids)
+        self._values: list[Any] = [NOT_LOADED for _ in shard_ids]
+        self._load_shard = load_shard
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if self._values[index] is NOT_LOADED:
+            self._values[index] = self._load_shard(self._shard_ids[index])
+
+        return self._values[index]
+
+    def __setitem__(self, index: int, value: Any):
+        self._values[index] = value
+
+    def __delitem__(self, index: int):
+        del self._values[index]
+        del self._shard_ids[index]
+
+    def insert(self, index: int, value: Any):
+        self._values.insert(index, value)
+        self._shard_ids.insert(index, None)
+
+    def __repr__(self):
+        return repr(self._values)
+
+    @property
+    def shard_ids(self) -> list[str | None]:
+        return list(self._shard_ids)
+
+    def is_loaded(self, index: int) -> bool:
+        return self._values[index] is not NOT_LOADED
+
+    def iter_loaded(self) -> Iterator[tuple[int, str | None, Any]]:
+        for index, (shard_id, value) in enumerate(zip(self._shard_ids, self._values)):
+            if value is not NOT_LOADED:
+                yield index, shard_id, value
+
+    def _assign_shard_id(self, index: int, shard_id: str):
+        self._shard_ids[index] = shard_id
+
+
+class ShardedDatabase(Database):
+    """
+    Directory layout with a small manifest, one file per top level entry (players, settings, ...) and one file
+    per tournament in the tournaments/ subdirectory. Tournaments are decoded lazily and only changed files are
+    written back.
+
+    Several processes may use the directory at once. Every file is written under its own lock (in locks/) and
+    carries a revision; when the file was written by someone else since this object read it, the changes are
+    merged (see merge_tournament and merge_players) or WriteConflictError is raised. Values never read through
+    this object are written as they are.
+    """
+
+    def __init__(self, directory: str, default_data: Any = None, *serializers: srl.Serializer,
+                 lock_timeout: float | None = 10.0):
+        super().__init__(directory, default_data, *serializers)
+        self._directory = directory
+        self.lock_timeout = lock_timeout
+
+        self._manifest: dict | None = None
+        self._manifest_stamp: tuple[int, int] | None = None
+        self._bases: dict[str, tuple[int, str]] = {}  # revision and encoding of each file as this object knows it
+        self._diverged: set[str] = set()  # files holding a merge, not exactly what this object wrote
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self._directory, *parts)
+
+    def _tournament_path(self, shard_id: str) -> str:
+        return self._path('tournaments', shard_id + '.json')
+
+    def _key_path(self, key: str) -> str:
+        return self._path(key + '.json')
+
+    def _lock(self, path: str) -> FileLock:
+        name = os.path.relpath(path, self._directory).replace(os.sep, '-')
+        return FileLock(self._path('locks', os.path.splitext(name)[0] + '.lock'), self.lock_timeout)
+
+    @staticmethod
+    def _write_file_atomically(path: str, text: str):
+        tmp_path = path + '.tmp'
+
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read_revision(path: str) -> tuple[int, str | None]:
+        try:
+            with open(path, 'r') as f:
+                encoded = json.load(f)
+        except FileNotFoundError:
+            return 0, None
+
+        return encoded.pop(REVISION_KEY, 0), json.dumps(encoded)
+
+    def _write_if_changed(self, path: str, value: Any) -> Any:
+        """Writes value unless the file already holds it and returns what the file holds afterwards"""
+
+        text = json.dumps(self._encode(value))
+
+        with self._lock(path):
+            revision, disk_text = self._read_revision(path)
+            base = self._bases.get(path)
+
+            if base is not None and disk_text is not None and (revision != base[0] or path in self._diverged):
+                value, merged_text = self.__merge(path, base[1], disk_text, value, text)
+            else:
+                merged_text = text
+
+            if merged_text != disk_text:
+                revision += 1
+                self._write_file_atomically(path, json.dumps({REVISION_KEY: revision, **json.loads(merged_text)}))
+
+        self._bases[path] = revision, text
+
+        if merged_text != text:
+            self._diverged.add(path)
+        else:
+            self._diverged.discard(path)
+
+        return value
+
+    def __merge(self, path: str, base_text: str, disk_text: str, ours: Any, our_text: str) -> tuple[Any, str]:
+        if our_text in (base_text, disk_text):
+            return self._decode(json.loads(disk_text)), disk_text
+
+        if disk_text == base_text:
+            return ours, our_text
+
+        base, theirs = (self._decode(json.loads(text)) for text in (base_text, disk_text))
+
+        if os.path.dirname(path) == self._path('tournaments'):
+            merged = merge_tournament(base, theirs, ours)
+        elif path == self._key_path('players'):
+            merged = merge_players(base, theirs, ours)
+        else:
+            raise WriteConflictError(f'{os.path.relpath(path, self._directory)} was changed by someone else')
+
+        return merged, json.dumps(self._encode(merged))
+
+    def _load_file(self, path: str) -> Any:
+        with open(path, 'r') as f:
+            encoded = json.load(f)
+
+        revision = encoded.pop(REVISION_KEY, 0)
+        self._bases[path] = revision, json.dumps(encoded)
+        self._diverged.discard(path)
+
+        return self._decode(encoded)
+
+    def _load_shard(self, shard_id: str) -> Any:
+        return self._load_file(self._tournament_path(shard_id))
+
+    def __load_manifest(self) -> dict | None:
+        try:
+            with open(self._path('manifest.json'), 'r') as f:
+                stat = os.fstat(f.fileno())
+                self._manifest = json.load(f)
+                self._manifest_stamp = stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+        return self._manifest
+
+    def _read_manifest(self) -> dict:
+        """The manifest is read again whenever someone else has replaced it"""
+
+        try:
+            stat = os.stat(self._path('manifest.json'))
+            stamp = stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            stamp = None
+
+        if self._manifest is None or stamp != self._manifest_stamp:
+            if stamp is None:
+                with self._lock(self._path('manifest.json')):
+                    if self.__load_manifest() is None:
+                        self.__write(self.default_data)
+            else:
+                self.__load_manifest()
+
+        return self._manifest
+
+    def _write_manifest(self, manifest: dict):
+        self._write_file_atomically(self._path('manifest.json'), json.dumps(manifest, indent=2))
+        stat = os.stat(self._path('manifest.json'))
+
+        self._manifest = manifest
+        self._manifest_stamp = stat.st_mtime_ns, stat.st_size
+
+    def __update_manifest(self, change: Callable[[dict], Any]) -> Any:
+        """Applies change to the manifest as it is on disk, under its lock. Shards may be locked inside, never the
+        other way around."""
+
+        with self._lock(self._path('manifest.json')):
+            manifest = self.__load_manifest()
+            result = change(manifest)
+            self._write_manifest(manifest)
+
+        return result
+
+    def _allocate_shard_id(self, manifest: dict) -> str:
+        manifest['next_shard'] += 1
+        return f'{manifest["next_shard"]:06d}'
+
+    def read(self) -> dict:
+        manifest = self._read_manifest()
+
+        data = {key: self._load_file(self._key_path(key)) for key in manifest['keys']}
+        data['tournaments'] = LazyShardList(manifest['tournaments'], self._load_shard)
+
+        return data
+
+    def write(self, data: dict):
+        if type(data) is not dict or 'tournaments' not in data:
+            raise ValueError('ShardedDatabase needs a dict with a tournaments list at the top level')
+
+        with self._lock(self._path('manifest.json')):
+            self.__write(data)
+
+    def __write(self, data: dict):
+        os.makedirs(self._path('tournaments'), exist_ok=True)
+
+        known_ids = set(self._manifest['tournaments']) if self._manifest is not None else set()
+        old_manifest = self.__load_manifest()
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'next_shard': old_manifest['next_shard'] if old_manifest is not None else 0,
+            'keys': [key for key in data if key != 'tournaments'],
+            'tournaments': [],
+            'metadata': dict(old_manifest.get('metadata', {})) if old_manifest is not None else {},
+        }
+
+        for key in manifest['keys']:
+            self._write_if_changed(self._key_path(key), data[key])
+
+        manifest['tournaments'] = self.__write_tournaments(data['tournaments'], manifest)
+
+        if old_manifest is not None:  # tournaments added by someone else since this object read the manifest stay
+            manifest['tournaments'] += [shard_id for shard_id in old_manifest['tournaments']
+                                        if shard_id not in known_ids and shard_id not in manifest['tournaments']]
+
+        manifest['metadata'] = {shard_id: manifest['metadata'][shard_id] for shard_id in manifest['tournaments']
+                                if shard_id in manifest['metadata']}
+
+        if manifest != old_manifest:
+            self._write_manifest(manifest)
+            self.__remove_unused_files(old_manifest, manifest)
+
+    def __write_tournaments(self, tournaments: list, manifest: dict) -> list[str]:
+        if not isinstance(tournaments, LazyShardList):
+            old_ids = self._manifest['tournaments'] if self._manifest is not None else []
+            ids = old_ids[:len(tournaments)] + [None] * (len(tournaments) - len(old_ids))
+            values = tournaments
+            tournaments = LazyShardList(ids, self._load_shard)
+
+            for i, tournament in enumerate(values):
+                tournaments[i] = tournament
+
+        for index, shard_id, tournament in tournaments.iter_loaded():
+            if shard_id is None:
+                shard_id = self._allocate_shard_id(manifest)
+                tournaments._assign_shard_id(index, shard_id)
+
+            stored = self._write_if_changed(self._tournament_path(shard_id), tournament)
+            manifest['metadata'][shard_id] = self.__describe(stored)
+
+        return tournaments.shard_ids
+
+    def __remove_unused_files(self, old_manifest: dict | None, manifest: dict):
+        if old_manifest is None:
+            return
+
+        for key in set(old_manifest['keys']) - set(manifest['keys']):
+            self.__remove_file(self._key_path(key))
+
+        for shard_id in set(old_manifest['tournaments']) - set(manifest['tournaments']):
+            self.__remove_file(self._tournament_path(shard_id))
+
+    def __remove_file(self, path: str):
+        self._bases.pop(path, None)
+        self._diverged.discard(path)
+
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def read_players(self) -> list[Player]:
+        self._read_manifest()
+        return self._load_file(self._key_path('players'))
+
+    def read_tournaments(self) -> LazyShardList:
+        return LazyShardList(self._read_manifest()['tournaments'], self._load_shard)
+
+    @staticmethod
+    def __describe(tournament: Any) -> list | None:
+        try:
+            return TournamentMetadata.of(tournament).to_list()
+        except ValueError:
+            return None
+
+    def read_tournaments_metadata(self) -> list[TournamentMetadata]:
+        manifest = self._read_manifest()
+        metadata = manifest.get('metadata', {})
+
+        return [
+            TournamentMetadata.from_list(metadata[shard_id]) if metadata.get(shard_id) is not None else
+            TournamentMetadata.of(self._load_shard(shard_id))
+            for shard_id in manifest['tournaments']
+        ]
+
+    def iter_entries(self, key: str) -> Iterator[Any]:
+        """Tournaments are decoded one shard at a time and not kept"""
+
+        if key != 'tournaments':
+            yield from self.read_entry(key)
+            return
+
+        for shard_id in self._read_manifest()['tournaments']:
+            with open(self._tournament_path(shard_id), 'r') as f:
+                encoded = json.load(f)
+
+            encoded.pop(REVISION_KEY, None)
+            yield self._decode(encoded)
+
+    def read_entry(self, key: str, index: int | None = None) -> Any:
+        manifest = self._read_manifest()
+
+        if key == 'tournaments':
+            return self.read_tournaments() if index is None else self._load_shard(manifest['tournaments'][index])
+
+        if key not in manifest['keys']:
+            raise KeyError(key)
+
+        value = self._load_file(self._key_path(key))
+        return value if index is None else value[index]
+
+    def update_players(self, players: list[Player]):
+        self._read_manifest()
+        self._write_if_changed(self._key_path('players'), players)
+
+        if 'players' not in self._read_manifest()['keys']:
+            def add_key(manifest: dict):
+                if 'players' not in manifest['keys']:
+                    manifest['keys'].append('players')
+
+            self.__update_manifest(add_key)
+
+    def update_tournament(self, tournament_id: int, tournament: Any):
+        shard_id = self._read_manifest()['tournaments'][tournament_id]
+        metadata = self.__describe(self._write_if_changed(self._tournament_path(shard_id), tournament))
+
+        if self._read_manifest().get('metadata', {}).get(shard_id) != metadata:
+            def set_metadata(manifest: dict):
+                if shard_id in manifest['tournaments']:
+                    manifest.setdefault('metadata', {})[shard_id] = metadata
+
+            self.__update_manifest(set_metadata)
+
+    def add_tournament(self, tournament: Any) -> int:
+        self._read_manifest()
+
+        def add(manifest: dict) -> int:
+            shard_id = self._allocate_shard_id(manifest)
+            stored = self._write_if_changed(self._tournament_path(shard_id), tournament)
+
+            manifest['tournaments'].append(shard_id)
+            manifest.setdefault('metadata', {})[shard_id] = self.__describe(stored)
+            return len(manifest['tournaments']) - 1
+
+        return self.__update_manifest(add)
+
+    @classmethod
+    def import_from(cls, database: Database, directory: str) -> 'ShardedDatabase':
+        sharded = cls(directory, database.default_data, *database.serializers[len(SERIALIZERS):])
+        sharded.write(database.read())
+        return sharded
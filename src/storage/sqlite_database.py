@@ -0,0 +1,458 @@
+import json
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+
+from src import serializer as srl
+from src.database import Database
+from src.tournament import scoring
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData, TournamentState
+from src.tournament.player import Player
+from src.tournament.round import GameResult, Round
+from src.tournament.tournament import TournamentSettings
+from src.tournament.tournament_metadata import TournamentMetadata
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    rating REAL NOT NULL,
+    hash_id INTEGER NOT NULL,
+    federation_id INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tournaments (
+    position INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT,
+    category TEXT,
+    start_timestamp REAL,
+    finish_timestamp REAL,
+    is_finished INTEGER NOT NULL DEFAULT 0,
+    elo_k_value REAL,
+    scorer TEXT,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS tournament_players (
+    tournament INTEGER NOT NULL REFERENCES tournaments(position) ON DELETE CASCADE,
+    player_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    rating REAL NOT NULL,
+    hash_id INTEGER NOT NULL,
+    federation_id INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tournament, player_id)
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    tournament INTEGER NOT NULL REFERENCES tournaments(position) ON DELETE CASCADE,
+    round_no INTEGER NOT NULL,
+    PRIMARY KEY (tournament, round_no)
+);
+CREATE TABLE IF NOT EXISTS games (
+    tournament INTEGER NOT NULL,
+    round_no INTEGER NOT NULL,
+    board INTEGER NOT NULL,
+    player_a INTEGER NOT NULL,
+    player_b INTEGER NOT NULL,
+    result TEXT,
+    PRIMARY KEY (tournament, round_no, board),
+    FOREIGN KEY (tournament, round_no) REFERENCES rounds(tournament, round_no) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tournaments_start ON tournaments(start_timestamp);
+CREATE INDEX IF NOT EXISTS tournament_players_identity ON tournament_players(name, hash_id);
+CREATE INDEX IF NOT EXISTS games_player_a ON games(tournament, player_a);
+CREATE INDEX IF NOT EXISTS games_player_b ON games(tournament, player_b);
+'''
+
+INTERACTIVE_KIND = 'interactive'
+ENCODED_KIND = 'encoded'
+
+type GameRow = tuple[int, int, int, Player, Player, GameResult | None]
+
+
+def _timestamp(time_: datetime | None) -> float | None:
+    return time_.timestamp() if time_ is not None else None
+
+
+def _datetime(timestamp: float | None) -> datetime | None:
+    return datetime.fromtimestamp(timestamp) if timestamp is not None else None
+
+
+def _result_code(result: GameResult | None) -> str | None:
+    return result.name if result is not None else None
+
+
+def _result(code: str | None) -> GameResult | None:
+    return GameResult[code] if code is not None else None
+
+
+class SqliteDatabase(Database):
+    """
+    Stores players, tournaments, rounds and games as rows of a sqlite database. Top level entries other than
+    players and tournaments, and tournaments that are not InteractiveTournaments, are stored as encoded json.
+    """
+
+    def __init__(self, filename: str, default_data: Any = None, *serializers: srl.Serializer):
+        super().__init__(filename, default_data, *serializers)
+        self._filename = filename
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Shared by all threads (e.g. the autosave writer), statements using it have to hold the lock"""
+
+        with self._lock:
+            if self._connection is None:
+                self._connection = sqlite3.connect(self._filename, check_same_thread=False)
+                self._connection.execute('PRAGMA foreign_keys = ON')
+                self._connection.executescript(SCHEMA)
+                self.__add_missing_columns()
+
+                if self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0] == 0:
+                    self.write(self.default_data)
+
+            return self._connection
+
+    def __add_missing_columns(self):
+        """Databases created before players had federation ids get the column"""
+
+        for table in ('players', 'tournament_players'):
+            columns = {row[1] for row in self._connection.execute(f'PRAGMA table_info({table})')}
+
+            if 'federation_id' not in columns:
+                self._connection.execute(f'ALTER TABLE {table} ADD COLUMN federation_id INTEGER NOT NULL DEFAULT 0')
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+            self._release_exclusive_lock()
+
+    def __encode_json(self, value: Any) -> str:
+        return json.dumps(self._encode(value))
+
+    def __decode_json(self, text: str) -> Any:
+        return self._decode(json.loads(text))
+
+    def write(self, data: dict):
+        if type(data) is not dict or 'tournaments' not in data or 'players' not in data:
+            raise ValueError('SqliteDatabase needs a dict with players and tournaments at the top level')
+
+        with self._lock:
+            with self.connection as connection:
+                connection.execute('DELETE FROM players')
+                connection.execute('DELETE FROM tournaments')
+                connection.execute('DELETE FROM entries')
+
+                self.__insert_players(connection, data['players'])
+
+                for position, tournament in enumerate(data['tournaments']):
+                    self.__insert_tournament(connection, position, tournament)
+
+                keys = [key for key in data if key not in ('players', 'tournaments')]
+                connection.executemany('INSERT INTO entries (key, value) VALUES (?, ?)',
+                                       [(key, self.__encode_json(data[key])) for key in keys])
+                connection.execute('INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)',
+                                   ('__keys__', json.dumps(list(data.keys()))))
+
+    def read(self) -> dict:
+        with self._lock:
+            connection = self.connection
+            keys = json.loads(connection.execute('SELECT value FROM entries WHERE key = ?',
+                                                 ('__keys__',)).fetchone()[0])
+            entries = dict(connection.execute('SELECT key, value FROM entries WHERE key != ?', ('__keys__',)))
+
+            data = {}
+
+            for key in keys:
+                if key == 'players':
+                    data[key] = self.read_players()
+                elif key == 'tournaments':
+                    data[key] = self.read_tournaments()
+                else:
+                    data[key] = self.__decode_json(entries[key])
+
+            return data
+
+    @staticmethod
+    def __insert_players(connection: sqlite3.Connection, players: list[Player]):
+        connection.executemany('''
+            INSERT INTO players (position, name, rating, hash_id, federation_id) VALUES (?, ?, ?, ?, ?)
+        ''', [(i, p.name, p.rating, p.hash_id, p.federation_id) for i, p in enumerate(players)])
+
+    def __insert_tournament(self, connection: sqlite3.Connection, position: int, tournament: Any):
+        if type(tournament) is not InteractiveTournament:
+            data = getattr(tournament, 'data', TournamentData())
+            connection.execute('''
+                INSERT INTO tournaments (position, kind, name, category, start_timestamp, finish_timestamp, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (position, ENCODED_KIND, data.name, data.category, _timestamp(data.start_timestamp),
+                  _timestamp(data.finish_timestamp), self.__encode_json(tournament)))
+            return
+
+        settings = tournament.get_settings()
+        self.__create_settings(settings.elo_k_value, settings.scorer.__class__.__name__)  # validates the scorer
+
+        connection.execute('''
+            INSERT INTO tournaments (position, kind, name, category, start_timestamp, finish_timestamp, is_finished,
+                                     elo_k_value, scorer)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (position, INTERACTIVE_KIND, tournament.data.name, tournament.data.category,
+              _timestamp(tournament.data.start_timestamp), _timestamp(tournament.data.finish_timestamp),
+              int(tournament.is_finished()), settings.elo_k_value, settings.scorer.__class__.__name__))
+
+        connection.executemany('''
+            INSERT INTO tournament_players (tournament, player_id, name, rating, hash_id, federation_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(position, i, p.name, p.rating, p.hash_id, p.federation_id) for i, p in enumerate(tournament.players)])
+
+        for round_no, round_ in enumerate(tournament.iter_rounds()):
+            self.__insert_round(connection, position, round_no, round_)
+
+    @staticmethod
+    def __insert_round(connection: sqlite3.Connection, position: int, round_no: int, round_: Round):
+        connection.execute('INSERT INTO rounds (tournament, round_no) VALUES (?, ?)', (position, round_no))
+        connection.executemany('''
+            INSERT INTO games (tournament, round_no, board, player_a, player_b, result) VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(position, round_no, board, a, b, _result_code(result))
+              for board, ((a, b), result) in enumerate(zip(round_.pairs, round_.results))])
+
+    def read_players(self) -> list[Player]:
+        with self._lock:
+            rows = self.connection.execute('SELECT name, rating, hash_id, federation_id FROM players ORDER BY position')
+            return [Player(name, rating, hash_id=hash_id, federation_id=federation_id)
+                    for name, rating, hash_id, federation_id in rows]
+
+    def read_tournaments(self) -> list:
+        with self._lock:
+            positions = self.connection.execute('SELECT position FROM tournaments ORDER BY position')
+            return [self.read_tournament(position) for position, in positions.fetchall()]
+
+    def iter_entries(self, key: str) -> Iterator[Any]:
+        if key != 'tournaments':
+            yield from self.read_entry(key)
+            return
+
+        for position, in self.connection.execute('SELECT position FROM tournaments ORDER BY position').fetchall():
+            yield self.read_tournament(position)
+
+    def read_entry(self, key: str, index: int | None = None) -> Any:
+        if key == 'tournaments' and index is not None:
+            return self.read_tournament(index)
+
+        if key in ('players', 'tournaments'):
+            value = self.read_players() if key == 'players' else self.read_tournaments()
+        else:
+            value = self.read()[key]
+
+        return value if index is None else value[index]
+
+    def read_tournaments_metadata(self) -> list[TournamentMetadata]:
+        with self._lock:
+            rows = self.connection.execute('''
+                SELECT kind, name, category, start_timestamp, finish_timestamp, is_finished, payload,
+                       (SELECT COUNT(*) FROM tournament_players AS tp WHERE tp.tournament = t.position),
+                       (SELECT COUNT(*) FROM rounds AS r WHERE r.tournament = t.position)
+                FROM tournaments AS t ORDER BY position
+            ''')
+            metadata = []
+
+            for kind, name, category, start, finish, is_finished, payload, players_count, round_count in rows:
+                if kind != INTERACTIVE_KIND:
+                    metadata.append(TournamentMetadata.of(self.__decode_json(payload)))
+                    continue
+
+                if is_finished:
+                    state = TournamentState.FINISHED
+                else:
+                    state = TournamentState.RUNNING if round_count > 0 else TournamentState.NOT_STARTED
+
+                data = TournamentData(name, category, _datetime(start), _datetime(finish))
+                metadata.append(TournamentMetadata(data, players_count, round_count, state))
+
+            return metadata
+
+    def read_tournament(self, position: int) -> Any:
+        with self._lock:
+            connection = self.connection
+            row = connection.execute('''
+                SELECT kind, name, category, start_timestamp, finish_timestamp, is_finished, elo_k_value, scorer,
+                       payload
+                FROM tournaments WHERE position = ?
+            ''', (position,)).fetchone()
+
+            if row is None:
+                raise IndexError(f'Tournament {position} does not exist')
+
+            kind, name, category, start, finish, is_finished, elo_k_value, scorer, payload = row
+
+            if kind != INTERACTIVE_KIND:
+                return self.__decode_json(payload)
+
+            players = [Player(n, r, hash_id=h, federation_id=f) for n, r, h, f in connection.execute('''
+                SELECT name, rating, hash_id, federation_id FROM tournament_players WHERE tournament = ?
+                ORDER BY player_id
+            ''', (position,))]
+
+            rounds: list[list] = [[[], []] for _ in range(connection.execute(
+                'SELECT COUNT(*) FROM rounds WHERE tournament = ?', (position,)).fetchone()[0])]
+
+            for round_no, a, b, result in connection.execute('''
+                SELECT round_no, player_a, player_b, result FROM games WHERE tournament = ? ORDER BY round_no, board
+            ''', (position,)):
+                rounds[round_no][0].append((a, b))
+                rounds[round_no][1].append(_result(result))
+
+            return srl.InteractiveTournamentSerializer.from_dict({
+                'data': TournamentData(name, category, _datetime(start), _datetime(finish)),
+                'players': players,
+                'rounds': rounds,
+                'is_finished': bool(is_finished),
+                'settings': self.__create_settings(elo_k_value, scorer),
+            })
+
+    @staticmethod
+    def __create_settings(elo_k_value: float, scorer_name: str) -> TournamentSettings:
+        for scorer in scoring.ALL_SCORERS:
+            if scorer.__name__ == scorer_name:
+                return TournamentSettings(elo_k_value=elo_k_value, scorer=scorer())
+
+        raise ValueError(f'Unknown Scorer {scorer_name} (while decoding)')
+
+    def update_players(self, players: list[Player]):
+        with self._lock:
+            with self.connection as connection:
+                connection.execute('DELETE FROM players')
+                self.__insert_players(connection, players)
+
+    def add_tournament(self, tournament: Any) -> int:
+        with self._lock:
+            with self.connection as connection:
+                position = connection.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM tournaments').fetchone()[0]
+                self.__insert_tournament(connection, position, tournament)
+
+            return position
+
+    def update_tournament(self, tournament_id: int, tournament: Any):
+        with self._lock:
+            if tournament_id < 0:
+                tournament_id += self.connection.execute('SELECT COUNT(*) FROM tournaments').fetchone()[0]
+
+            with self.connection as connection:
+                if not self.__update_tournament_in_place(connection, tournament_id, tournament):
+                    connection.execute('DELETE FROM tournaments WHERE position = ?', (tournament_id,))
+                    self.__insert_tournament(connection, tournament_id, tournament)
+
+    def __update_tournament_in_place(self, connection: sqlite3.Connection, position: int, tournament: Any) -> bool:
+        if type(tournament) is not InteractiveTournament:
+            return False
+
+        row = connection.execute('SELECT kind FROM tournaments WHERE position = ?', (position,)).fetchone()
+        stored_players = [(n, r, h, f) for n, r, h, f in connection.execute('''
+            SELECT name, rating, hash_id, federation_id FROM tournament_players WHERE tournament = ? ORDER BY player_id
+        ''', (position,))]
+
+        if row is None or row[0] != INTERACTIVE_KIND or \
+                stored_players != [(p.name, p.rating, p.hash_id, p.federation_id) for p in tournament.players]:
+            return False
+
+        settings = tournament.get_settings()
+        connection.execute('''
+            UPDATE tournaments SET name = ?, category = ?, start_timestamp = ?, finish_timestamp = ?,
+                                   is_finished = ?, elo_k_value = ?, scorer = ?
+            WHERE position = ?
+        ''', (tournament.data.name, tournament.data.category, _timestamp(tournament.data.start_timestamp),
+              _timestamp(tournament.data.finish_timestamp), int(tournament.is_finished()), settings.elo_k_value,
+              settings.scorer.__class__.__name__, position))
+
+        stored_games: dict[int, list[tuple[int, int, str | None]]] = {}
+
+        for round_no, a, b, result in connection.execute(
+                'SELECT round_no, player_a, player_b, result FROM games WHERE tournament = ? ORDER BY round_no, board',
+                (position,)):
+            stored_games.setdefault(round_no, []).append((a, b, result))
+
+        stored_round_count = connection.execute(
+            'SELECT COUNT(*) FROM rounds WHERE tournament = ?', (position,)).fetchone()[0]
+        connection.execute('DELETE FROM rounds WHERE tournament = ? AND round_no >= ?',
+                           (position, tournament.round_count))
+
+        for round_no, round_ in enumerate(tournament.iter_rounds()):
+            games = [(a, b, _result_code(result)) for (a, b), result in zip(round_.pairs, round_.results)]
+            old_games = stored_games.get(round_no, [])
+
+            if round_no >= stored_round_count:
+                self.__insert_round(connection, position, round_no, round_)
+            elif [(a, b) for a, b, _ in games] != [(a, b) for a, b, _ in old_games]:
+                connection.execute('DELETE FROM rounds WHERE tournament = ? AND round_no = ?', (position, round_no))
+                self.__insert_round(connection, position, round_no, round_)
+            else:
+                connection.executemany('''
+                    UPDATE games SET result = ? WHERE tournament = ? AND round_no = ? AND board = ?
+                ''', [(game[2], position, round_no, board)
+                      for board, (game, old_game) in enumerate(zip(games, old_games)) if game[2] != old_game[2]])
+
+        return True
+
+    def set_result(self, tournament_id: int, round_no: int, board: int, result: GameResult | None):
+        with self._lock:
+            with self.connection as connection:
+                cursor = connection.execute('''
+                    UPDATE games SET result = ? WHERE tournament = ? AND round_no = ? AND board = ?
+                ''', (_result_code(result), tournament_id, round_no, board))
+
+                if cursor.rowcount != 1:
+                    raise IndexError(f'Game {tournament_id}/{round_no}/{board} does not exist')
+
+    def find_tournaments(self, start: datetime | None = None, end: datetime | None = None) -> list[int]:
+        with self._lock:
+            rows = self.connection.execute('''
+                SELECT position FROM tournaments
+                WHERE start_timestamp >= COALESCE(?, start_timestamp) AND start_timestamp < COALESCE(?, 1e100)
+                ORDER BY position
+            ''', (_timestamp(start), _timestamp(end)))
+
+            return [position for position, in rows]
+
+    def find_tournaments_in_year(self, year: int) -> list[int]:
+        return self.find_tournaments(datetime(year, 1, 1), datetime(year + 1, 1, 1))
+
+    def find_player_games(self, player: Player) -> list[GameRow]:
+        with self._lock:
+            rows = self.connection.execute('''
+                SELECT g.tournament, g.round_no, g.board, pa.name, pa.rating, pa.hash_id, pa.federation_id, pb.name,
+                       pb.rating, pb.hash_id, pb.federation_id, g.result
+                FROM tournament_players AS tp
+                JOIN games AS g ON g.tournament = tp.tournament
+                                   AND (g.player_a = tp.player_id OR g.player_b = tp.player_id)
+                JOIN tournament_players AS pa ON pa.tournament = g.tournament AND pa.player_id = g.player_a
+                JOIN tournament_players AS pb ON pb.tournament = g.tournament AND pb.player_id = g.player_b
+                WHERE tp.name = ? AND tp.hash_id = ?
+                ORDER BY g.tournament, g.round_no, g.board
+            ''', (player.name, player.hash_id))
+
+            return [(t, r, b, Player(an, ar, hash_id=ah, federation_id=af),
+                     Player(bn, br, hash_id=bh, federation_id=bf), _result(result))
+                    for t, r, b, an, ar, ah, af, bn, br, bh, bf, result in rows]
+
+
+def migrate_from_json(source: Database, sqlite_filename: str) -> SqliteDatabase:
+    target = SqliteDatabase(sqlite_filename, source.default_data)
+    target.write(source.read())
+    return target
+
+
+def main(args: Iterable[str]):
+    json_filename, sqlite_filename = args
+    migrate_from_json(Database(json_filename), sqlite_filename).close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
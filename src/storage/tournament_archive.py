@@ -0,0 +1,329 @@
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from src import serializer as srl
+from src.compact_format import RESULT_CODES, RESULT_TO_CODE
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+MAGIC = b'COTA'
+VERSION = 2  # 2: federation ids of players
+
+# Layout (little endian):
+#   records..., index: INDEX_ENTRY * count, FOOTER
+# Appends add records, a new index and a new footer after the last footer, the last valid footer is the archive.
+# Record:
+#   RECORD_HEADER, name, category, scorer (utf-8),
+#   boards per round (u16 * rounds), pairs (u16 * 2 * boards), result codes (u8 * boards),
+#   PLAYER_ENTRY * players, player names (utf-8)
+FOOTER = struct.Struct('<QI4sH')
+FOOTER_MAGIC_OFFSET = struct.calcsize('<QI')
+INDEX_ENTRY = struct.Struct('<QI')
+RECORD_HEADER = struct.Struct('<HHIHHHddd')
+PLAYER_ENTRY = struct.Struct('<dqqH')
+PLAYER_ENTRIES = {1: struct.Struct('<dqH'), 2: PLAYER_ENTRY}  # by archive version
+
+NATIVE_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class ArchiveException(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class TournamentSummary:
+    name: str
+    category: str
+    start_timestamp: datetime | None
+    finish_timestamp: datetime | None
+    players_count: int
+    rounds_count: int
+    boards_count: int
+
+
+def _encode_time(time_: datetime | None) -> float:
+    return time_.timestamp() if time_ is not None else math.nan
+
+
+def _decode_time(timestamp: float) -> datetime | None:
+    return datetime.fromtimestamp(timestamp) if not math.isnan(timestamp) else None
+
+
+def _little_endian(values: array) -> bytes:
+    if not NATIVE_LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def encode_tournament(tournament: InteractiveTournament) -> bytes:
+    if type(tournament) is not InteractiveTournament or not tournament.is_finished():
+        raise ArchiveException('Only finished InteractiveTournaments can be archived')
+
+    name, category = tournament.data.name.encode(), tournament.data.category.encode()
+    settings = srl.TournamentSettingsSerializer().encode(tournament.get_settings())
+    scorer = settings['scorer'].encode()
+
+    boards = array('H')
+    pairs = array('H')
+    results = array('B')
+
+    for round_ in tournament.iter_rounds():
+        boards.append(len(round_.pairs))
+        pairs.extend(player for pair in round_.pairs for player in pair)
+        results.extend(RESULT_TO_CODE[result] for result in round_.results)
+
+    player_names = [player.name.encode() for player in tournament.players]
+
+    return b''.join([
+        RECORD_HEADER.pack(len(tournament.players), tournament.round_count, len(results),
+                           len(name), len(category), len(scorer),
+                           _encode_time(tournament.data.start_timestamp),
+                           _encode_time(tournament.data.finish_timestamp),
+                           settings['elo_k_value']),
+        name, category, scorer,
+        _little_endian(boards), _little_endian(pairs), results.tobytes(),
+        *(PLAYER_ENTRY.pack(p.rating, p.hash_id, p.federation_id, len(n))
+          for p, n in zip(tournament.players, player_names)),
+        *player_names,
+    ])
+
+
+class TournamentArchive:
+    """
+    Read-only, memory mapped file of finished tournaments. Opening reads only the index, summaries, pairs and
+    results are read straight from the mapped buffer and whole tournaments are decoded only on load().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+
+        try:
+            if os.fstat(self._file.fileno()).st_size < FOOTER.size:
+                raise ArchiveException(f'{self.path} is not a tournament archive (empty or truncated)')
+
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+        try:
+            self.version, self._index, self._end = self.__read_index()
+            self._player_entry = PLAYER_ENTRIES[self.version]
+        except BaseException:
+            self.close()
+            raise
+
+    def __read_index(self) -> tuple[int, list[tuple[int, int]], int]:
+        """Version, index and end of the last valid footer, an append interrupted by a crash leaves bytes after it"""
+
+        for footer_offset in self.__footer_offsets():
+            index_offset, count, _, version = FOOTER.unpack_from(self._map, footer_offset)
+
+            if index_offset + count * INDEX_ENTRY.size != footer_offset:
+                continue
+
+            index = [INDEX_ENTRY.unpack_from(self._map, index_offset + i * INDEX_ENTRY.size) for i in range(count)]
+
+            if any(offset + length > index_offset for offset, length in index):
+                continue
+
+            if version not in PLAYER_ENTRIES:
+                raise ArchiveException(f'Archive version {version} is not supported (1 to {VERSION})')
+
+            return version, index, footer_offset + FOOTER.size
+
+        raise ArchiveException(f'{self.path} is not a tournament archive or is truncated')
+
+    def __footer_offsets(self) -> Iterator[int]:
+        """Offsets of possible footers (found by their magic) from the end of the file"""
+
+        end = len(self._map)
+
+        while (position := self._map.rfind(MAGIC, 0, end)) >= 0:
+            end = position + len(MAGIC) - 1
+            footer_offset = position - FOOTER_MAGIC_OFFSET
+
+            if footer_offset >= 0 and footer_offset + FOOTER.size <= len(self._map):
+                yield footer_offset
+
+    @property
+    def index(self) -> list[tuple[int, int]]:
+        """Offset and length of each record"""
+
+        return list(self._index)
+
+    @property
+    def end(self) -> int:
+        """Offset after the last valid footer, where the next append starts"""
+
+        return self._end
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'TournamentArchive':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __header(self, tournament_no: int) -> tuple[int, tuple]:
+        offset = self._index[tournament_no][0]
+        return offset, RECORD_HEADER.unpack_from(self._map, offset)
+
+    def __string(self, offset: int, length: int) -> str:
+        return bytes(self._map[offset:offset + length]).decode()
+
+    def __u16(self, offset: int, count: int) -> memoryview | array:
+        if NATIVE_LITTLE_ENDIAN:
+            return memoryview(self._map)[offset:offset + 2 * count].cast('H')
+
+        values = array('H', self._map[offset:offset + 2 * count])
+        values.byteswap()
+        return values
+
+    def __sections(self, tournament_no: int) -> dict[str, int]:
+        offset, (players, rounds, boards, name_len, category_len, scorer_len, *_) = self.__header(tournament_no)
+
+        name = offset + RECORD_HEADER.size
+        boards_offset = name + name_len + category_len + scorer_len
+        pairs = boards_offset + 2 * rounds
+        results = pairs + 4 * boards
+        players_offset = results + boards
+
+        return {
+            'name': name, 'boards': boards_offset, 'pairs': pairs, 'results': results, 'players': players_offset,
+            'names': players_offset + self._player_entry.size * players,
+        }
+
+    def get_summary(self, tournament_no: int) -> TournamentSummary:
+        offset, header = self.__header(tournament_no)
+        players, rounds, boards, name_len, category_len, _, start, finish, _ = header
+        name = offset + RECORD_HEADER.size
+
+        return TournamentSummary(
+            name=self.__string(name, name_len),
+            category=self.__string(name + name_len, category_len),
+            start_timestamp=_decode_time(start),
+            finish_timestamp=_decode_time(finish),
+            players_count=players,
+            rounds_count=rounds,
+            boards_count=boards,
+        )
+
+    def iter_summaries(self) -> Iterator[TournamentSummary]:
+        for tournament_no in range(len(self)):
+            yield self.get_summary(tournament_no)
+
+    def get_boards_per_round(self, tournament_no: int) -> memoryview | array:
+        _, header = self.__header(tournament_no)
+        return self.__u16(self.__sections(tournament_no)['boards'], header[1])
+
+    def get_pairs(self, tournament_no: int) -> memoryview | array:
+        """Player ids of all boards of all rounds as one flat buffer (a0, b0, a1, b1, ...)"""
+
+        _, header = self.__header(tournament_no)
+        return self.__u16(self.__sections(tournament_no)['pairs'], 2 * header[2])
+
+    def get_result_codes(self, tournament_no: int) -> memoryview:
+        """Indexes in RESULT_CODES of all boards of all rounds"""
+
+        _, header = self.__header(tournament_no)
+        offset = self.__sections(tournament_no)['results']
+        return memoryview(self._map)[offset:offset + header[2]]
+
+    def get_results(self, tournament_no: int) -> list[GameResult | None]:
+        return [RESULT_CODES[code] for code in self.get_result_codes(tournament_no)]
+
+    def get_players(self, tournament_no: int) -> list[Player]:
+        _, header = self.__header(tournament_no)
+        sections = self.__sections(tournament_no)
+        name_offset = sections['names']
+        players = []
+
+        for i in range(header[0]):
+            rating, hash_id, *federation_id, name_len = self._player_entry.unpack_from(
+                self._map, sections['players'] + i * self._player_entry.size)
+            players.append(Player(self.__string(name_offset, name_len), rating, hash_id=hash_id,
+                                  federation_id=federation_id[0] if federation_id else 0))
+            name_offset += name_len
+
+        return players
+
+    def load(self, tournament_no: int) -> InteractiveTournament:
+        offset, header = self.__header(tournament_no)
+        _, _, _, name_len, category_len, scorer_len, start, finish, elo_k_value = header
+        summary = self.get_summary(tournament_no)
+        scorer = self.__string(offset + RECORD_HEADER.size + name_len + category_len, scorer_len)
+
+        pairs = self.get_pairs(tournament_no)
+        results = self.get_results(tournament_no)
+        rounds = []
+        board = 0
+
+        for boards in self.get_boards_per_round(tournament_no):
+            rounds.append([
+                [(pairs[2 * i], pairs[2 * i + 1]) for i in range(board, board + boards)],
+                results[board:board + boards],
+            ])
+            board += boards
+
+        return srl.InteractiveTournamentSerializer.from_dict({
+            'data': TournamentData(summary.name, summary.category, summary.start_timestamp, summary.finish_timestamp),
+            'players': self.get_players(tournament_no),
+            'rounds': rounds,
+            'is_finished': True,
+            'settings': srl.TournamentSettingsSerializer().decode({'elo_k_value': elo_k_value, 'scorer': scorer}),
+        })
+
+
+def append_to_archive(path: str, tournaments: Iterable[InteractiveTournament]) -> int:
+    """
+    Appends finished tournaments to the archive (creating it if needed). The new records, the new index and footer
+    are written after the last valid footer and synced, so the existing bytes are never rewritten: a crash leaves
+    the old footer as the last valid one and open archives keep mapping unchanged bytes. Each append leaves the
+    previous index behind (12 bytes per tournament). Returns the number of tournaments in the archive.
+    """
+
+    index: list[tuple[int, int]] = []
+    end = 0
+
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        with TournamentArchive(path) as archive:
+            if archive.version != VERSION:
+                raise ArchiveException(f'Cannot append to an archive of version {archive.version}')
+
+            index, end = archive.index, archive.end
+
+    records = [encode_tournament(tournament) for tournament in tournaments]
+
+    with open(path, 'r+b' if end > 0 else 'wb') as f:
+        f.seek(end)
+
+        for record in records:
+            index.append((f.tell(), len(record)))
+            f.write(record)
+
+        index_offset = f.tell()
+        f.write(b''.join(INDEX_ENTRY.pack(offset, length) for offset, length in index))
+        f.write(FOOTER.pack(index_offset, len(index), MAGIC, VERSION))
+        f.truncate()  # the rest of an interrupted append
+        f.flush()
+        os.fsync(f.fileno())
+
+    return len(index)
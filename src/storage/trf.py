@@ -0,0 +1,324 @@
+import dataclasses
+import os
+import sys
+from datetime import datetime
+from typing import Iterable, Iterator, TextIO
+
+from src.database import Database
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.player import Player
+from src.tournament.round import GameResult, Round
+from src.tournament.tournament import RoundNotCompletedError, TournamentSettings
+
+# FIDE Tournament Report File (TRF-16). Records are lines starting with a three character code, players are the
+# fixed width '001' lines (columns below are 0-based slices), followed by one 10 character block per round:
+# two spaces, opponent starting rank (4), space, colour (w/b/-), space, result.
+PLAYER = '001'
+HEADERS = {'012': 'name', '042': 'start', '052': 'finish', '092': 'category'}
+START_RANK = slice(4, 8)
+NAME = slice(14, 47)
+RATING = slice(48, 52)
+FIDE_ID = slice(57, 68)
+ROUNDS_START = 91
+ROUND_WIDTH = 10
+
+DATE_FORMAT = '%Y/%m/%d'
+DATE_FORMATS = (DATE_FORMAT, '%Y-%m-%d', '%d.%m.%Y', '%y/%m/%d')
+
+# result codes of the white and the black player
+RESULT_TO_TRF: dict[GameResult | None, tuple[str, str]] = {
+    GameResult.WIN: ('1', '0'),
+    GameResult.DRAW: ('=', '='),
+    GameResult.LOSE: ('0', '1'),
+    GameResult.PLAYER_A_NOT_SHOWED_IN_TIME: ('-', '+'),
+    GameResult.PLAYER_B_NOT_SHOWED_IN_TIME: ('+', '-'),
+    GameResult.BOTH_PLAYERS_NOT_SHOWED_IN_TIME: ('-', '-'),
+    None: (' ', ' '),
+}
+TRF_TO_RESULT: dict[tuple[str, str], GameResult | None] = {
+    **{codes: result for result, codes in RESULT_TO_TRF.items()},
+    ('W', 'L'): GameResult.WIN,  # unrated games
+    ('D', 'D'): GameResult.DRAW,
+    ('L', 'W'): GameResult.LOSE,
+}
+
+
+class TrfException(Exception):
+    pass
+
+
+def to_surname_first(name: str) -> str:
+    *first_names, surname = name.split()
+    return f'{surname}, {" ".join(first_names)}' if first_names else surname
+
+
+def from_surname_first(trf_name: str) -> str:
+    surname, _, first_names = trf_name.partition(',')
+    return f'{first_names} {surname}'
+
+
+def _parse_date(value: str) -> datetime | None:
+    for format_ in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, format_)
+        except ValueError:
+            pass
+
+    return None
+
+
+def _pause_code(pause_points: float) -> str:
+    return 'U' if pause_points >= 1 else 'H' if pause_points > 0 else 'Z'
+
+
+class _TrfReader:
+    """Collects player lines as they come, the rounds are built once all players are known"""
+
+    def __init__(self):
+        self.headers: dict[str, str] = {}
+        self.players: list[Player] = []
+        self.games: list[list[tuple[int, str, str]]] = []  # in file order: (opponent rank, colour, result)
+        self.ranks: dict[int, int] = {}
+        self.names: set[tuple[str, int]] = set()
+
+    def read_line(self, line_no: int, line: str):
+        code = line[:3]
+
+        if code in HEADERS:
+            self.headers[HEADERS[code]] = line[4:].strip()
+        elif code == PLAYER:
+            try:
+                self.__read_player(line)
+            except ValueError as e:
+                raise TrfException(f'Line {line_no}: {e}') from None
+
+    def __read_player(self, line: str):
+        rank = int(line[START_RANK])
+
+        if rank in self.ranks:
+            raise ValueError(f'Starting rank {rank} is used twice')
+
+        name = from_surname_first(line[NAME].strip())
+        rating = line[RATING].strip()
+        fide_id = line[FIDE_ID].strip()
+        federation_id = int(fide_id) if fide_id else 0
+        player = Player(name, int(rating), federation_id=federation_id) if rating else \
+            Player(name, federation_id=federation_id)
+
+        if (player.name, player.hash_id) in self.names:  # namesakes
+            player = dataclasses.replace(player, hash_id=-rank)
+
+        self.names.add((player.name, player.hash_id))
+
+        games = []
+        line = line.rstrip()
+
+        for start in range(ROUNDS_START, len(line), ROUND_WIDTH):
+            opponent = line[start:start + 4].strip()
+            games.append((int(opponent) if opponent else 0, line[start + 5:start + 6], line[start + 7:start + 8]))
+
+        while games and games[-1][0] == 0 and not games[-1][2].strip():
+            games.pop()  # rounds not played yet
+
+        self.ranks[rank] = len(self.players)
+        self.players.append(player)
+        self.games.append(games)
+
+    def __opponent_game(self, rank: int, round_no: int, opponent: int) -> tuple[int, str, str]:
+        if opponent not in self.ranks:
+            raise TrfException(f'Round {round_no + 1}: player {rank} plays unknown player {opponent}')
+
+        games = self.games[self.ranks[opponent]]
+        game = games[round_no] if round_no < len(games) else (0, '', '')
+
+        if game[0] != rank:
+            raise TrfException(f'Round {round_no + 1}: player {opponent} does not play player {rank}')
+
+        return game
+
+    def tournament(self, settings: TournamentSettings | None, finished: bool) -> InteractiveTournament:
+        order = sorted(range(len(self.players)), key=lambda i: InteractiveTournament._players_starting_order_key(
+            self.players[i]))
+        position = [0] * len(self.players)
+
+        for new_position, old_position in enumerate(order):
+            position[old_position] = new_position
+
+        rounds_count = max((len(games) for games in self.games), default=0)
+        rank_of = {index: rank for rank, index in self.ranks.items()}
+        rounds = []
+
+        for round_no in range(rounds_count):
+            pairs, results = [], []
+
+            for index, games in enumerate(self.games):
+                if round_no >= len(games) or games[round_no][0] == 0:
+                    continue  # bye or not paired
+
+                opponent, colour, code = games[round_no]
+                rank = rank_of[index]
+
+                if colour == 'b' or (colour != 'w' and rank > opponent):
+                    continue  # the game is read from the line of its white player
+
+                _, _, opponent_code = self.__opponent_game(rank, round_no, opponent)
+                codes = (code or ' ', opponent_code or ' ')
+
+                if codes not in TRF_TO_RESULT:
+                    raise TrfException(f'Round {round_no + 1}: unknown result {codes} of players {rank}, {opponent}')
+
+                pairs.append((position[index], position[self.ranks[opponent]]))
+                results.append(TRF_TO_RESULT[codes])
+
+            try:
+                rounds.append(Round.from_results(len(self.players), tuple(pairs), results))
+            except ValueError as e:
+                raise TrfException(f'Round {round_no + 1}: {e}') from None
+
+        data = TournamentData(
+            name=self.headers.get('name', TournamentData.name),
+            category=self.headers.get('category', TournamentData.category),
+            start_timestamp=_parse_date(self.headers.get('start', '')),
+            finish_timestamp=_parse_date(self.headers.get('finish', '')) if finished else None,
+        )
+
+        try:
+            return InteractiveTournament.from_state(data, [self.players[i] for i in order],
+                                                    settings if settings is not None else TournamentSettings(),
+                                                    rounds, finished)
+        except (ValueError, RoundNotCompletedError) as e:
+            raise TrfException(f'Tournament cannot be built: {e!r}') from e
+
+
+def read_trf(lines: Iterable[str], settings: TournamentSettings | None = None,
+             finished: bool = False) -> InteractiveTournament:
+    """
+    Builds a tournament from TRF lines at once (rounds are not replayed). Players get the starting order of this
+    program and their FIDE id as federation_id. Only the last round may have games without results, finished marks the
+    tournament finished, which needs it complete.
+    """
+
+    reader = _TrfReader()
+
+    for line_no, line in enumerate(lines, start=1):
+        reader.read_line(line_no, line)
+
+    return reader.tournament(settings, finished)
+
+
+def iter_trf(tournament: InteractiveTournament) -> Iterator[str]:
+    """Lines of the TRF report of the tournament, without line endings"""
+
+    players = tournament.players
+    pause_points = tournament.get_settings().scorer.pause_points
+    data = tournament.data
+
+    yield f'012 {data.name}'
+
+    if data.start_timestamp is not None:
+        yield f'042 {data.start_timestamp.strftime(DATE_FORMAT)}'
+
+    if data.finish_timestamp is not None:
+        yield f'052 {data.finish_timestamp.strftime(DATE_FORMAT)}'
+
+    yield f'062 {len(players)}'
+
+    if data.category:
+        yield f'092 {data.category}'
+
+    yield f'XXR {tournament.round_count}'
+
+    games: list[list[str]] = [[] for _ in players]
+    points = [0.] * len(players)
+
+    for round_ in tournament.iter_rounds():
+        for (player_a, player_b), result in zip(round_.pairs, round_.results):
+            code_a, code_b = RESULT_TO_TRF[result]
+            games[player_a].append(f'  {player_b + 1:4d} w {code_a}')
+            games[player_b].append(f'  {player_a + 1:4d} b {code_b}')
+
+            if result is not None:
+                points[player_a] += result.points_a
+                points[player_b] += result.points_b
+
+        for player in round_.pause:
+            games[player].append(f'  0000 - {_pause_code(pause_points)}')
+            points[player] += pause_points
+
+    places = [0] * len(players)
+
+    if tournament.round_count > 0:
+        for place, player_id, _ in tournament.get_id_scoreboard():
+            places[player_id] = place
+
+    for i, player in enumerate(players):
+        name = to_surname_first(player.name)
+        rating = f'{round(player.rating):4d}' if player.rating > 0 else ''
+        fide_id = str(player.federation_id) if player.federation_id > 0 else ''
+
+        yield (f'{PLAYER} {i + 1:4d}      {name:<33.33} {rating:>4} {"":3} {fide_id:>11} {"":10} {points[i]:4.1f} '
+               f'{places[i] or i + 1:4d}{"".join(games[i])}')
+
+
+def write_trf(tournament: InteractiveTournament, out: TextIO):
+    for line in iter_trf(tournament):
+        out.write(line)
+        out.write('\n')
+
+
+def _open_database(filename: str) -> Database:
+    """
+    The json database file of a closed program (locked until close()), in the compact format the program writes.
+    Journal events would be ignored, so the journal has to be compacted into the file first.
+    """
+
+    database = Database(filename, compact_format=True)
+    database.lock_exclusively()
+    journal = os.path.splitext(filename)[0] + '.journal'
+
+    if os.path.isfile(journal) and os.path.getsize(journal) > 0:
+        database.close()
+        raise TrfException(f'{filename} has journal events, compact the database first')
+
+    return database
+
+
+def main(args: Iterable[str]):
+    """
+    import TRF_FILE DATABASE_FILE
+    export DATABASE_FILE TOURNAMENT_NO TRF_FILE
+    """
+    command, *rest = args
+
+    if command == 'import':
+        trf_filename, database_filename = rest
+
+        with open(trf_filename, 'r', encoding='utf-8') as f:
+            tournament = read_trf(f)
+
+        database = _open_database(database_filename)
+
+        try:
+            tournament_no = database.add_tournament(tournament)
+        finally:
+            database.close()
+
+        print(f'imported {tournament.data.name} as tournament {tournament_no}')
+    elif command == 'export':
+        database_filename, tournament_no, trf_filename = rest
+
+        database = _open_database(database_filename)
+
+        try:
+            tournament = database.read_entry('tournaments', int(tournament_no))
+        finally:
+            database.close()
+
+        with open(trf_filename, 'w', encoding='utf-8') as f:
+            write_trf(tournament, f)
+    else:
+        raise ValueError(f'Unknown command {command}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
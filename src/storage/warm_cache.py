@@ -0,0 +1,176 @@
+import hashlib
+import io
+import logging
+import os
+import pickle
+import sys
+import threading
+from typing import Any, BinaryIO, Callable
+
+logger = logging.getLogger(__name__)
+
+# Bump when pickled classes change in a way old pickles would not load correctly
+CACHE_VERSION = 1
+
+
+# builds the cached payload from the content of the source file
+type Decode = Callable[[bytes], Any]
+
+
+def _hash_file(f: BinaryIO) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+
+    while chunk := f.read(1 << 20):
+        digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class WarmCache:
+    """
+    Pickled decoded state kept next to a database file, so that startup is a single unpickling instead of parsing
+    and decoding. The cache is used only while the file it was made from is unchanged (modification time, size and
+    content hash). Pickles are trusted, so the cache has to live where the database does.
+    """
+
+    def __init__(self, source_filename: str, decode: Decode | None = None, idle_delay: float | None = 5.0):
+        self.source_filename = source_filename
+        self.decode = decode
+        self.filename = os.path.splitext(source_filename)[0] + '.cache.pickle'
+        self.idle_delay = idle_delay
+
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._writer: threading.Thread | None = None
+
+        self._rebuild_lock = threading.Lock()
+        self._scheduled = False
+        self._idle_timer: threading.Timer | None = None
+
+    @staticmethod
+    def __header(stat: os.stat_result, digest: str) -> dict:
+        return {
+            'version': CACHE_VERSION,
+            'python': list(sys.version_info[:2]),
+            'source': [stat.st_mtime_ns, stat.st_size, digest],
+        }
+
+    def load(self) -> Any | None:
+        """Returns the cached payload, None if there is no valid cache"""
+
+        try:
+            with open(self.filename, 'rb') as f:
+                header = pickle.load(f)
+
+                with open(self.source_filename, 'rb') as source:
+                    stat = os.fstat(source.fileno())
+
+                    if header.get('source', [None, None])[:2] != [stat.st_mtime_ns, stat.st_size]:
+                        return None
+
+                    if header != self.__header(stat, _hash_file(source)):
+                        return None
+
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f'Ignoring warm cache {self.filename}: {e!r}')
+            return None
+
+    def store(self, payload: Any):
+        """
+        Pickles payload right away (so the state is consistent), the source is hashed and the cache is written in a
+        thread. The source file is opened here, so the cache describes the file the payload was made from even if it
+        is replaced in the meantime. The thread is not a daemon, exiting waits for it.
+        """
+
+        try:
+            data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+            source = open(self.source_filename, 'rb')
+        except Exception as e:
+            logger.warning(f'Cannot store warm cache {self.filename}: {e!r}')
+            return
+
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._writer = threading.Thread(target=self.__write, args=(generation, source, data))
+            self._writer.start()
+
+    def wait(self):
+        writer = self._writer
+
+        if writer is not None:
+            writer.join()
+
+    def schedule(self):
+        """
+        Rebuilds the cache once nothing was scheduled for idle_delay seconds (never if None, only flush does), so a
+        burst of commits costs one rebuild. The rebuild decodes the saved source file (on the timer thread or the one
+        calling flush), so the cache never holds the objects the program keeps changing in memory.
+        """
+
+        with self._lock:
+            self._scheduled = True
+
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+
+            if self.idle_delay is None:
+                self._idle_timer = None
+                return
+
+            self._idle_timer = threading.Timer(self.idle_delay, self.flush)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def flush(self):
+        """Runs a scheduled rebuild right away and waits for the cache to be written"""
+
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+
+            scheduled, self._scheduled = self._scheduled, False
+
+        if scheduled:
+            with self._rebuild_lock:
+                self.__rebuild()
+
+        self.wait()
+
+    def __rebuild(self):
+        try:
+            with open(self.source_filename, 'rb') as source:
+                stat = os.fstat(source.fileno())
+                content = source.read()
+
+            data = pickle.dumps(self.decode(content), protocol=pickle.HIGHEST_PROTOCOL)
+            header = self.__header(stat, _hash_file(io.BytesIO(content)))
+
+            with self._lock:
+                self._generation += 1  # supersedes stores still hashing
+                self.__write_cache(header, data)
+        except Exception as e:
+            logger.warning(f'Cannot rebuild warm cache {self.filename}: {e!r}')
+
+    def __write(self, generation: int, source: BinaryIO, data: bytes):
+        with source:
+            header = self.__header(os.fstat(source.fileno()), _hash_file(source))
+
+        with self._lock:
+            if generation != self._generation:  # a newer state is being stored
+                return
+
+            self.__write_cache(header, data)
+
+    def __write_cache(self, header: dict, data: bytes):
+        tmp_filename = self.filename + '.tmp'
+
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(data)
+
+        os.replace(tmp_filename, self.filename)
@@ -2,11 +2,12 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Iterable
+from typing import Any, Callable, Iterable, Iterator
 
-from src.tournament.player import Player
+from src.tournament.player import Player, players_fingerprint
 from src.tournament.round import Round, Pairs, GameResult
 from src.tournament.round_stats import RoundStats
+from src.tournament.score_group_index import ScoreGroup
 from src.tournament.scoring.scorer import Score
 from src.tournament.tournament import Tournament, Pairer, TournamentSettings
 
@@ -45,6 +46,35 @@ class InteractiveTournament:
         self._update_ratings = update_ratings
         self._settings = TournamentSettings()
 
+    @classmethod
+    def from_state(cls, data: TournamentData, players: Iterable[Player], settings: TournamentSettings,
+                   rounds: list[Round], is_finished: bool) -> 'InteractiveTournament':
+        """
+        Builds the tournament directly from stored state. Players have to be in the starting order already,
+        as the rounds refer to their positions. Everything is validated once, after the state is built.
+        """
+
+        tournament = cls(data)
+        tournament._settings = settings
+        tournament._players = tuple(players)
+
+        if len(set(tournament._players)) != len(tournament._players):
+            raise ValueError('Tournament players are not unique')
+
+        if list(tournament._players) != sorted(tournament._players, key=cls._players_starting_order_key):
+            raise ValueError('Tournament players are not in the starting order')
+
+        if len(rounds) > 0:
+            tournament._tournament = Tournament.from_rounds(tournament._players, settings, rounds)
+            tournament._state = TournamentState.RUNNING
+
+        if is_finished:
+            tournament._assert_state(TournamentState.RUNNING, 'Tournament has to be running to finish it')
+            tournament._tournament.assert_round_completed()
+            tournament._state = TournamentState.FINISHED
+
+        return tournament
+
     def __str__(self):
         return '<InteractiveTournament: ' + str({
             'players': self._players,
@@ -137,6 +167,14 @@ class InteractiveTournament:
         self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get round')
         return self._tournament.get_round(round_no)
 
+    def iter_rounds(self) -> Iterator[Round]:
+        """Yields the rounds without copying them, they must not be modified"""
+
+        if self._tournament is None:
+            return iter(())
+
+        return self._tournament.iter_rounds()
+
     def get_stats(self, round_no: int = -1) -> RoundStats:
         self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get round stats')
         return self._tournament.get_stats(round_no)
@@ -146,6 +184,28 @@ class InteractiveTournament:
         self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get stats')
         return self._tournament.stats
 
+    def get_stats_checksum(self) -> str:
+        self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get stats')
+        return self._tournament.get_stats_checksum()
+
+    def adopt_stats(self, stats: RoundStats):
+        self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to adopt stats')
+        self._tournament.adopt_stats(stats)
+
+    def get_fingerprint(self) -> int:
+        """
+        Cheap hash of everything that is saved (data, settings, players, rounds and state). It is meant to find
+        out that there is nothing new to write and is valid only within one process.
+        """
+
+        return hash((
+            (self.data.name, self.data.category, self.data.start_timestamp, self.data.finish_timestamp),
+            (self._settings.elo_k_value, type(self._settings.scorer).__name__),
+            players_fingerprint(self._players),
+            tuple((tuple(map(tuple, round_.pairs)), tuple(round_.results)) for round_ in self.iter_rounds()),
+            self._state,
+        ))
+
     def set_result(self, table: int, result: GameResult | None):
         self._assert_state(TournamentState.RUNNING, 'Tournament has to be running to set result on a table')
 
@@ -159,6 +219,10 @@ class InteractiveTournament:
         self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get scores')
         return self._tournament.get_scores()
 
+    def get_score_groups(self) -> list[ScoreGroup]:
+        self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get score groups')
+        return self._tournament.get_score_groups()
+
     def get_id_scoreboard(self) -> tuple[tuple[int, int, Score], ...]:
         self._assert_not_state(TournamentState.NOT_STARTED, 'Tournament has not started yet to get scoreboard')
         return self._tournament.get_id_scoreboard()
@@ -0,0 +1,205 @@
+from typing import Any, Iterator
+
+from src.tournament.interactive_tournament import TournamentData
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+type Match = tuple[int | None, int | None]
+type PathStep = tuple[int, int | None, GameResult | None]
+
+
+class KnockoutException(Exception):
+    pass
+
+
+def create_seeding_order(size: int) -> list[int]:
+    """Returns seeds (0-based) placed on the bracket leaves, so that seeds 0 and 1 can meet only in the final"""
+    order = [0]
+
+    while len(order) < size:
+        length = len(order) * 2
+        order = [seed for s in order for seed in (s, length - 1 - s)]
+
+    return order
+
+
+class KnockoutTournament:
+    # Array backed binary tree: node 1 is the final, children of node n are 2n and 2n + 1,
+    # leaves (size .. 2 * size - 1) hold seeded players and _winners[node] is the player that advanced from node
+
+    def __init__(self, players: tuple[Player, ...], data: TournamentData | None = None):
+        if len(players) < 2:
+            raise KnockoutException('Knockout tournament needs at least two players')
+
+        if len(set((p.name, p.hash_id) for p in players)) != len(players):
+            raise ValueError('Players in knockout tournament have to be unique')
+
+        self.data = data if data is not None else TournamentData()
+        self._players: tuple[Player, ...] = tuple(sorted(players, key=self._players_seeding_key))
+        self._size = 1 << (len(players) - 1).bit_length()
+
+        self._winners: list[int | None] = [None for _ in range(2 * self._size)]
+        self._results: list[GameResult | None] = [None for _ in range(self._size)]
+        self._leaf_of: list[int] = [0 for _ in self._players]
+        self._undecided_by_round: list[int] = [self._size >> (r + 1) for r in range(self.round_count)]
+
+        self.__place_players()
+
+    def __str__(self):
+        return f'<KnockoutTournament with {len(self._players)} players and {self.round_count} rounds>'
+
+    __repr__ = __str__
+
+    @staticmethod
+    def _players_seeding_key(player: Player) -> Any:
+        return -player.rating, player
+
+    def __place_players(self):
+        for position, seed in enumerate(create_seeding_order(self._size)):
+            if seed < len(self._players):
+                self._winners[self._size + position] = seed
+                self._leaf_of[seed] = self._size + position
+
+        for node in range(self._size // 2, self._size):
+            if self.is_bye(node):
+                player_a, player_b = self.get_match(node)
+                self._winners[node] = player_a if player_a is not None else player_b
+                self._undecided_by_round[0] -= 1
+
+    @property
+    def players(self) -> tuple[Player, ...]:
+        return self._players
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def round_count(self) -> int:
+        return self._size.bit_length() - 1
+
+    @property
+    def champion(self) -> int | None:
+        return self._winners[1]
+
+    def is_finished(self) -> bool:
+        return self.champion is not None
+
+    @property
+    def current_round(self) -> int:
+        for round_no, undecided in enumerate(self._undecided_by_round):
+            if undecided > 0:
+                return round_no
+
+        return self.round_count - 1
+
+    def get_node(self, round_no: int, match_no: int) -> int:
+        if not 0 <= round_no < self.round_count:
+            raise IndexError(f'Round {round_no} does not exist')
+
+        matches = self._size >> (round_no + 1)
+
+        if not 0 <= match_no < matches:
+            raise IndexError(f'Match {match_no} does not exist in round {round_no}')
+
+        return matches + match_no
+
+    def get_round_of_node(self, node: int) -> int:
+        self.__assert_match_node(node)
+        return self.round_count - node.bit_length()
+
+    def get_match(self, node: int) -> Match:
+        self.__assert_match_node(node)
+        return self._winners[2 * node], self._winners[2 * node + 1]
+
+    def get_result(self, node: int) -> GameResult | None:
+        self.__assert_match_node(node)
+        return self._results[node]
+
+    def get_winner(self, node: int) -> int | None:
+        self.__assert_match_node(node)
+        return self._winners[node]
+
+    def get_round_matches(self, round_no: int) -> tuple[Match, ...]:
+        first = self.get_node(round_no, 0)
+        return tuple(self.get_match(node) for node in range(first, 2 * first))
+
+    def is_bye(self, node: int) -> bool:
+        if self.get_round_of_node(node) != 0:
+            return False
+
+        return (self._winners[2 * node] is None) != (self._winners[2 * node + 1] is None)
+
+    def __assert_match_node(self, node: int):
+        if not 1 <= node < self._size:
+            raise IndexError(f'Match node {node} does not exist')
+
+    def set_result(self, node: int, result: GameResult | None):
+        player_a, player_b = self.get_match(node)
+
+        if self.is_bye(node):
+            raise KnockoutException('Cannot set a result of a bye')
+
+        if player_a is None or player_b is None:
+            raise KnockoutException('Both players of the match are not known yet')
+
+        if result is not None and result.points_a == result.points_b:
+            raise KnockoutException(f'Knockout match must have a winner, got {result.name}')
+
+        winner = None if result is None else (player_a if result.points_a > result.points_b else player_b)
+
+        if self._winners[node] != winner:
+            self.__clear_decided_ancestors(node)
+
+        self.__set_node(node, winner, result)
+
+    def __set_node(self, node: int, winner: int | None, result: GameResult | None):
+        round_no = self.round_count - node.bit_length()
+        self._undecided_by_round[round_no] += (self._winners[node] is not None) - (winner is not None)
+        self._winners[node] = winner
+        self._results[node] = result
+
+    def __clear_decided_ancestors(self, node: int):
+        node //= 2
+
+        while node >= 1 and self._winners[node] is not None:
+            self.__set_node(node, None, None)
+            node //= 2
+
+    def iter_player_path(self, player_id: int) -> Iterator[PathStep]:
+        """Yields ``(round, opponent, result)`` for each match of the player, ending on the lost or pending one"""
+        node = self._leaf_of[player_id]
+
+        while node > 1:
+            parent = node // 2
+
+            yield self.round_count - parent.bit_length(), self._winners[node ^ 1], self._results[parent]
+
+            if self._winners[parent] != player_id:
+                return
+
+            node = parent
+
+    def get_player_path(self, player_id: int) -> tuple[PathStep, ...]:
+        return tuple(self.iter_player_path(player_id))
+
+    def is_eliminated(self, player_id: int) -> bool:
+        path = self.get_player_path(player_id)
+
+        if len(path) == 0 or path[-1][2] is None:
+            return False
+
+        return self._winners[self._leaf_of[player_id] >> len(path)] != player_id
+
+    def render_path(self, player_id: int) -> str:
+        lines = [str(self._players[player_id])]
+
+        for round_no, opponent, result in self.iter_player_path(player_id):
+            opponent_str = 'bye' if opponent is None else str(self._players[opponent])
+            result_str = '-' if result is None else result.name
+            lines.append(f'  Round {round_no + 1}: vs {opponent_str} [{result_str}]')
+
+        return '\n'.join(lines)
+
+    def get_decided_matches(self) -> tuple[tuple[int, GameResult], ...]:
+        return tuple((node, result) for node, result in enumerate(self._results) if result is not None)
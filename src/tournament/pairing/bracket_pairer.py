@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 
+from src.tournament.pairing.color_allocator import allocate_colors
 from src.tournament.pairing.pairer import Pairer, ListPairs
 from src.tournament.round import Pairs
 import logging
@@ -12,9 +13,11 @@ type Bracket = tuple[float, set[int]]
 class BracketPairer(Pairer, ABC):
     def _pair(self) -> Pairs:
         if self.stats.round_count == 0:
-            return self._pair_first_round()
+            pairs = self._pair_first_round()
+        else:
+            pairs = self.__pair_middle_round()
 
-        return self.__pair_middle_round()
+        return allocate_colors(pairs, self.stats, self.scores)
 
     @abstractmethod
     def _pair_first_round(self) -> Pairs:
@@ -26,6 +29,9 @@ class BracketPairer(Pairer, ABC):
         return tuple(self.__pair_brackets(brackets))
 
     def __create_pairing_brackets(self) -> list[Bracket]:
+        if self.score_groups is not None:
+            return self.__create_pairing_brackets_from_index()
+
         brackets: list[Bracket] = [(-1, set())]
 
         for player in sorted(self.players, key=lambda p: -self.scores[p][0]):
@@ -36,6 +42,16 @@ class BracketPairer(Pairer, ABC):
 
         return brackets[1:]
 
+    def __create_pairing_brackets_from_index(self) -> list[Bracket]:
+        brackets = self.score_groups.get_groups()
+
+        if len(self.players) == self.score_groups.players_count:
+            return brackets
+
+        enabled = set(self.players)
+        brackets = [(score, players & enabled) for score, players in brackets]
+        return [(score, players) for score, players in brackets if len(players) > 0]
+
     def __pair_brackets(self, brackets: list[Bracket]) -> ListPairs:
         logger.info(f'Pairing {len(self.players)} players')
         logger.info(f'Brackets: {brackets}')
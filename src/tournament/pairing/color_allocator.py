@@ -0,0 +1,73 @@
+from src.tournament.round import Pairs
+from src.tournament.round_stats import RoundStats
+from src.tournament.scoring.scorer import Score
+
+NO_PREFERENCE = 0
+MILD_PREFERENCE = 1
+STRONG_PREFERENCE = 2
+ABSOLUTE_PREFERENCE = 3
+
+WHITE = 1
+BLACK = -1
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+def calculate_color_preferences(stats: RoundStats) -> tuple[list[int], list[int]]:
+    """Returns preferred colors (WHITE, BLACK or 0) and preference strengths of all players"""
+    colors, strengths = [], []
+
+    for balance, repetition in zip(stats.color_balance, stats.color_repetition):
+        if abs(balance) >= 2 or abs(repetition) >= 2:
+            colors.append(-_sign(balance) if abs(balance) >= 2 else -_sign(repetition))
+            strengths.append(ABSOLUTE_PREFERENCE)
+        elif balance != 0:
+            colors.append(-_sign(balance))
+            strengths.append(STRONG_PREFERENCE)
+        elif repetition != 0:
+            colors.append(-_sign(repetition))
+            strengths.append(MILD_PREFERENCE)
+        else:
+            colors.append(0)
+            strengths.append(NO_PREFERENCE)
+
+    return colors, strengths
+
+
+def allocate_colors(pairs: Pairs, stats: RoundStats, scores: tuple[Score, ...] | None = None) -> Pairs:
+    """
+    Orders every pair as (white, black) for the whole round at once. Priorities: grant both preferences,
+    grant the stronger preference, grant the preference of the higher ranked player (score, rating,
+    starting rank) and finally alternate colors of the higher ranked players by board.
+    """
+    if len(pairs) == 0:
+        return ()
+
+    colors, strengths = calculate_color_preferences(stats)
+    ranks = _calculate_ranking_keys(stats, scores)
+
+    players_a, players_b = zip(*pairs)
+    colors_a = [colors[p] for p in players_a]
+    colors_b = [colors[p] for p in players_b]
+    strength_diff = [strengths[a] - strengths[b] for a, b in pairs]
+    a_is_higher = [ranks[a] > ranks[b] for a, b in pairs]
+
+    a_is_white = [
+        (ca == WHITE or cb == BLACK) if ca != cb else
+        (ca == WHITE) if sd > 0 else
+        (cb == BLACK) if sd < 0 else
+        (ca == WHITE) == higher if ca != 0 else
+        higher == (board % 2 == 0)
+        for board, (ca, cb, sd, higher) in enumerate(zip(colors_a, colors_b, strength_diff, a_is_higher))
+    ]
+
+    return tuple((a, b) if white else (b, a) for a, b, white in zip(players_a, players_b, a_is_white))
+
+
+def _calculate_ranking_keys(stats: RoundStats, scores: tuple[Score, ...] | None) -> list[tuple]:
+    if scores is None:
+        scores = tuple(() for _ in range(stats.players_count))
+
+    return [(score, rating, -player) for player, (score, rating) in enumerate(zip(scores, stats.ratings))]
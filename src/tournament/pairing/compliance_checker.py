@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Iterable
+
+from src.tournament.pairing.pair_constraints import ForbiddenPairsIndex
+from src.tournament.round import Pairs
+from src.tournament.round_stats import RoundStats
+from src.tournament.scoring.scorer import Score
+
+
+class Rule(Enum):
+    UNKNOWN_PLAYER = 0
+    DUPLICATED_PLAYER = 1
+    REPEATED_PAIR = 2
+    COLOR_LIMIT = 3
+    COLOR_ORIENTATION = 4
+    FORBIDDEN_PAIR = 5
+    TOO_MANY_PAUSES = 6
+    REPEATED_PAUSE = 7
+    SCORE_DIFFERENCE = 8
+
+
+@dataclass(frozen=True, slots=True)
+class Violation:
+    rule: Rule
+    table: int | None
+    players: tuple[int, ...]
+
+
+class PairingRuleViolationError(Exception):
+    def __init__(self, violations: tuple[Violation, ...]):
+        super().__init__(f'Pairing breaks {len(violations)} rule(s): {violations}')
+        self.violations = violations
+
+
+class ComplianceChecker:
+    def __init__(self, *, max_color_repetition: int | None = 2, max_color_balance: int | None = None,
+                 check_orientation: bool = False, check_repeated_pause: bool = False,
+                 max_score_difference: float | None = None):
+        self.max_color_repetition = max_color_repetition
+        self.max_color_balance = max_color_balance
+        self.check_orientation = check_orientation
+        self.check_repeated_pause = check_repeated_pause
+        self.max_score_difference = max_score_difference
+
+    def check(self, stats: RoundStats, pairs: Pairs, scores: tuple[Score, ...] | None = None,
+              forbidden: ForbiddenPairsIndex | None = None) -> tuple[Violation, ...]:
+        players_count = stats.players_count
+        played_together = stats.played_together
+        no_white, no_black = self.__create_color_limits(stats)
+        check_colors = self.max_color_repetition is not None or self.max_color_balance is not None
+        check_forbidden = bool(forbidden)
+        check_scores = scores is not None and self.max_score_difference is not None
+
+        violations: list[Violation] = []
+        paired = [False] * players_count
+
+        for table, (player_a, player_b) in enumerate(pairs):
+            if not (0 <= player_a < players_count and 0 <= player_b < players_count):
+                violations.append(Violation(Rule.UNKNOWN_PLAYER, table, (player_a, player_b)))
+                continue
+
+            if player_a == player_b or paired[player_a] or paired[player_b]:
+                violations.append(Violation(Rule.DUPLICATED_PLAYER, table, (player_a, player_b)))
+                paired[player_a] = paired[player_b] = True
+                continue
+
+            paired[player_a] = paired[player_b] = True
+
+            if played_together[player_a][player_b] > 0:
+                violations.append(Violation(Rule.REPEATED_PAIR, table, (player_a, player_b)))
+
+            if not check_colors:
+                pass
+            elif (no_white[player_a] and no_white[player_b]) or (no_black[player_a] and no_black[player_b]):
+                violations.append(Violation(Rule.COLOR_LIMIT, table, (player_a, player_b)))
+            elif self.check_orientation and (no_white[player_a] or no_black[player_b]):
+                violations.append(Violation(Rule.COLOR_ORIENTATION, table, (player_a, player_b)))
+
+            if check_forbidden and forbidden.is_forbidden(player_a, player_b):
+                violations.append(Violation(Rule.FORBIDDEN_PAIR, table, (player_a, player_b)))
+
+            if check_scores and abs(scores[player_a][0] - scores[player_b][0]) > self.max_score_difference:
+                violations.append(Violation(Rule.SCORE_DIFFERENCE, table, (player_a, player_b)))
+
+        self.__check_pauses(stats, paired, violations)
+
+        return tuple(violations)
+
+    def check_many(self, items: Iterable[tuple]) -> list[tuple[Violation, ...]]:
+        # each item holds check() arguments: (stats, pairs[, scores[, forbidden]])
+        return [self.check(*item) for item in items]
+
+    def __create_color_limits(self, stats: RoundStats) -> tuple[list[bool], list[bool]]:
+        max_rep, max_balance = self.max_color_repetition, self.max_color_balance
+        no_white = [False] * stats.players_count
+        no_black = [False] * stats.players_count
+
+        if max_rep is not None:
+            no_white = [rep >= max_rep for rep in stats.color_repetition]
+            no_black = [rep <= -max_rep for rep in stats.color_repetition]
+
+        if max_balance is not None:
+            no_white = [nw or balance >= max_balance for nw, balance in zip(no_white, stats.color_balance)]
+            no_black = [nb or balance <= -max_balance for nb, balance in zip(no_black, stats.color_balance)]
+
+        return no_white, no_black
+
+    def __check_pauses(self, stats: RoundStats, paired: list[bool], violations: list[Violation]):
+        paused = tuple(player for player, is_paired in enumerate(paired) if not is_paired)
+
+        if len(paused) > stats.players_count % 2:
+            violations.append(Violation(Rule.TOO_MANY_PAUSES, None, paused))
+
+        if not self.check_repeated_pause or len(paused) == 0:
+            return
+
+        someone_never_paused = any(is_paired and stats.paused[player] == 0 for player, is_paired in enumerate(paired))
+
+        for player in paused:
+            if stats.paused[player] > 0 and someone_never_paused:
+                violations.append(Violation(Rule.REPEATED_PAUSE, None, (player,)))
@@ -52,7 +52,25 @@ class TupleWeightedGraph:
 class DutchPairer(BracketPairer):
     def _pair_first_round(self) -> Pairs:
         half = len(self.players) // 2
-        return tuple((i, half + i) for i in self.players[:half])
+        top, bottom = list(self.players[:half]), list(self.players[half:2 * half])
+
+        if self.forbidden:
+            self.__resolve_forbidden_first_round_pairs(top, bottom)
+
+        return tuple(zip(top, bottom))
+
+    def __resolve_forbidden_first_round_pairs(self, top: list[int], bottom: list[int]):
+        for i in range(len(top)):
+            if not self.forbidden.is_forbidden(top[i], bottom[i]):
+                continue
+
+            for j in sorted(range(len(bottom)), key=lambda k: abs(k - i)):
+                if not self.forbidden.is_forbidden(top[i], bottom[j]) and \
+                        not self.forbidden.is_forbidden(top[j], bottom[i]):
+                    bottom[i], bottom[j] = bottom[j], bottom[i]
+                    break
+            else:
+                raise Exception('Cannot pair players')
 
     def _pair_bracket(self, players: set[int], downfloat: set[int], *, is_last: bool) -> ListPairs:
         players |= downfloat
@@ -83,10 +101,13 @@ class DutchPairer(BracketPairer):
         return graph
 
     def __can_play_with_each_other(self, player_1: int, player_2: int) -> bool:
-        if self.stats.color_repetition[player_1] == self.stats.color_repetition[player_2] == -2:
+        if self.forbidden.is_forbidden(player_1, player_2):
+            return False
+
+        if max(self.stats.color_repetition[player_1], self.stats.color_repetition[player_2]) <= -2:
             return False
 
-        if self.stats.color_repetition[player_1] == self.stats.color_repetition[player_2] == +2:
+        if min(self.stats.color_repetition[player_1], self.stats.color_repetition[player_2]) >= +2:
             return False
 
         return self.stats.played_together[player_1][player_2] == 0
@@ -10,7 +10,25 @@ from src.tournament.pairing.bracket_pairer import BracketPairer
 
 class GroupMonradPairer(BracketPairer):
     def _pair_first_round(self) -> Pairs:
-        return tuple((self.players[i], self.players[i + 1]) for i in range(0, len(self.players) - 1, 2))
+        firsts, seconds = list(self.players[0:len(self.players) - 1:2]), list(self.players[1::2])
+
+        if self.forbidden:
+            self.__resolve_forbidden_first_round_pairs(firsts, seconds)
+
+        return tuple(zip(firsts, seconds))
+
+    def __resolve_forbidden_first_round_pairs(self, firsts: list[int], seconds: list[int]):
+        for i in range(len(firsts)):
+            if not self.forbidden.is_forbidden(firsts[i], seconds[i]):
+                continue
+
+            for j in sorted(range(len(seconds)), key=lambda k: abs(k - i)):
+                if not self.forbidden.is_forbidden(firsts[i], seconds[j]) and \
+                        not self.forbidden.is_forbidden(firsts[j], seconds[i]):
+                    seconds[i], seconds[j] = seconds[j], seconds[i]
+                    break
+            else:
+                raise Exception('Cannot pair players')
 
     def _pair_bracket(self, players: set[int], downfloat: set[int], *, is_last: bool) -> ListPairs:
         players_list = list(players | downfloat)
@@ -18,7 +36,8 @@ class GroupMonradPairer(BracketPairer):
 
         for players_perm in itertools.permutations(players_list):
             pairs = [(players_perm[i], players_perm[i + 1]) for i in range(0, len(players_perm) - 1, 2)]
-            pairs = list(filter(lambda pair: self.stats.played_together[pair[0]][pair[1]] == 0, pairs))
+            pairs = list(filter(lambda pair: self.stats.played_together[pair[0]][pair[1]] == 0 and
+                                not self.forbidden.is_forbidden(*pair), pairs))
 
             if len(pairs) > len(best_pairs):
                 best_pairs = pairs
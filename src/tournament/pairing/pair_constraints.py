@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class PairConstraint:
+    # no two players from the group can be paired together in rounds from the range (0-based, all rounds if None)
+    players: frozenset[int]
+    rounds: range | None = field(default=None)
+
+    def is_active(self, round_no: int) -> bool:
+        return self.rounds is None or round_no in self.rounds
+
+
+class ForbiddenPairsIndex:
+    def __init__(self, players_count: int):
+        self.players_count = players_count
+        self._masks: list[int] = [0 for _ in range(players_count)]
+
+    def __bool__(self):
+        return any(self._masks)
+
+    def add_group(self, players: Iterable[int]):
+        players = [player for player in players if 0 <= player < self.players_count]
+        group_mask = 0
+
+        for player in players:
+            group_mask |= 1 << player
+
+        for player in players:
+            self._masks[player] |= group_mask & ~(1 << player)
+
+    def is_forbidden(self, player_a: int, player_b: int) -> bool:
+        return (self._masks[player_a] >> player_b) & 1 == 1
+
+    def get_forbidden(self, player: int) -> set[int]:
+        mask = self._masks[player]
+        return {other for other in range(self.players_count) if (mask >> other) & 1}
+
+
+class PairConstraints:
+    def __init__(self, constraints: Iterable[PairConstraint] = ()):
+        self._constraints: list[PairConstraint] = list(constraints)
+        self.__compiled_cache: dict[tuple[int, int], ForbiddenPairsIndex] = {}
+
+    def __len__(self):
+        return len(self._constraints)
+
+    @property
+    def constraints(self) -> tuple[PairConstraint, ...]:
+        return tuple(self._constraints)
+
+    def add_group(self, players: Iterable[int], rounds: range | None = None):
+        self.add(PairConstraint(frozenset(players), rounds))
+
+    def forbid_pair(self, player_a: int, player_b: int, rounds: range | None = None):
+        if player_a == player_b:
+            raise ValueError(f'Cannot forbid player {player_a} to play with himself')
+
+        self.add(PairConstraint(frozenset((player_a, player_b)), rounds))
+
+    def add(self, constraint: PairConstraint):
+        self._constraints.append(constraint)
+        self.__compiled_cache.clear()
+
+    def compile(self, players_count: int, round_no: int) -> ForbiddenPairsIndex:
+        key = players_count, round_no
+
+        if key not in self.__compiled_cache:
+            index = ForbiddenPairsIndex(players_count)
+
+            for constraint in self._constraints:
+                if constraint.is_active(round_no):
+                    index.add_group(constraint.players)
+
+            self.__compiled_cache[key] = index
+
+        return self.__compiled_cache[key]
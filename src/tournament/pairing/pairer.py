@@ -1,6 +1,8 @@
 from abc import abstractmethod, ABC
 
+from src.tournament.pairing.pair_constraints import PairConstraints, ForbiddenPairsIndex
 from src.tournament.round_stats import RoundStats
+from src.tournament.score_group_index import ScoreGroupIndex
 from src.tournament.round import Pairs
 from src.tournament.scoring.scorer import Score
 
@@ -11,11 +13,19 @@ class Pairer(ABC):
     players: tuple[int, ...]
     stats: RoundStats
     scores: tuple[Score, ...]
+    forbidden: ForbiddenPairsIndex
+    score_groups: ScoreGroupIndex | None
 
-    def pair(self, enabled_players: tuple[int, ...], stats: RoundStats, scores: tuple[Score, ...]) -> Pairs:
+    def __init__(self, constraints: PairConstraints | None = None):
+        self.constraints = constraints if constraints is not None else PairConstraints()
+
+    def pair(self, enabled_players: tuple[int, ...], stats: RoundStats, scores: tuple[Score, ...],
+             score_groups: ScoreGroupIndex | None = None) -> Pairs:
         self.players = enabled_players
         self.stats = stats
         self.scores = scores
+        self.score_groups = score_groups
+        self.forbidden = self.constraints.compile(stats.players_count, stats.round_count)
 
         return self._pair()
 
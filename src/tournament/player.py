@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from typing import Iterable
 
 
 @dataclass(frozen=True, order=False)
@@ -7,6 +8,7 @@ class Player:
     rating: float = field(default=1000)
 
     hash_id: int = field(default=0, kw_only=True)
+    federation_id: int = field(default=0, kw_only=True, compare=False)  # FIDE or national id, not an identity
 
     def __post_init__(self):
         object.__setattr__(self, 'name', ' '.join(self.name.split()).title())
@@ -25,3 +27,15 @@ class Player:
         other_name_rev = ' '.join(other.name.split()[::-1])
 
         return name_rev < other_name_rev
+
+
+def player_sort_key(player: Player) -> tuple:
+    """Key giving the order of Player.__lt__, sorting long lists with it computes each reversed name only once"""
+
+    return ' '.join(player.name.split()[::-1]), player.rating
+
+
+def players_fingerprint(players: Iterable[Player]) -> int:
+    """Cheap hash of the content of a player list, equal fingerprints mean the same players in the same order"""
+
+    return hash(tuple((player.name, player.rating, player.hash_id, player.federation_id) for player in players))
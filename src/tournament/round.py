@@ -33,6 +33,16 @@ class Round:
 
         self.__test_pairing_and_make_pause()
 
+    @classmethod
+    def from_results(cls, no_players: int, pairs: Pairs, results: list[GameResult | None]) -> 'Round':
+        round_ = cls(no_players, pairs)
+
+        if len(results) != len(pairs):
+            raise ValueError(f'Round has {len(pairs)} tables but {len(results)} results')
+
+        round_.results = list(results)
+        return round_
+
     def __test_pairing_and_make_pause(self):
         players: set[int] = {player_id for pair in self.pairs for player_id in pair}
 
@@ -1,7 +1,9 @@
 import copy
+import hashlib
+import json
 import math
 from dataclasses import dataclass
-from typing import Self
+from typing import Iterable, Self
 
 from src.tournament.elo_algorithm import elo_rating_change
 from src.tournament.round import Round
@@ -9,6 +11,24 @@ from src.tournament.round import Round
 ELO_K_VALUE = 32
 PAUSE_SCORE = 1
 
+# Bump when the way RoundStats are calculated changes, so that persisted stats are not adopted anymore
+STATS_VERSION = 1
+
+
+def rounds_checksum(ratings: tuple[float, ...], elo_k_value: float, rounds: Iterable[Round]) -> str:
+    """Identifies everything RoundStats are calculated from"""
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([STATS_VERSION, ratings, elo_k_value]).encode())
+
+    for round_ in rounds:
+        digest.update(json.dumps([
+            [player for pair in round_.pairs for player in pair],
+            [result.name if result is not None else None for result in round_.results],
+        ]).encode())
+
+    return digest.hexdigest()
+
 
 @dataclass(init=False)
 class RoundStats:
@@ -50,7 +70,19 @@ class RoundStats:
         self.recent_rating_changes = empty_array.copy()
 
     def deepcopy(self) -> Self:
-        return copy.deepcopy(self)
+        copied = copy.copy(self)
+
+        copied.ratings = self.ratings.copy()
+        copied.played_together = [row.copy() for row in self.played_together]
+        copied.color_balance = self.color_balance.copy()
+        copied.paused = self.paused.copy()
+        copied.color_repetition = self.color_repetition.copy()
+        copied.wins = [row.copy() for row in self.wins]
+        copied.draws = [row.copy() for row in self.draws]
+        copied.losses = [row.copy() for row in self.losses]
+        copied.recent_rating_changes = self.recent_rating_changes.copy()
+
+        return copied
 
     def add_round(self, round_: Round):
         if self.players_count != round_.no_players:
@@ -0,0 +1,65 @@
+from src.tournament.round import GameResult, Round
+
+type ScoreGroup = tuple[float, set[int]]
+
+
+class ScoreGroupIndex:
+    def __init__(self, players_count: int):
+        self.players_count = players_count
+        self._scores: list[float] = [0 for _ in range(players_count)]
+        self._groups: dict[float, set[int]] = {0: set(range(players_count))} if players_count > 0 else {}
+
+    def get_score(self, player: int) -> float:
+        return self._scores[player]
+
+    @property
+    def scores(self) -> tuple[float, ...]:
+        return tuple(self._scores)
+
+    def add_points(self, player: int, points: float):
+        if points == 0:
+            return
+
+        old_score = self._scores[player]
+        new_score = old_score + points
+
+        group = self._groups[old_score]
+        group.discard(player)
+
+        if len(group) == 0:
+            del self._groups[old_score]
+
+        self._groups.setdefault(new_score, set()).add(player)
+        self._scores[player] = new_score
+
+    def change_result(self, pair: tuple[int, int], old_result: GameResult | None, new_result: GameResult | None):
+        player_a, player_b = pair
+
+        if old_result is not None:
+            self.add_points(player_a, -old_result.points_a)
+            self.add_points(player_b, -old_result.points_b)
+
+        if new_result is not None:
+            self.add_points(player_a, new_result.points_a)
+            self.add_points(player_b, new_result.points_b)
+
+    def add_round(self, round_: Round, pause_points: float):
+        for pair, result in zip(round_.pairs, round_.results):
+            self.change_result(pair, None, result)
+
+        for player in round_.pause:
+            self.add_points(player, pause_points)
+
+    def remove_round(self, round_: Round, pause_points: float):
+        for pair, result in zip(round_.pairs, round_.results):
+            self.change_result(pair, result, None)
+
+        for player in round_.pause:
+            self.add_points(player, -pause_points)
+
+    def get_groups(self) -> list[ScoreGroup]:
+        """Returns copies of score groups ordered from the highest score"""
+        return [(score, self._groups[score].copy()) for score in sorted(self._groups, reverse=True)]
+
+    def get_sorted_groups(self) -> list[tuple[float, list[int]]]:
+        return [(score, sorted(players)) for score, players in self.get_groups()]
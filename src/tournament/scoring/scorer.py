@@ -9,6 +9,8 @@ type Scoreboard = tuple[tuple[int, int, Score], ...]
 
 
 class Scorer(ABC):
+    pause_points: float = 1
+
     @abstractmethod
     def calculate_scores(self, no_players: int, rounds: list[Round], stats: RoundStats) -> tuple[Score, ...]: ...
 
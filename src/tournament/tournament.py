@@ -1,10 +1,13 @@
 import copy
 from dataclasses import dataclass
+from typing import Iterator
 
+from src.tournament.pairing.compliance_checker import ComplianceChecker, PairingRuleViolationError
 from src.tournament.pairing.pairer import Pairer
 from src.tournament.player import Player
 from src.tournament.round import Round, GameResult, Pairs
-from src.tournament.round_stats import RoundStats
+from src.tournament.round_stats import RoundStats, rounds_checksum
+from src.tournament.score_group_index import ScoreGroupIndex, ScoreGroup
 from src.tournament.scoring.points_scorer import PointsScorer
 from src.tournament.scoring.scorer import Scorer, Score
 
@@ -13,6 +16,9 @@ class RoundNotCompletedError(Exception):
     pass
 
 
+PAIRING_GUARD = ComplianceChecker()
+
+
 @dataclass
 class TournamentSettings:
     elo_k_value: float = 32
@@ -25,7 +31,29 @@ class Tournament:
         self._rounds: list[Round] = []
         self.settings = settings if settings is not None else TournamentSettings()
 
-        self.__stats_by_round_cache: list[RoundStats] = []
+        self.__stats_by_round_cache: list[RoundStats | None] = []
+        self.__score_groups = ScoreGroupIndex(len(players))
+        self.__pause_points_by_round: list[float] = []
+
+    @classmethod
+    def from_rounds(cls, players: tuple[Player, ...], settings: TournamentSettings | None,
+                    rounds: list[Round]) -> 'Tournament':
+        """Builds the tournament from stored rounds at once, without replaying next_round and set_result"""
+
+        tournament = cls(players, settings)
+
+        for round_no, round_ in enumerate(rounds):
+            if round_.no_players != len(players):
+                raise ValueError(f'Round {round_no} is for {round_.no_players} players, not {len(players)}')
+
+            if round_no < len(rounds) - 1 and not round_.is_completed():
+                raise RoundNotCompletedError
+
+            tournament._rounds.append(round_)
+            tournament.__pause_points_by_round.append(tournament.settings.scorer.pause_points)
+            tournament.__score_groups.add_round(round_, tournament.__pause_points_by_round[-1])
+
+        return tournament
 
     def __str__(self):
         return f'<Tournament with {len(self._players)} players and {len(self._rounds)} rounds>'
@@ -43,22 +71,51 @@ class Tournament:
     def get_round(self, round_no: int = -1) -> Round:
         return copy.deepcopy(self._rounds[round_no])
 
+    def iter_rounds(self) -> Iterator[Round]:
+        """Yields the rounds without copying them, they must not be modified"""
+        return iter(self._rounds)
+
     def get_stats(self, round_no: int = -1) -> RoundStats:
         if len(self._rounds) == 0:
             return self.__create_empty_stats_object()
 
-        self.__calculate_stats_up_to_round(round_no % len(self._rounds))
+        round_no %= len(self._rounds)
+        self.__calculate_stats_up_to_round(round_no)
         return self.__stats_by_round_cache[round_no]
 
     def __calculate_stats_up_to_round(self, max_round: int):
-        stats, next_round = self.__create_empty_stats_object(), 0  # TODO: use data from cache
-        self.__stats_by_round_cache = []
+        """Continues from the latest cached stats before max_round, stats of every round on the way are cached"""
+
+        cache = self.__stats_by_round_cache
+        cache.extend(None for _ in range(len(self._rounds) - len(cache)))
+
+        if cache[max_round] is not None:
+            return
+
+        next_round = max_round
 
-        while next_round <= max_round and next_round < len(self._rounds):
+        while next_round > 0 and cache[next_round - 1] is None:
+            next_round -= 1
+
+        stats = cache[next_round - 1].deepcopy() if next_round > 0 else self.__create_empty_stats_object()
+
+        while next_round <= max_round:
             stats.add_round(self._rounds[next_round])
-            self.__stats_by_round_cache.append(stats.deepcopy())
+            cache[next_round] = stats.deepcopy() if next_round < max_round else stats
             next_round += 1
 
+    def get_stats_checksum(self) -> str:
+        return rounds_checksum(tuple(player.rating for player in self._players), self.settings.elo_k_value,
+                               self._rounds)
+
+    def adopt_stats(self, stats: RoundStats):
+        """Uses persisted stats of the last round instead of replaying the rounds, see get_stats_checksum()"""
+
+        if stats.round_count != len(self._rounds) or stats.players_count != len(self._players):
+            raise ValueError('Stats do not describe this tournament')
+
+        self.__stats_by_round_cache = [None for _ in range(len(self._rounds) - 1)] + [stats]
+
     def __create_empty_stats_object(self) -> RoundStats:
         ratings = tuple(player.rating for player in self._players)
         return RoundStats(len(self._players), ratings, self.settings.elo_k_value)
@@ -74,12 +131,20 @@ class Tournament:
 
         round_ = Round(len(self._players), pairs)
         self._rounds.append(round_)
-        self.__clear_stats_by_round_cache()
+
+        self.__pause_points_by_round.append(self.settings.scorer.pause_points)
+        self.__score_groups.add_round(round_, self.__pause_points_by_round[-1])
 
     def _next_round_from_pairer(self, pairer: Pairer):
         self.assert_round_completed()
 
-        pairs = pairer.pair(tuple(range(len(self._players))), self.stats, self.get_scores())
+        pairs = pairer.pair(tuple(range(len(self._players))), self.stats, self.get_scores(), self.__score_groups)
+
+        violations = PAIRING_GUARD.check(self.stats, pairs, forbidden=pairer.forbidden)
+
+        if len(violations) > 0:
+            raise PairingRuleViolationError(violations)
+
         self._next_round_from_pairs(pairs)
 
     def assert_round_completed(self):
@@ -90,22 +155,29 @@ class Tournament:
         if len(self._rounds) == 0:
             return
 
-        self._rounds.pop()
-        self.__clear_stats_by_round_cache()
+        round_ = self._rounds.pop()
+        del self.__stats_by_round_cache[len(self._rounds):]
+
+        self.__score_groups.remove_round(round_, self.__pause_points_by_round.pop())
 
     def get_round_count(self) -> int:
         return len(self._rounds)
 
     def set_result(self, table: int, result: GameResult | None):
-        self._rounds[-1].set_result(table, result)
-        self.__clear_stats_by_round_cache()
+        round_ = self._rounds[-1]
+        old_result = round_.results[table] if 0 <= table < len(round_.results) else None
+
+        round_.set_result(table, result)
+        del self.__stats_by_round_cache[len(self._rounds) - 1:]
 
-    def __clear_stats_by_round_cache(self):
-        self.__stats_by_round_cache = []
+        self.__score_groups.change_result(round_.pairs[table], old_result, result)
 
     def get_scores(self) -> tuple[Score, ...]:
         return self.settings.scorer.calculate_scores(len(self._players), self._rounds, self.stats)
 
+    def get_score_groups(self) -> list[ScoreGroup]:
+        return self.__score_groups.get_groups()
+
     def get_id_scoreboard(self) -> tuple[tuple[int, int, Score], ...]:
         scoreboard = self.settings.scorer.create_scoreboard(len(self._players), self._rounds, self.stats)
         return tuple((place, player_id, score) for place, player_id, score in scoreboard)
@@ -0,0 +1,60 @@
+import dataclasses
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData, TournamentState
+from src.tournament.knockout_tournament import KnockoutTournament
+
+
+@dataclass(frozen=True, slots=True)
+class TournamentMetadata:
+    """What listings need to know about a tournament without decoding it"""
+
+    data: TournamentData
+    players_count: int
+    round_count: int
+    state: TournamentState
+
+    @classmethod
+    def of(cls, tournament: Any) -> 'TournamentMetadata':
+        if type(tournament) is InteractiveTournament:
+            return cls(dataclasses.replace(tournament.data), len(tournament.players), tournament.round_count,
+                       tournament.state)
+
+        if type(tournament) is KnockoutTournament:
+            if tournament.is_finished():
+                state = TournamentState.FINISHED
+            elif tournament.get_decided_matches():
+                state = TournamentState.RUNNING
+            else:
+                state = TournamentState.NOT_STARTED
+
+            return cls(dataclasses.replace(tournament.data), len(tournament.players), tournament.round_count, state)
+
+        raise ValueError(f'Cannot describe tournament of type {type(tournament)}')
+
+    def to_list(self) -> list:
+        return [
+            self.data.name,
+            self.data.category,
+            _encode_time(self.data.start_timestamp),
+            _encode_time(self.data.finish_timestamp),
+            self.players_count,
+            self.round_count,
+            self.state.name,
+        ]
+
+    @classmethod
+    def from_list(cls, encoded: list) -> 'TournamentMetadata':
+        name, category, start, finish, players_count, round_count, state = encoded
+        data = TournamentData(name, category, _decode_time(start), _decode_time(finish))
+        return cls(data, players_count, round_count, TournamentState[state])
+
+
+def _encode_time(time_: datetime | None) -> float | None:
+    return time_.timestamp() if time_ is not None else None
+
+
+def _decode_time(timestamp: float | None) -> datetime | None:
+    return datetime.fromtimestamp(timestamp) if timestamp is not None else None
@@ -0,0 +1,26 @@
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+DEFAULT_DATA = {'players': [], 'tournaments': [], 'settings': {}}
+
+PLAYERS = (Player('Adam', rating=1500), Player('Barbara', rating=1400), Player('Cezary', rating=1300),
+           Player('Dorota', rating=1200))
+TABLE_RESULTS = (GameResult.WIN, GameResult.DRAW)
+
+
+def create_tournament(name: str, rounds_count: int = 0) -> InteractiveTournament:
+    """PLAYERS paired in starting order in every round, the rounds get TABLE_RESULTS"""
+
+    tournament = InteractiveTournament(TournamentData(name))
+
+    for player in PLAYERS:
+        tournament.add_player(player)
+
+    for _ in range(rounds_count):
+        tournament.next_round(((0, 1), (2, 3)))
+
+        for table, result in enumerate(TABLE_RESULTS):
+            tournament.set_result(table, result)
+
+    return tournament
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from src.database import Database
+from src.storage.autosave_writer import AutosaveWriter, snapshot_tournament
+from src.storage.sqlite_database import SqliteDatabase
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+from . import DEFAULT_DATA, create_tournament
+
+
+class CountingDatabase(Database):
+    def __init__(self, filename: str):
+        super().__init__(filename, DEFAULT_DATA)
+        self.updates = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def update_tournament(self, tournament_id: int, tournament):
+        self.release.wait()
+        self.updates += 1
+        super().update_tournament(tournament_id, tournament)
+
+
+class TestAutosaveWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = CountingDatabase(os.path.join(self.tmp_dir.name, 'db.json'))
+        self.tournament = create_tournament('first')
+        self.tournament_id = self.db.add_tournament(self.tournament)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_snapshot_is_independent(self):
+        self.tournament.next_round(((0, 1), (2, 3)))
+        build = snapshot_tournament(self.tournament)
+        self.tournament.set_result(0, GameResult.WIN)
+
+        self.assertEqual([None, None], build().get_round().results)
+
+    def test_burst_is_coalesced(self):
+        writer = AutosaveWriter(self.db, interval=10)
+        self.tournament.next_round(((0, 1), (2, 3)))
+
+        for table, result in ((0, GameResult.WIN), (1, GameResult.DRAW), (1, GameResult.LOSE)):
+            self.tournament.set_result(table, result)
+            writer.save_tournament(self.tournament_id, self.tournament)
+
+        self.assertEqual(1, writer.queue_depth)
+        writer.close()
+
+        self.assertEqual(1, self.db.updates)
+        self.assertEqual(2, writer.coalesced_count)
+        self.assertEqual(0, writer.queue_depth)
+        self.assertIsNotNone(writer.last_write_latency)
+        self.assertEqual([GameResult.WIN, GameResult.LOSE],
+                         Database(self.db._filename).read_tournaments()[self.tournament_id].get_round().results)
+
+    def test_writes_are_off_the_calling_thread(self):
+        writer = AutosaveWriter(self.db, interval=0)
+        self.db.release.clear()
+
+        writer.save_tournament(self.tournament_id, self.tournament)
+        writer.save_players([Player('Adam')])
+
+        self.assertEqual(0, self.db.updates)
+        self.db.release.set()
+        writer.flush()
+
+        self.assertEqual(1, self.db.updates)
+        self.assertEqual([Player('Adam')], self.db.read_players())
+        self.assertIsNone(writer.last_write_error)
+        writer.close()
+
+    def test_unchanged_content_is_not_written(self):
+        writer = AutosaveWriter(self.db, interval=0)
+        writer.mark_tournament_saved(self.tournament_id, self.tournament)
+
+        writer.save_tournament(self.tournament_id, self.tournament)
+        writer.flush()
+        self.assertEqual(0, self.db.updates)
+
+        self.tournament.next_round(((0, 1), (2, 3)))
+        writer.save_tournament(self.tournament_id, self.tournament)
+        writer.save_tournament(self.tournament_id, self.tournament)
+        writer.flush()
+        self.assertEqual(1, self.db.updates)
+
+        writer.save_players([Player('Adam')])
+        writer.flush()
+        writer.save_players([Player('Adam')])
+        writer.close()
+
+        self.assertEqual(3, writer.skipped_count)
+        self.assertEqual([Player('Adam')], self.db.read_players())
+
+    def test_failed_write_is_retried(self):
+        writer = AutosaveWriter(self.db, interval=0)
+        self.tournament.next_round(((0, 1), (2, 3)))
+
+        with self.assertLogs('src.storage.autosave_writer', 'ERROR'):
+            writer.save_tournament(self.tournament_id + 1, self.tournament)
+            writer.flush()
+
+        self.assertIsNotNone(writer.last_write_error)
+        self.assertIs(writer.last_write_error, writer.pop_write_error())
+        self.assertIsNone(writer.pop_write_error())
+
+        writer.save_tournament(self.tournament_id + 1, self.tournament)
+        writer.close()
+        self.assertEqual(0, writer.skipped_count)
+
+    def test_sqlite_database_is_written_from_the_writer_thread(self):
+        db = SqliteDatabase(os.path.join(self.tmp_dir.name, 'db.sqlite3'), DEFAULT_DATA)
+        tournament_id = db.add_tournament(self.tournament)
+        writer = AutosaveWriter(db, interval=0)
+
+        self.tournament.next_round(((0, 1), (2, 3)))
+        self.tournament.set_result(0, GameResult.WIN)
+        writer.save_tournament(tournament_id, self.tournament)
+        writer.close()
+
+        self.assertIsNone(writer.last_write_error)
+        self.assertEqual([GameResult.WIN, None], db.read_tournament(tournament_id).get_round().results)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+from src.database import Database
+from src.storage.backup import BackupException, BackupStore, database_files, entry_spans
+from src.storage.journaled_database import JournaledDatabase
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+from . import DEFAULT_DATA, create_tournament
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class TestBackup(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+        self.restored = os.path.join(self.tmp_dir.name, 'restored')
+        self.store = BackupStore(os.path.join(self.tmp_dir.name, 'backups'))
+        os.mkdir(self.restored)
+
+        self.data = {
+            'players': [Player('Adam'), Player('Barbara')],
+            'tournaments': [create_tournament(f'T{i}', rounds_count=1) for i in range(5)],
+            'settings': {'theme': 'dark'},
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_entry_spans(self):
+        for compact_format in (False, True):
+            Database(self.path, compact_format=compact_format).write(self.data)
+
+            with open(self.path, 'r', newline='') as f:
+                self.assertEqual(6, len(entry_spans(f)))
+
+        with open(self.path, 'w') as f:
+            f.write('[1, 2, 3]')
+
+        with open(self.path, 'r', newline='') as f:
+            self.assertEqual([], entry_spans(f))
+
+    def test_only_changed_chunks_are_stored(self):
+        for compact_format in (False, True):
+            db = Database(self.path, compact_format=compact_format)
+            db.write(self.data)
+            first = self.store.backup([self.path])
+            first_content = read_bytes(self.path)
+
+            unchanged = self.store.backup([self.path])
+            self.assertEqual((6, 0), (unchanged.chunks_count, unchanged.new_chunks_count))
+
+            self.data['tournaments'][2 + compact_format].set_result(1, GameResult.LOSE)
+            db.write(self.data)
+            changed = self.store.backup([self.path])
+            self.assertEqual((6, 1), (changed.chunks_count, changed.new_chunks_count))
+
+            self.assertEqual([self.path.replace(self.tmp_dir.name, self.restored)],
+                             self.store.restore(first.snapshot_id, self.restored))
+            self.assertEqual(first_content, read_bytes(os.path.join(self.restored, 'db.json')))
+
+            self.store.restore(changed.snapshot_id, self.restored)
+            self.assertEqual(read_bytes(self.path), read_bytes(os.path.join(self.restored, 'db.json')))
+
+        self.assertEqual(6, len(self.store.snapshots()))
+
+    def test_journaled_database(self):
+        db = JournaledDatabase(self.path, DEFAULT_DATA, compact_after=None)
+        tournament_id = db.add_tournament(create_tournament('first', rounds_count=1))
+        snapshot_id = self.store.backup(database_files(self.path)).snapshot_id
+
+        db.compact()
+        db.add_tournament(create_tournament('second'))
+        self.store.restore(snapshot_id, self.restored)
+
+        restored = JournaledDatabase(os.path.join(self.restored, 'db.json'), DEFAULT_DATA)
+        self.assertEqual(['first'], [t.data.name for t in restored.read_tournaments()])
+        self.assertEqual(1, restored.read_tournaments()[tournament_id].round_count)
+
+    def test_corrupted_chunk(self):
+        Database(self.path).write(self.data)
+        snapshot_id = self.store.backup([self.path]).snapshot_id
+        objects = os.path.join(self.store.directory, 'objects')
+
+        for directory, _, files in os.walk(objects):
+            for name in files:
+                with open(os.path.join(directory, name), 'wb') as f:
+                    f.write(b'broken')
+
+        self.assertRaises(BackupException, self.store.restore, snapshot_id, self.restored)
+        self.assertEqual([], os.listdir(self.restored))
+        self.assertRaises(BackupException, self.store.restore, 'missing', self.restored)
+
+
+if __name__ == '__main__':
+    unittest.main()
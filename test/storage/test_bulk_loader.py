@@ -0,0 +1,56 @@
+import json
+import operator
+import os
+import tempfile
+import unittest
+
+from src.database import Database
+from src.storage.bulk_loader import failed, load_tournaments, map_tournaments
+from src.tournament.knockout_tournament import KnockoutTournament
+from src.tournament.player import Player
+
+from . import create_tournament
+
+
+class TestBulkLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+
+        self.tournaments = [create_tournament(f'T{i}', rounds_count=i % 4) for i in range(10)]
+        self.tournaments.append(KnockoutTournament((Player('Adam'), Player('Barbara'))))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_results_in_order(self):
+        for compact_format in (False, True):
+            Database(self.path, compact_format=compact_format).write({'players': [], 'tournaments': self.tournaments})
+
+            results = load_tournaments(self.path, max_workers=2, batch_size=3)
+
+            self.assertEqual(list(range(11)), [result.index for result in results])
+            self.assertEqual([], failed(results))
+            self.assertEqual([t.data.name for t in self.tournaments], [result.value.data.name for result in results])
+
+    def test_errors_are_reported_per_item(self):
+        Database(self.path, compact_format=True).write({'players': [], 'tournaments': self.tournaments})
+
+        with open(self.path, 'r') as f:
+            encoded = json.load(f)
+
+        encoded['tournaments'][3][3].reverse()  # players are not in the starting order anymore
+
+        with open(self.path, 'w') as f:
+            json.dump(encoded, f)
+
+        for max_workers in (1, 2):
+            results = list(map_tournaments(self.path, operator.attrgetter('round_count'), max_workers=max_workers))
+
+            self.assertEqual([3], [result.index for result in failed(results)])
+            self.assertIn('ValueError', results[3].error)
+            self.assertEqual([0, 1, 2], [result.value for result in results[:3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.database import Database
+from src.storage.journaled_database import JournaledDatabase, TournamentShape, diff_tournament
+from src.tournament.interactive_tournament import InteractiveTournament
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+from . import DEFAULT_DATA, create_tournament
+
+
+class TestDiffTournament(unittest.TestCase):
+    def test_result_change(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        old = TournamentShape.of(tournament)
+
+        tournament.set_result(1, GameResult.DRAW)
+        events = diff_tournament(old, TournamentShape.of(tournament))
+
+        self.assertEqual({'op': 'set_result', 'table': 1, 'result': 'DRAW'}, events[0])
+        self.assertEqual(['set_result', 'set_data'], [event['op'] for event in events])
+
+    def test_no_change(self):
+        tournament = create_tournament('first')
+        self.assertEqual([], diff_tournament(TournamentShape.of(tournament), TournamentShape.of(tournament)))
+
+    def test_rounds_replaced(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        tournament.set_result(0, GameResult.WIN)
+        tournament.set_result(1, GameResult.WIN)
+        tournament.next_round(((0, 2), (1, 3)))
+        old = TournamentShape.of(tournament)
+
+        tournament.remove_last_round()
+        tournament.next_round(((0, 3), (1, 2)))
+
+        self.assertEqual(['remove_last_round', 'next_round', 'set_data'],
+                         [event['op'] for event in diff_tournament(old, TournamentShape.of(tournament))])
+
+    def test_inexpressible_change(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        other = create_tournament('first')
+        other.add_player(Player('Ewa'))
+        other.next_round(((0, 1), (2, 3)))
+
+        self.assertIsNone(diff_tournament(TournamentShape.of(tournament), TournamentShape.of(other)))
+
+
+class TestJournaledDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+        self.db = JournaledDatabase(self.path, DEFAULT_DATA)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def __reopen(self) -> JournaledDatabase:
+        return JournaledDatabase(self.path, DEFAULT_DATA)
+
+    def __journal_lines(self) -> list[dict]:
+        with open(self.db.journal_filename, 'r') as f:
+            return [json.loads(line) for line in f]
+
+    def __assert_same_tournament(self, expected: InteractiveTournament, actual: InteractiveTournament):
+        self.assertEqual(TournamentShape.of(expected), TournamentShape.of(actual))
+
+    def test_updates_are_appended(self):
+        tournament = create_tournament('first')
+        tournament_id = self.db.add_tournament(tournament)
+        snapshot = os.stat(self.path).st_mtime_ns
+
+        tournament.next_round(((0, 1), (2, 3)))
+        self.db.update_tournament(tournament_id, tournament)
+        tournament.set_result(0, GameResult.WIN)
+        self.db.update_tournament(tournament_id, tournament)
+
+        self.assertEqual(snapshot, os.stat(self.path).st_mtime_ns)
+        self.assertEqual(['put_tournament', 'next_round', 'set_data', 'set_result', 'set_data'],
+                         [event['op'] for event in self.__journal_lines()])
+        self.__assert_same_tournament(tournament, self.__reopen().read_tournaments()[tournament_id])
+
+    def test_replay(self):
+        tournament = create_tournament('first')
+        tournament_id = self.db.add_tournament(tournament)
+        self.db.update_players([Player('Adam')])
+
+        tournament.remove_player(Player('Dorota'))
+        tournament.add_player(Player('Ewa', rating=1450))
+        self.db.update_tournament(tournament_id, tournament)
+
+        for pairs in (((0, 1), (2, 3)), ((0, 2), (1, 3))):
+            tournament.next_round(pairs)
+            tournament.set_result(0, GameResult.WIN)
+            tournament.set_result(1, GameResult.DRAW)
+            self.db.update_tournament(tournament_id, tournament)
+
+        tournament.finish()
+        self.db.update_tournament(tournament_id, tournament)
+
+        red = self.__reopen().read()
+        self.assertEqual([Player('Adam')], red['players'])
+        self.__assert_same_tournament(tournament, red['tournaments'][tournament_id])
+
+    def test_torn_last_line_is_ignored(self):
+        tournament = create_tournament('first')
+        tournament_id = self.db.add_tournament(tournament)
+        tournament.next_round(((0, 1), (2, 3)))
+        self.db.update_tournament(tournament_id, tournament)
+
+        with open(self.db.journal_filename, 'a') as f:
+            f.write('{"op": "set_result", "tourn')
+
+        db = self.__reopen()
+        self.__assert_same_tournament(tournament, db.read_tournaments()[tournament_id])
+
+        tournament.set_result(1, GameResult.LOSE)
+        db.update_tournament(tournament_id, tournament)
+        self.__assert_same_tournament(tournament, self.__reopen().read_tournaments()[tournament_id])
+
+    def test_compaction(self):
+        tournament = create_tournament('first')
+        tournament_id = self.db.add_tournament(tournament)
+        tournament.next_round(((0, 1), (2, 3)))
+        self.db.update_tournament(tournament_id, tournament)
+
+        self.db.commit()
+
+        self.assertEqual([], self.__journal_lines())
+        self.__assert_same_tournament(tournament, Database(self.path).read()['tournaments'][tournament_id])
+        self.__assert_same_tournament(tournament, self.__reopen().read_tournaments()[tournament_id])
+
+    def test_background_compaction(self):
+        db = JournaledDatabase(self.path, DEFAULT_DATA, compact_after=3)
+        tournament = create_tournament('first')
+        tournament_id = db.add_tournament(tournament)
+        tournament.next_round(((0, 1), (2, 3)))
+        db.update_tournament(tournament_id, tournament)
+        db.wait_for_compaction()
+
+        tournament.set_result(0, GameResult.WIN)
+        db.update_tournament(tournament_id, tournament)
+
+        self.assertEqual(2, db.journal_length)
+        self.__assert_same_tournament(tournament, self.__reopen().read_tournaments()[tournament_id])
+
+    def test_write_replaces_snapshot(self):
+        self.db.add_tournament(create_tournament('first'))
+        self.db.write({'players': [], 'tournaments': [create_tournament('second')], 'settings': {}})
+
+        self.assertEqual([], self.__journal_lines())
+        self.assertEqual(['second'], [t.data.name for t in self.__reopen().read_tournaments()])
+
+    def test_metadata_index(self):
+        tournament = create_tournament('first')
+        self.db.add_tournament(tournament)
+        self.db.add_tournament(create_tournament('second'))
+        self.assertEqual(['first', 'second'], [m.data.name for m in self.__reopen().read_tournaments_metadata()])
+
+        self.db.commit()
+        db = self.__reopen()
+
+        self.assertEqual([4, 4], [m.players_count for m in db.read_tournaments_metadata()])
+        self.assertIsNone(getattr(db, '_data'))
+
+    def test_streaming_reads(self):
+        tournament = create_tournament('first')
+        tournament_id = self.db.add_tournament(tournament)
+        tournament.next_round(((0, 1), (2, 3)))
+        self.db.update_tournament(tournament_id, tournament)
+
+        self.assertEqual(1, self.__reopen().read_entry('tournaments', tournament_id).round_count)
+
+        self.db.commit()
+        db = self.__reopen()
+
+        self.assertEqual([1], [t.round_count for t in db.iter_tournaments()])
+        self.assertIsNone(getattr(db, '_data'))
+
+
+if __name__ == '__main__':
+    unittest.main()
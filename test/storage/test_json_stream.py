@@ -0,0 +1,60 @@
+import io
+import json
+import unittest
+
+from src.storage.json_stream import JsonStream
+
+DOCUMENT = {
+    'name': 'with "quotes" and \\\\ slashes ą',
+    'numbers': [1, -2.5, 3e10, True, False, None],
+    'nested': {'a': [[1, 2], {'b': '}]'}], 'c': {}},
+    'empty': [],
+}
+
+
+class TestJsonStream(unittest.TestCase):
+    def __streams(self, document: dict, indent: int | None = None):
+        text = json.dumps(document, indent=indent)
+
+        for chunk_size in (1, 3, 64, 1 << 16):
+            yield JsonStream(io.StringIO(text), chunk_size=chunk_size)
+
+    def test_walk(self):
+        for stream in self.__streams(DOCUMENT, indent=2):
+            values = {}
+
+            for key in stream.iter_object():
+                if key == 'numbers':
+                    values[key] = [stream.read_value() for _ in stream.iter_array()]
+                else:
+                    values[key] = stream.read_value()
+
+            self.assertEqual(DOCUMENT, values)
+
+    def test_find(self):
+        for stream in self.__streams(DOCUMENT):
+            stream.find_key('nested')
+            stream.find_key('a')
+            stream.find_index(1)
+            self.assertEqual({'b': '}]'}, stream.read_value())
+
+    def test_skip(self):
+        for stream in self.__streams(DOCUMENT):
+            stream.find_key('empty')
+            self.assertEqual([], stream.read_value())
+
+    def test_missing(self):
+        stream = JsonStream(io.StringIO(json.dumps(DOCUMENT)))
+        self.assertRaises(KeyError, stream.find_key, 'missing')
+
+        stream = JsonStream(io.StringIO('[1, 2]'))
+        self.assertRaises(IndexError, stream.find_index, 2)
+
+    def test_invalid(self):
+        for text in ('{"a": [1, 2}', '{"a" 1}', '{"a": "unterminated'):
+            stream = JsonStream(io.StringIO(text), chunk_size=4)
+            self.assertRaises(ValueError, lambda: [stream.read_value() for _ in stream.iter_object()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.database import Database
+from src.migrations import MIGRATIONS, SCHEMA_VERSION, Migration, pending_migrations
+from src.storage.journaled_database import JournaledDatabase
+from src.storage.migration_runner import MigrationException, migrate_file
+from src.tournament.player import Player
+
+from . import DEFAULT_DATA, create_tournament
+
+
+def rename_tournament(record, compact: bool):
+    if compact:
+        record[1][0] = record[1][0].upper()
+    else:
+        data = record['__data__']['__data__']['data']['__data__']
+        data['name'] = data['name'].upper()
+
+    return record
+
+
+RENAMING_MIGRATIONS = (
+    Migration(2, 'Upper case tournament names', tournament=rename_tournament),
+    *(migration for migration in MIGRATIONS if migration.version > 2),
+)
+
+
+class TestMigrationRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+        self.data = {
+            'players': [Player('Adam'), Player('Barbara')],
+            'tournaments': [create_tournament(f'Open {i}', rounds_count=1) for i in range(3)],
+            'settings': {'theme': 'dark'},
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def __write_version_1(self, compact_format: bool):
+        Database(self.path, compact_format=compact_format).write(self.data)
+
+        with open(self.path, 'r') as f:
+            encoded = json.load(f)
+
+        if compact_format:
+            encoded['version'] = 1
+        else:
+            del encoded['version']
+
+        with open(self.path, 'w') as f:
+            json.dump(encoded, f)
+
+    def test_migration_path(self):
+        self.assertEqual(list(range(2, SCHEMA_VERSION + 1)), [migration.version for migration in MIGRATIONS])
+        self.assertEqual([], pending_migrations(SCHEMA_VERSION))
+        self.assertRaises(ValueError, pending_migrations, SCHEMA_VERSION + 1)
+        self.assertRaises(ValueError, pending_migrations, 0)
+
+    def test_records_are_migrated(self):
+        for compact_format in (False, True):
+            self.__write_version_1(compact_format)
+            target = os.path.join(self.tmp_dir.name, 'migrated.json')
+            report = migrate_file(self.path, target, migrations=RENAMING_MIGRATIONS)
+
+            self.assertEqual((1, SCHEMA_VERSION, 5), (report.from_version, report.to_version, report.records))
+            self.assertEqual(os.path.getsize(self.path), report.characters)
+
+            db = Database(target)
+            self.assertEqual(['OPEN 0', 'OPEN 1', 'OPEN 2'], [t.data.name for t in db.read_tournaments()])
+            self.assertEqual(self.data['players'], db.read_players())
+            self.assertEqual({'theme': 'dark'}, db.read()['settings'])
+            self.assertEqual(self.data['tournaments'][1].get_scores(), db.read_tournaments()[1].get_scores())
+
+    def test_current_version_is_kept(self):
+        for compact_format in (False, True):
+            Database(self.path, compact_format=compact_format).write(self.data)
+            report = migrate_file(self.path)
+
+            self.assertEqual(SCHEMA_VERSION, report.from_version)
+            self.assertEqual(['Open 0', 'Open 1', 'Open 2'],
+                             [t.data.name for t in Database(self.path).read_tournaments()])
+
+    def test_old_files_are_read(self):
+        for compact_format in (False, True):
+            self.__write_version_1(compact_format)
+            db = Database(self.path)
+
+            self.assertEqual(['Open 0', 'Open 1', 'Open 2'], [t.data.name for t in db.read_tournaments()])
+            self.assertEqual(['Open 0', 'Open 1', 'Open 2'], [t.data.name for t in db.iter_tournaments()])
+            self.assertEqual('Open 1', db.read_entry('tournaments', 1).data.name)
+
+    def test_failed_migration_keeps_file(self):
+        self.__write_version_1(compact_format=True)
+
+        with open(self.path, 'r') as f:
+            content = f.read()
+
+        broken = (
+            Migration(2, 'Breaks tournaments', tournament=lambda record, compact: record[:2]),
+            *(migration for migration in MIGRATIONS if migration.version > 2),
+        )
+
+        self.assertRaises(Exception, migrate_file, self.path, migrations=broken)
+        self.assertFalse(os.path.exists(self.path + '.migrating'))
+
+        with open(self.path, 'r') as f:
+            self.assertEqual(content, f.read())
+
+    def test_journal_has_to_be_compacted(self):
+        db = JournaledDatabase(self.path, DEFAULT_DATA, compact_after=None)
+        db.add_tournament(create_tournament('first'))
+
+        self.assertRaises(MigrationException, migrate_file, self.path)
+
+        db.commit()
+        self.assertEqual(1, migrate_file(self.path).records)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from src.compact_format import is_compact
+from src.database import Database
+from src.storage.journaled_database import JournaledDatabase
+from src.storage.rating_list import (ADDED, PlayerStore, RatingListException, import_rating_list, iter_csv,
+                                     iter_rating_list, iter_xml, main)
+from src.tournament.player import Player
+
+CSV_LIST = '''ID Number;Name;Fed;Rtg
+1001;Kowalski, Adam;POL;1850
+1002;Nowak, Barbara;POL;1720
+1003;Wisniewski, Cezary;POL;
+1004;Lewandowska, Dorota;POL;2010
+'''
+
+XML_LIST = b'''<?xml version="1.0" encoding="utf-8"?>
+<playerslist>
+<player><fideid>1001</fideid><name>Kowalski, Adam</name><country>POL</country><rating>1850</rating></player>
+<player><fideid>1004</fideid><name>Lewandowska, Dorota</name><country>POL</country><rating>2010</rating></player>
+<player><fideid>1005</fideid><name>Zielinski, Edward</name><country>POL</country><rating></rating></player>
+</playerslist>
+'''
+
+
+class CountingDatabase(Database):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        super().write(data)
+
+
+class TestRatingList(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = CountingDatabase(os.path.join(self.tmp_dir.name, 'db.json'),
+                                   {'players': [], 'tournaments': [], 'settings': {}})
+        self.db.write({
+            'players': sorted([Player('Adam Kowalski', 1800), Player('Barbara Nowak', 1700, federation_id=1002),
+                               Player('Jan Kowalski', 1600), Player('Jan Kowalski', 1500, hash_id=1, federation_id=7)]),
+            'tournaments': [],
+            'settings': {},
+        })
+        self.db.writes = 0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parsing(self):
+        self.assertEqual([('Adam Kowalski', 1850, 1001), ('Barbara Nowak', 1720, 1002),
+                          ('Dorota Lewandowska', 2010, 1004)],
+                         [(p.name, p.rating, p.federation_id) for p in iter_csv(io.StringIO(CSV_LIST))])
+        self.assertEqual([('Adam Kowalski', 1850, 1001), ('Dorota Lewandowska', 2010, 1004)],
+                         [(p.name, p.rating, p.federation_id) for p in iter_xml(io.BytesIO(XML_LIST))])
+
+        path = os.path.join(self.tmp_dir.name, 'list.xml')
+
+        with open(path, 'wb') as f:
+            f.write(XML_LIST)
+
+        self.assertEqual(2, len(list(iter_rating_list(path))))
+        self.assertRaises(RatingListException, list, iter_csv(io.StringIO('id,federation\n1,POL\n')))
+        self.assertRaises(RatingListException, list, iter_csv(io.StringIO('name,rating\nAdam,strong\n')))
+
+    def test_store_indexes(self):
+        store = PlayerStore(self.db.read_players())
+
+        self.assertEqual('Barbara Nowak', store.players[store.find(Player('Someone Else', federation_id=1002))].name)
+        self.assertEqual('Adam Kowalski', store.players[store.find(Player('Adam Kowalski', federation_id=1001))].name)
+        self.assertEqual(1600, store.players[store.find(Player('Jan Kowalski'))].rating)
+        self.assertIsNone(store.find(Player('Cezary Wisniewski')))
+
+    def test_import(self):
+        report = import_rating_list(self.db, iter_csv(io.StringIO(CSV_LIST)), batch_size=2)
+
+        self.assertEqual((3, 1, 2, 0, 0), (report.rows, report.added, report.updated, report.unchanged,
+                                           report.skipped))
+        self.assertEqual(1, self.db.writes)
+
+        players = self.db.read_players()
+        self.assertEqual(sorted(players), players)
+        self.assertEqual([('Adam Kowalski', 1850, 1001), ('Jan Kowalski', 1500, 7), ('Jan Kowalski', 1600, 0),
+                          ('Dorota Lewandowska', 2010, 1004), ('Barbara Nowak', 1720, 1002)],
+                         [(p.name, p.rating, p.federation_id) for p in players])
+        self.assertEqual([0, 1, 0, 0, 0], [p.hash_id for p in players])  # identities are kept
+
+        report = import_rating_list(self.db, iter_xml(io.BytesIO(XML_LIST)), add_new=False)
+        self.assertEqual((2, 0, 0, 2, 0), (report.rows, report.added, report.updated, report.unchanged,
+                                           report.skipped))
+        self.assertEqual(1, self.db.writes)
+
+        report = import_rating_list(self.db, [Player('Cezary Wisniewski', 1500)], add_new=False)
+        self.assertEqual(1, report.skipped)
+        self.assertEqual(5, len(self.db.read_players()))
+
+    def test_namesakes_keep_distinct_identities(self):
+        store = PlayerStore(self.db.read_players())
+
+        self.assertEqual(ADDED, store.merge(Player('Barbara Nowak', 1600, federation_id=2002)))
+        self.assertEqual(1, store.players[-1].hash_id)
+        self.assertNotEqual(store.players[store.find(Player('Barbara Nowak', federation_id=1002))], store.players[-1])
+
+    def test_main_keeps_journaled_database(self):
+        db_path = os.path.join(self.tmp_dir.name, 'journaled.json')
+        list_path = os.path.join(self.tmp_dir.name, 'list.csv')
+        db = JournaledDatabase(db_path, {'players': [], 'tournaments': [], 'settings': {}}, compact_format=True)
+        db.update_players([Player('Edward Zielinski', 1500)])
+
+        with open(list_path, 'w') as f:
+            f.write(CSV_LIST)
+
+        self.assertRaises(RatingListException, main, [db_path, list_path])  # journal not compacted yet
+
+        db.close()
+        main([db_path, list_path])
+
+        with open(db_path) as f:
+            self.assertTrue(is_compact(json.load(f)))
+
+        self.assertEqual(4, len(JournaledDatabase(db_path).read_players()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import os
+import tempfile
+import unittest
+
+from src.database import Database
+from src.storage.file_lock import FileLock, LockTimeout
+from src.storage.sharded_database import LazyShardList, ShardedDatabase, WriteConflictError
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+from . import DEFAULT_DATA, create_tournament
+
+
+class TestShardedDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, 'db')
+        self.db = ShardedDatabase(self.directory, DEFAULT_DATA)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def __shard_files(self) -> list[str]:
+        return sorted(os.listdir(os.path.join(self.directory, 'tournaments')))
+
+    def test_layout_creation(self):
+        self.assertEqual({'players': [], 'settings': {}, 'tournaments': []}, {**self.db.read(), 'tournaments': []})
+        self.assertEqual({'locks', 'manifest.json', 'players.json', 'settings.json', 'tournaments'},
+                         set(os.listdir(self.directory)))
+
+    def test_read_write(self):
+        self.db.write({
+            'players': [Player('Adam'), Player('Barbara')],
+            'tournaments': [create_tournament('first'), create_tournament('second')],
+            'settings': {'volume': 5},
+        })
+
+        red = ShardedDatabase(self.directory).read()
+
+        self.assertEqual([Player('Adam'), Player('Barbara')], red['players'])
+        self.assertEqual({'volume': 5}, red['settings'])
+        self.assertIsInstance(red['tournaments'], LazyShardList)
+        self.assertEqual(['first', 'second'], [t.data.name for t in red['tournaments']])
+        self.assertEqual(['000001.json', '000002.json'], self.__shard_files())
+
+    def test_tournaments_are_loaded_lazily(self):
+        self.db.add_tournament(create_tournament('first'))
+        self.db.add_tournament(create_tournament('second'))
+
+        tournaments = ShardedDatabase(self.directory).read()['tournaments']
+
+        self.assertEqual(2, len(tournaments))
+        self.assertFalse(tournaments.is_loaded(0))
+        self.assertEqual('second', tournaments[1].data.name)
+        self.assertFalse(tournaments.is_loaded(0))
+        self.assertTrue(tournaments.is_loaded(1))
+
+    def test_only_touched_shard_is_written(self):
+        self.db.add_tournament(create_tournament('first'))
+        self.db.add_tournament(create_tournament('second'))
+        first_path = os.path.join(self.directory, 'tournaments', '000001.json')
+        first_mtime = os.stat(first_path).st_mtime_ns
+
+        db = ShardedDatabase(self.directory)
+        data = db.read()
+        data['tournaments'][1].next_round(((0, 1),))
+        data['tournaments'][1].set_result(0, GameResult.WIN)
+        db.write(data)
+
+        self.assertEqual(first_mtime, os.stat(first_path).st_mtime_ns)
+        self.assertEqual([GameResult.WIN], ShardedDatabase(self.directory).read_tournaments()[1].get_round().results)
+
+    def test_update_and_remove(self):
+        self.db.add_tournament(create_tournament('first'))
+        self.db.add_tournament(create_tournament('second'))
+        self.db.update_tournament(0, create_tournament('renamed'))
+        self.db.update_players([Player('Cezary')])
+
+        data = self.db.read()
+        del data['tournaments'][0]
+        self.db.write(data)
+
+        red = ShardedDatabase(self.directory).read()
+        self.assertEqual(['second'], [t.data.name for t in red['tournaments']])
+        self.assertEqual([Player('Cezary')], red['players'])
+        self.assertEqual(['000002.json'], self.__shard_files())
+
+    def test_metadata_without_loading_shards(self):
+        self.db.add_tournament(create_tournament('first'))
+        self.db.add_tournament(create_tournament('second'))
+
+        tournament = create_tournament('renamed')
+        tournament.next_round(((0, 1),))
+        self.db.update_tournament(0, tournament)
+
+        metadata = ShardedDatabase(self.directory).read_tournaments_metadata()
+
+        self.assertEqual(['renamed', 'second'], [m.data.name for m in metadata])
+        self.assertEqual([1, 0], [m.round_count for m in metadata])
+
+    def test_import_from_single_file(self):
+        path = os.path.join(self.tmp_dir.name, 'single.json')
+        single = Database(path, DEFAULT_DATA)
+        single.add_tournament(create_tournament('first'))
+
+        sharded = ShardedDatabase.import_from(single, os.path.join(self.tmp_dir.name, 'imported'))
+
+        self.assertEqual('first', sharded.read_tournaments()[0].data.name)
+
+
+class TestConcurrentAccess(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, 'db')
+
+        db = ShardedDatabase(self.directory, DEFAULT_DATA)
+        db.update_players([Player('Adam'), Player('Barbara')])
+
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        db.add_tournament(tournament)
+        db.add_tournament(create_tournament('second'))
+
+        self.ours = ShardedDatabase(self.directory)
+        self.theirs = ShardedDatabase(self.directory)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_different_tournaments(self):
+        our_data, their_data = self.ours.read(), self.theirs.read()
+        our_data['tournaments'][0].set_result(0, GameResult.WIN)
+        their_data['tournaments'][1].data.name = 'renamed'
+
+        self.theirs.write(their_data)
+        self.ours.write(our_data)
+
+        tournaments = ShardedDatabase(self.directory).read_tournaments()
+        self.assertEqual(GameResult.WIN, tournaments[0].get_round().results[0])
+        self.assertEqual('renamed', tournaments[1].data.name)
+
+    def test_results_of_different_tables_merge(self):
+        our_tournament, their_tournament = self.ours.read_tournaments()[0], self.theirs.read_tournaments()[0]
+        our_tournament.set_result(0, GameResult.WIN)
+        their_tournament.set_result(1, GameResult.DRAW)
+
+        self.theirs.update_tournament(0, their_tournament)
+        self.ours.update_tournament(0, our_tournament)
+
+        self.assertEqual([GameResult.WIN, GameResult.DRAW],
+                         ShardedDatabase(self.directory).read_tournaments()[0].get_round().results)
+
+        # the merge is the new base, so a later change of ours keeps the result of theirs
+        our_tournament.set_result(0, GameResult.LOSE)
+        self.ours.update_tournament(0, our_tournament)
+        self.assertEqual([GameResult.LOSE, GameResult.DRAW],
+                         ShardedDatabase(self.directory).read_tournaments()[0].get_round().results)
+
+    def test_conflicts_are_rejected(self):
+        our_tournament, their_tournament = self.ours.read_tournaments()[0], self.theirs.read_tournaments()[0]
+        our_tournament.set_result(0, GameResult.WIN)
+        their_tournament.set_result(0, GameResult.DRAW)
+
+        self.theirs.update_tournament(0, their_tournament)
+        self.assertRaises(WriteConflictError, self.ours.update_tournament, 0, our_tournament)
+
+        our_tournament, their_tournament = self.ours.read_tournaments()[0], self.theirs.read_tournaments()[0]
+        their_tournament.set_result(1, GameResult.WIN)
+        their_tournament.next_round(((0, 2), (1, 3)))
+        our_tournament.set_result(1, GameResult.DRAW)
+
+        self.theirs.update_tournament(0, their_tournament)
+        self.assertRaises(WriteConflictError, self.ours.update_tournament, 0, our_tournament)
+        self.assertEqual(2, ShardedDatabase(self.directory).read_tournaments()[0].round_count)
+
+    def test_additions_are_kept(self):
+        our_players, their_players = self.ours.read_players(), self.theirs.read_players()
+        self.ours.add_tournament(create_tournament('ours'))
+        self.theirs.add_tournament(create_tournament('theirs'))
+        self.theirs.update_players(their_players + [Player('Cezary')])
+        self.ours.update_players(our_players + [Player('Dorota')])
+
+        data = self.ours.read()
+        self.assertEqual(['first', 'second', 'ours', 'theirs'], [t.data.name for t in data['tournaments']])
+        self.assertEqual({'Adam', 'Barbara', 'Cezary', 'Dorota'}, {player.name for player in data['players']})
+        self.assertEqual(4, len(ShardedDatabase(self.directory).read_tournaments_metadata()))
+
+        del data['tournaments'][0]
+        self.theirs.add_tournament(create_tournament('later'))
+        self.ours.write(data)
+
+        self.assertEqual(['second', 'ours', 'theirs', 'later'],
+                         [t.data.name for t in ShardedDatabase(self.directory).read_tournaments()])
+
+    def test_lock_timeout(self):
+        path = os.path.join(self.tmp_dir.name, 'test.lock')
+
+        with FileLock(path):
+            self.assertRaises(LockTimeout, FileLock(path, timeout=.05).acquire)
+
+        with FileLock(path, timeout=.05):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
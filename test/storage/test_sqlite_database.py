@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from src.database import Database
+from src.storage.sqlite_database import SCHEMA, SqliteDatabase, migrate_from_json
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentState
+from src.tournament.knockout_tournament import KnockoutTournament
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+from . import DEFAULT_DATA, create_tournament
+
+
+class TestSqliteDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.sqlite3')
+        self.db = SqliteDatabase(self.path, DEFAULT_DATA)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def __reopen(self) -> SqliteDatabase:
+        self.db.close()
+        self.db = SqliteDatabase(self.path, DEFAULT_DATA)
+        return self.db
+
+    def __assert_same_tournament(self, expected: InteractiveTournament, actual: InteractiveTournament):
+        self.assertEqual(expected.data, actual.data)
+        self.assertEqual(expected.players, actual.players)
+        self.assertEqual(expected.round_count, actual.round_count)
+        self.assertEqual(expected.is_finished(), actual.is_finished())
+
+        for round_no in range(expected.round_count):
+            self.assertEqual(expected.get_round(round_no).pairs, actual.get_round(round_no).pairs)
+            self.assertEqual(expected.get_round(round_no).results, actual.get_round(round_no).results)
+
+    def test_default_data(self):
+        self.assertEqual(DEFAULT_DATA, self.db.read())
+
+    def test_read_write(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        tournament.set_result(0, GameResult.WIN)
+        knockout = KnockoutTournament([Player('Adam'), Player('Barbara')])
+
+        self.db.write({
+            'players': [Player('Adam', 1500, hash_id=3, federation_id=1001)],
+            'tournaments': [tournament, knockout],
+            'settings': {'volume': 5},
+        })
+
+        red = self.__reopen().read()
+
+        self.assertEqual(['players', 'tournaments', 'settings'], list(red.keys()))
+        self.assertEqual([Player('Adam', hash_id=3)], red['players'])
+        self.assertEqual(1001, red['players'][0].federation_id)
+        self.assertEqual({'volume': 5}, red['settings'])
+        self.__assert_same_tournament(tournament, red['tournaments'][0])
+        self.assertEqual(knockout.players, red['tournaments'][1].players)
+
+    def test_update_tournament(self):
+        tournament = create_tournament('first')
+        tournament_id = self.db.add_tournament(tournament)
+
+        tournament.next_round(((0, 1), (2, 3)))
+        tournament.set_result(1, GameResult.DRAW)
+        self.db.update_tournament(tournament_id, tournament)
+
+        tournament.set_result(0, GameResult.WIN)
+        tournament.set_result(1, GameResult.LOSE)
+        tournament.next_round(((0, 2), (1, 3)))
+        self.db.update_tournament(tournament_id, tournament)
+
+        tournament.remove_last_round()
+        tournament.remove_last_round()
+        tournament.next_round(((0, 3), (1, 2)))
+        tournament.data.name = 'renamed'
+        self.db.update_tournament(tournament_id, tournament)
+
+        self.__assert_same_tournament(tournament, self.__reopen().read_tournaments()[tournament_id])
+
+    def test_set_result(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        tournament_id = self.db.add_tournament(tournament)
+
+        self.db.set_result(tournament_id, 0, 1, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME)
+
+        self.assertEqual([None, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME],
+                         self.__reopen().read_tournaments()[tournament_id].get_round().results)
+        self.assertRaises(IndexError, self.db.set_result, tournament_id, 1, 0, GameResult.WIN)
+
+    def test_queries(self):
+        first = create_tournament('first')
+        first.next_round(((0, 1), (2, 3)))
+        first.set_result(0, GameResult.WIN)
+        first.data.start_timestamp = datetime(2024, 12, 31, 20)
+        second = create_tournament('second')
+        second.next_round(((1, 2), (3, 0)))
+        second.data.start_timestamp = datetime(2025, 1, 1, 10)
+        self.db.add_tournament(first)
+        self.db.add_tournament(second)
+
+        self.assertEqual([0], self.db.find_tournaments_in_year(2024))
+        self.assertEqual([1], self.db.find_tournaments_in_year(2025))
+        self.assertEqual([0, 1], self.db.find_tournaments(start=datetime(2024, 1, 1)))
+
+        self.assertEqual([
+            (0, 0, 0, Player('Adam'), Player('Barbara'), GameResult.WIN),
+            (1, 0, 1, Player('Dorota'), Player('Adam'), None),
+        ], self.db.find_player_games(Player('Adam')))
+
+    def test_metadata(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        self.db.add_tournament(tournament)
+        self.db.add_tournament(KnockoutTournament([Player('Adam'), Player('Barbara')]))
+
+        metadata = self.db.read_tournaments_metadata()
+
+        self.assertEqual([('first', 4, 1, TournamentState.RUNNING), ('Tournament', 2, 1, TournamentState.NOT_STARTED)],
+                         [(m.data.name, m.players_count, m.round_count, m.state) for m in metadata])
+        self.assertEqual(tournament.data.start_timestamp, metadata[0].data.start_timestamp)
+
+    def test_migrate_from_json(self):
+        tournament = create_tournament('first')
+        tournament.next_round(((0, 1), (2, 3)))
+        tournament.set_result(0, GameResult.DRAW)
+
+        source = Database(os.path.join(self.tmp_dir.name, 'db.json'), DEFAULT_DATA)
+        source.write({'players': [Player('Adam')], 'tournaments': [tournament], 'settings': {}})
+
+        migrated = migrate_from_json(source, os.path.join(self.tmp_dir.name, 'migrated.sqlite3'))
+
+        self.assertEqual([Player('Adam')], migrated.read_players())
+        self.__assert_same_tournament(tournament, migrated.read_tournaments()[0])
+        migrated.close()
+
+    def test_federation_id_column_is_added(self):
+        self.path = os.path.join(self.tmp_dir.name, 'old.sqlite3')
+
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript(SCHEMA.replace(',\n    federation_id INTEGER NOT NULL DEFAULT 0', ''))
+            connection.execute("INSERT INTO players VALUES (0, 'Adam', 1500, 0)")
+            connection.execute("INSERT INTO entries VALUES ('__keys__', '[\"players\", \"tournaments\"]')")
+
+        connection.close()
+        self.db = SqliteDatabase(self.path, DEFAULT_DATA)
+
+        self.assertEqual([(Player('Adam'), 0)], [(p, p.federation_id) for p in self.db.read_players()])
+        self.db.update_players([Player('Adam', federation_id=1001)])
+        self.assertEqual(1001, self.__reopen().read_players()[0].federation_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+
+from src.storage.tournament_archive import FOOTER, ArchiveException, TournamentArchive, append_to_archive
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.pairing.dutch_pairer import DutchPairer
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+from src.tournament.scoring.buchholz_scorer import BuchholzScorer
+from src.tournament.tournament import TournamentSettings
+
+
+def create_finished_tournament(name: str, players_count: int = 7, rounds_count: int = 3) -> InteractiveTournament:
+    tournament = InteractiveTournament(TournamentData(name, 'open'))
+    tournament.set_settings(TournamentSettings(elo_k_value=20, scorer=BuchholzScorer()))
+
+    for i in range(players_count):
+        tournament.add_player(Player(f'Player {i}', rating=1000 + 100 * i, hash_id=i % 3, federation_id=i))
+
+    for _ in range(rounds_count):
+        tournament.next_round(DutchPairer())
+
+        for table in range(len(tournament.get_round().pairs)):
+            tournament.set_result(table, (GameResult.WIN, GameResult.DRAW, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME)[
+                table % 3])
+
+    tournament.finish()
+    return tournament
+
+
+class TestTournamentArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'archive.bin')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_summary_and_buffers(self):
+        tournament = create_finished_tournament('first')
+        append_to_archive(self.path, [tournament])
+
+        with TournamentArchive(self.path) as archive:
+            summary = archive.get_summary(0)
+
+            self.assertEqual(1, len(archive))
+            self.assertEqual(('first', 'open', 7, 3, 9), (summary.name, summary.category, summary.players_count,
+                                                          summary.rounds_count, summary.boards_count))
+            self.assertEqual(tournament.data.finish_timestamp, summary.finish_timestamp)
+            self.assertEqual([3, 3, 3], list(archive.get_boards_per_round(0)))
+            self.assertEqual([x for pair in tournament.get_round(0).pairs for x in pair],
+                             list(archive.get_pairs(0))[:6])
+            self.assertEqual(tournament.get_round(2).results, archive.get_results(0)[6:])
+            self.assertEqual([(p.name, p.rating, p.hash_id, p.federation_id) for p in tournament.players],
+                             [(p.name, p.rating, p.hash_id, p.federation_id) for p in archive.get_players(0)])
+
+    def test_load(self):
+        tournament = create_finished_tournament('first')
+        append_to_archive(self.path, [tournament])
+
+        with TournamentArchive(self.path) as archive:
+            loaded = archive.load(0)
+
+        self.assertTrue(loaded.is_finished())
+        self.assertEqual(tournament.data, loaded.data)
+        self.assertEqual(tournament.get_scores(), loaded.get_scores())
+        self.assertIsInstance(loaded.get_settings().scorer, BuchholzScorer)
+        self.assertEqual(20, loaded.get_settings().elo_k_value)
+
+    def test_append(self):
+        self.assertEqual(1, append_to_archive(self.path, [create_finished_tournament('first')]))
+        self.assertEqual(3, append_to_archive(self.path, [create_finished_tournament('second', 4, 2),
+                                                          create_finished_tournament('third', 10, 4)]))
+
+        with TournamentArchive(self.path) as archive:
+            self.assertEqual(['first', 'second', 'third'], [s.name for s in archive.iter_summaries()])
+            self.assertEqual(4, archive.load(2).round_count)
+
+            with open(self.path, 'rb') as f:
+                content = f.read()
+
+            append_to_archive(self.path, [create_finished_tournament('fourth')])
+            self.assertEqual(3, len(archive))  # the mapped bytes are not changed
+            self.assertEqual('third', archive.get_summary(2).name)
+
+        with TournamentArchive(self.path) as archive:
+            self.assertEqual(4, len(archive.index))
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(content, f.read(len(content)))
+
+    def test_interrupted_append(self):
+        append_to_archive(self.path, [create_finished_tournament('first')])
+        size = os.path.getsize(self.path)
+
+        with open(self.path, 'ab') as f:
+            f.write(b'torn record')
+
+        with TournamentArchive(self.path) as archive:
+            self.assertEqual((1, size), (len(archive), archive.end))
+
+        self.assertEqual(2, append_to_archive(self.path, [create_finished_tournament('second')]))
+
+        with TournamentArchive(self.path) as archive:
+            self.assertEqual(['first', 'second'], [s.name for s in archive.iter_summaries()])
+
+    def test_only_finished_tournaments(self):
+        tournament = InteractiveTournament()
+        tournament.add_player(Player('Adam'))
+
+        self.assertRaises(ArchiveException, append_to_archive, self.path, [tournament])
+
+    def test_not_an_archive(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'{"players": [], "tournaments": []}')
+
+        self.assertRaises(ArchiveException, TournamentArchive, self.path)
+
+    def test_empty_and_truncated_archives(self):
+        open(self.path, 'wb').close()
+        self.assertRaises(ArchiveException, TournamentArchive, self.path)
+
+        append_to_archive(self.path, [create_finished_tournament('first')])
+
+        with open(self.path, 'rb') as f:
+            content = f.read()
+
+        for end in (FOOTER.size - 1, len(content) - FOOTER.size - 1):
+            with open(self.path, 'wb') as f:
+                f.write(content[:end] + content[-FOOTER.size:])
+
+            self.assertRaises(ArchiveException, TournamentArchive, self.path)
+
+    def test_unsupported_version(self):
+        append_to_archive(self.path, [create_finished_tournament('first')])
+
+        with open(self.path, 'r+b') as f:
+            f.seek(-FOOTER.size, os.SEEK_END)
+            index_offset, count, magic, _ = FOOTER.unpack(f.read(FOOTER.size))
+            f.seek(-FOOTER.size, os.SEEK_END)
+            f.write(FOOTER.pack(index_offset, count, magic, 0))
+
+        self.assertRaises(ArchiveException, TournamentArchive, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
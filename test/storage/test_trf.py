@@ -0,0 +1,131 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from src.compact_format import is_compact
+from src.storage.file_lock import LockTimeout
+from src.storage.journaled_database import JournaledDatabase
+from src.storage.trf import TrfException, iter_trf, main, read_trf, write_trf
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+# ranks 1-5 are not in the starting order of the program (Dorota has the highest rating)
+REPORT = '''012 Spring Open
+042 2024/03/02
+052 2024/03/03
+092 Swiss
+XXR 2
+001    1      Kowalski, Adam                    1800        12345678             1.5    2     3 w 1     2 b =
+001    2      Nowak, Barbara                    1700                             1.5    3     4 w +     1 w =
+001    3      Wisniewski, Cezary                1600                             0.0    5     1 b 0     5 w 0
+001    4      Lewandowska, Dorota               1900                             1.0    4     2 b -  0000 - U
+001    5      Zielinski, Edward                                                  2.0    1  0000 - U     3 b 1
+'''
+
+
+class TestTrf(unittest.TestCase):
+    def test_read(self):
+        tournament = read_trf(io.StringIO(REPORT))
+
+        self.assertEqual(('Spring Open', 'Swiss', datetime(2024, 3, 2), None),
+                         (tournament.data.name, tournament.data.category, tournament.data.start_timestamp,
+                          tournament.data.finish_timestamp))
+        self.assertEqual(['Dorota Lewandowska', 'Adam Kowalski', 'Barbara Nowak', 'Cezary Wisniewski',
+                          'Edward Zielinski'], [player.name for player in tournament.players])
+        self.assertEqual([1900, 1800, 1700, 1600, 1000], [player.rating for player in tournament.players])
+        self.assertEqual((12345678, 0), (tournament.players[1].federation_id, tournament.players[1].hash_id))
+
+        first, second = tournament.iter_rounds()
+        self.assertEqual(((1, 3), (2, 0)), first.pairs)
+        self.assertEqual([GameResult.WIN, GameResult.PLAYER_B_NOT_SHOWED_IN_TIME], first.results)
+        self.assertEqual({4}, first.pause)
+        self.assertEqual(((2, 1), (3, 4)), second.pairs)
+        self.assertEqual([GameResult.DRAW, GameResult.LOSE], second.results)
+        self.assertEqual({0}, second.pause)
+        self.assertEqual([1, 1.5, 1.5, 0, 2], [score[0] for score in tournament.get_scores()])
+
+        finished = read_trf(io.StringIO(REPORT), finished=True)
+        self.assertTrue(finished.is_finished())
+        self.assertEqual(datetime(2024, 3, 3), finished.data.finish_timestamp)
+
+    def test_round_trip(self):
+        tournament = InteractiveTournament(TournamentData('Club Championship', 'Blitz', datetime(2024, 5, 1)))
+
+        for i, name in enumerate(['Adam Kowalski', 'Barbara Nowak', 'Cezary Wisniewski', 'Dorota Lewandowska',
+                                  'Edward Zielinski']):
+            tournament.add_player(Player(name, 1500 + 50 * i, federation_id=i))
+
+        tournament.next_round(((0, 1), (2, 3)))
+        tournament.set_result(0, GameResult.WIN)
+        tournament.set_result(1, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME)
+        tournament.next_round(((1, 4), (3, 0)))
+        tournament.set_result(0, GameResult.DRAW)
+
+        out = io.StringIO()
+        write_trf(tournament, out)
+        red = read_trf(io.StringIO(out.getvalue()))
+
+        self.assertEqual(list(iter_trf(tournament)), out.getvalue().splitlines())
+        self.assertEqual((tournament.data.name, tournament.data.category, tournament.data.start_timestamp.date()),
+                         (red.data.name, red.data.category, red.data.start_timestamp.date()))
+        self.assertEqual([(p.name, p.rating, p.hash_id, p.federation_id) for p in tournament.players],
+                         [(p.name, p.rating, p.hash_id, p.federation_id) for p in red.players])
+        self.assertEqual([(r.pairs, r.results) for r in tournament.iter_rounds()],
+                         [(r.pairs, r.results) for r in red.iter_rounds()])
+        self.assertEqual(tournament.get_scores(), red.get_scores())
+
+    def test_namesakes(self):
+        lines = [
+            '001    1      Kowalski, Jan                     1800',
+            '001    2      Kowalski, Jan                     1700',
+        ]
+        tournament = read_trf(lines)
+
+        self.assertEqual(2, len(set(tournament.players)))
+        self.assertEqual(0, tournament.round_count)
+
+    def test_invalid_reports(self):
+        broken_pairing = REPORT.replace('0000 - U     3 b 1', '0000 - U     2 b 1')
+        self.assertRaises(TrfException, read_trf, io.StringIO(broken_pairing))
+
+        unknown_result = REPORT.replace('3 w 1     2 b =', '3 w X     2 b =')
+        self.assertRaises(TrfException, read_trf, io.StringIO(unknown_result))
+
+        self.assertRaises(TrfException, read_trf, ['001  abc      Kowalski, Adam'])
+        self.assertRaises(TrfException, read_trf, io.StringIO(REPORT.replace('1     2 b =', '1     2 b  ')),
+                          finished=True)
+
+    def test_main_keeps_journaled_database(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path, trf_path = os.path.join(tmp_dir, 'db.json'), os.path.join(tmp_dir, 'report.trf')
+            db = JournaledDatabase(db_path, {'players': [], 'tournaments': [], 'settings': {}}, compact_format=True)
+            db.add_tournament(read_trf(io.StringIO(REPORT)))
+
+            with open(trf_path, 'w') as f:
+                f.write(REPORT)
+
+            self.assertRaises(TrfException, main, ['import', trf_path, db_path])  # journal not compacted yet
+
+            db.lock_exclusively()
+            self.assertRaises(LockTimeout, main, ['import', trf_path, db_path])  # the program has it open
+
+            db.close()
+            main(['import', trf_path, db_path])
+
+            with open(db_path) as f:
+                self.assertTrue(is_compact(json.load(f)))
+
+            self.assertEqual(2, len(JournaledDatabase(db_path).read_tournaments()))
+
+            main(['export', db_path, '1', trf_path])
+
+            with open(trf_path) as f:
+                self.assertEqual(list(iter_trf(read_trf(io.StringIO(REPORT)))), f.read().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
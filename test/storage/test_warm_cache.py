@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from src.database import CachedDatabase, Database
+from src.storage.journaled_database import JournaledDatabase
+from src.storage.warm_cache import WarmCache
+from src.tournament.round import GameResult
+
+from . import DEFAULT_DATA, create_tournament
+
+
+class NotDecodingCachedDatabase(CachedDatabase):
+    def _decode_file(self, encoded):
+        raise AssertionError('Database should be loaded from the warm cache')
+
+
+class NotDecodingJournaledDatabase(JournaledDatabase):
+    def _decode_file(self, encoded):
+        raise AssertionError('Database should be loaded from the warm cache')
+
+
+class TestWarmCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache_follows_source(self):
+        with open(self.path, 'w') as f:
+            f.write('{"a": 1}')
+
+        cache = WarmCache(self.path)
+        self.assertIsNone(cache.load())
+
+        cache.store({'a': 1})
+        cache.wait()
+        self.assertEqual({'a': 1}, cache.load())
+
+        stat = os.stat(self.path)
+
+        with open(self.path, 'w') as f:
+            f.write('{"a": 2}')
+
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIsNone(cache.load())
+
+    def test_corrupted_cache_is_ignored(self):
+        with open(self.path, 'w') as f:
+            f.write('{}')
+
+        with open(WarmCache(self.path).filename, 'wb') as f:
+            f.write(b'not a pickle')
+
+        with self.assertLogs('src.storage.warm_cache', 'WARNING'):
+            self.assertIsNone(WarmCache(self.path).load())
+
+    def test_cached_database(self):
+        Database(self.path, compact_format=True).write({**DEFAULT_DATA, 'tournaments': [create_tournament('first')]})
+
+        db = CachedDatabase(self.path, flush_delay=None, warm_cache=True)
+        db.add_tournament(create_tournament('second'))
+        db.close()
+
+        warm = NotDecodingCachedDatabase(self.path, flush_delay=None, warm_cache=True)
+        self.assertEqual(['first', 'second'], [t.data.name for t in warm.read_tournaments()])
+
+    def test_rebuilds_are_coalesced(self):
+        Database(self.path).write(DEFAULT_DATA)
+        db = CachedDatabase(self.path, flush_delay=None, warm_cache=True)
+        cache = getattr(db, '_warm_cache')
+        cache.idle_delay = None
+
+        for name in ['first', 'second']:
+            db.add_tournament(create_tournament(name))
+            db.commit()
+
+        self.assertFalse(os.path.exists(cache.filename))
+
+        db.add_tournament(create_tournament('not committed'))
+        cache.flush()
+        self.assertEqual(['first', 'second'], [t.data.name for t in cache.load()['tournaments']])  # only saved state
+
+        db.close()
+        warm = NotDecodingCachedDatabase(self.path, flush_delay=None, warm_cache=True)
+        self.assertEqual(['first', 'second', 'not committed'], [t.data.name for t in warm.read_tournaments()])
+
+    def test_journaled_database_replays_journal_over_cache(self):
+        db = JournaledDatabase(self.path, DEFAULT_DATA, warm_cache=True)
+        tournament = create_tournament('first')
+        tournament_id = db.add_tournament(tournament)
+        db.close()
+
+        tournament.next_round(((0, 1),))
+        tournament.set_result(0, GameResult.WIN)
+        db.update_tournament(tournament_id, tournament)
+
+        warm = NotDecodingJournaledDatabase(self.path, DEFAULT_DATA, warm_cache=True)
+        tournament = warm.read_tournaments()[tournament_id]
+
+        self.assertEqual(1, tournament.round_count)
+        self.assertEqual([GameResult.WIN], tournament.get_round().results)
+
+    def test_journaled_database_caches_saved_state_only(self):
+        db = JournaledDatabase(self.path, DEFAULT_DATA, warm_cache=True)
+        db.add_tournament(create_tournament('first'))
+        db.close()
+        os.remove(getattr(db, '_warm_cache').filename)
+
+        db = JournaledDatabase(self.path, DEFAULT_DATA, warm_cache=True)
+        tournament = db.read_tournaments()[0]
+        tournament.next_round(((0, 1), (2, 3)))  # changed in place, as the application does
+        getattr(db, '_warm_cache').flush()
+        db.update_tournament(0, tournament)
+        db.sync()
+
+        warm = NotDecodingJournaledDatabase(self.path, DEFAULT_DATA, warm_cache=True)
+        self.assertEqual(1, warm.read_tournaments()[0].round_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
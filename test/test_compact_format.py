@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.compact_format import FORMAT_VERSION, is_compact
+from src.database import CachedDatabase, Database
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src.tournament.knockout_tournament import KnockoutTournament
+from src.tournament.pairing.dutch_pairer import DutchPairer
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+from src.tournament.scoring.buchholz_scorer import BuchholzScorer
+from src.tournament.tournament import TournamentSettings
+
+
+def create_data() -> dict:
+    tournament = InteractiveTournament(TournamentData('first', 'open'))
+    tournament.set_settings(TournamentSettings(elo_k_value=20, scorer=BuchholzScorer()))
+
+    for i in range(7):
+        tournament.add_player(Player(f'Player {i}', rating=1000 + 100 * i, hash_id=i % 2))
+
+    for _ in range(3):
+        tournament.next_round(DutchPairer())
+
+        for table in range(len(tournament.get_round().pairs)):
+            tournament.set_result(table, (GameResult.WIN, GameResult.DRAW, GameResult.LOSE)[table % 3])
+
+    tournament.finish()
+
+    return {
+        'players': [Player('Adam', 1500, hash_id=2, federation_id=1001), Player('Barbara')],
+        'tournaments': [tournament, KnockoutTournament([Player('Adam'), Player('Barbara')])],
+        'settings': {'volume': 5},
+    }
+
+
+class TestCompactFormat(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def __load_file(self) -> dict:
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def __assert_same_data(self, expected: dict, actual: dict):
+        self.assertEqual(list(expected.keys()), list(actual.keys()))
+        self.assertEqual(expected['players'], actual['players'])
+        self.assertEqual([p.federation_id for p in expected['players']], [p.federation_id for p in actual['players']])
+        self.assertEqual(expected['settings'], actual['settings'])
+        self.assertEqual(expected['tournaments'][1].players, actual['tournaments'][1].players)
+
+        expected_tournament, actual_tournament = expected['tournaments'][0], actual['tournaments'][0]
+        self.assertEqual(expected_tournament.data, actual_tournament.data)
+        self.assertEqual(expected_tournament.players, actual_tournament.players)
+        self.assertEqual(expected_tournament.get_scores(), actual_tournament.get_scores())
+        self.assertTrue(actual_tournament.is_finished())
+        self.assertIsInstance(actual_tournament.get_settings().scorer, BuchholzScorer)
+
+        for round_no in range(expected_tournament.round_count):
+            self.assertEqual(expected_tournament.get_round(round_no).pairs, actual_tournament.get_round(round_no).pairs)
+            self.assertEqual(expected_tournament.get_round(round_no).results,
+                             actual_tournament.get_round(round_no).results)
+
+    def test_read_write(self):
+        data = create_data()
+        Database(self.path, compact_format=True).write(data)
+
+        encoded = self.__load_file()
+        self.assertTrue(is_compact(encoded))
+        self.assertEqual(FORMAT_VERSION, encoded['version'])
+        self.assertTrue(all(type(x) is int for x in encoded['tournaments'][0][4][0][0]))
+
+        self.__assert_same_data(data, Database(self.path).read())
+
+    @classmethod
+    def __find_stats(cls, encoded) -> dict | None:
+        if type(encoded) is dict and 'recent_rating_changes' in encoded:
+            return encoded
+
+        for item in (encoded.values() if type(encoded) is dict else encoded if type(encoded) is list else ()):
+            if (found := cls.__find_stats(item)) is not None:
+                return found
+
+        return None
+
+    def test_persisted_stats(self):
+        for compact_format in (True, False):
+            data = create_data()
+            checksum = data['tournaments'][0].get_stats_checksum()
+            Database(self.path, compact_format=compact_format).write(data)
+
+            encoded = self.__load_file()
+            self.__find_stats(encoded)['recent_rating_changes'] = [42] * 7
+
+            with open(self.path, 'w') as f:
+                json.dump(encoded, f)
+
+            self.assertEqual([42] * 7, Database(self.path).read()['tournaments'][0].stats.recent_rating_changes)
+
+            with open(self.path, 'w') as f:
+                f.write(json.dumps(encoded).replace(checksum, '0' * len(checksum)))
+
+            self.assertEqual(data['tournaments'][0].stats, Database(self.path).read()['tournaments'][0].stats)
+
+    def test_old_format_is_detected(self):
+        data = create_data()
+        Database(self.path).write(data)
+        self.assertFalse(is_compact(self.__load_file()))
+
+        db = Database(self.path, compact_format=True)
+        self.__assert_same_data(data, db.read())
+
+        db.write(db.read())
+        self.assertTrue(is_compact(self.__load_file()))
+
+    def test_smaller_than_envelope_format(self):
+        data = create_data()
+        Database(self.path).write(data)
+        envelope_size = os.path.getsize(self.path)
+        Database(self.path, compact_format=True).write(data)
+
+        self.assertLess(os.path.getsize(self.path) * 5, envelope_size)
+
+    def test_other_values_use_envelope(self):
+        db = Database(self.path, compact_format=True)
+        db.write([1, 2])
+
+        self.assertFalse(is_compact(self.__load_file()))
+        self.assertEqual([1, 2], db.read())
+
+    def test_newer_version_is_rejected(self):
+        Database(self.path, compact_format=True).write(create_data())
+        encoded = self.__load_file()
+        encoded['version'] = FORMAT_VERSION + 1
+
+        with open(self.path, 'w') as f:
+            json.dump(encoded, f)
+
+        self.assertRaises(ValueError, Database(self.path).read)
+
+    def test_cached_database(self):
+        data = create_data()
+        Database(self.path, compact_format=True).write(data)
+
+        db = CachedDatabase(self.path, flush_delay=None)
+        db.update_players([Player('Cezary')])
+        db.commit()
+
+        self.assertFalse(is_compact(self.__load_file()))
+        self.assertEqual([Player('Cezary')], Database(self.path).read_players())
+        self.assertEqual(data['tournaments'][0].players, Database(self.path).read_tournaments()[0].players)
+
+
+if __name__ == '__main__':
+    unittest.main()
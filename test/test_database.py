@@ -1,9 +1,15 @@
+import json
 import os.path
+import tempfile
 import unittest
 from typing import Any
 
 from src import database
-from src.tournament.interactive_tournament import InteractiveTournament, TournamentData
+from src import serializer as srl
+from src.compact_format import is_compact
+from src.storage.file_lock import LockTimeout
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData, TournamentState
+from src.tournament.knockout_tournament import KnockoutTournament
 from src.tournament.pairing.dutch_pairer import DutchPairer
 from src.tournament.player import Player
 from src.tournament.round import GameResult
@@ -145,6 +151,21 @@ class TestDatabase(unittest.TestCase):
 
         self.__compare_interactive_tournament(*self.__test_read_write_manual(it))
 
+    def test_knockout_tournament(self):
+        kt = KnockoutTournament(tuple(Player(f'Player {i}', rating=1000 + i) for i in range(5)),
+                                TournamentData('cup'))
+        kt.set_result(kt.get_node(0, 1), GameResult.LOSE)
+        kt.set_result(kt.get_node(1, 0), GameResult.WIN)
+
+        _, red = self.__test_read_write_manual(kt)
+
+        self.assertEqual(KnockoutTournament, type(red))
+        self.assertEqual(kt.data, red.data)
+        self.assertEqual(kt.players, red.players)
+        self.assertEqual(kt.get_decided_matches(), red.get_decided_matches())
+        self.assertEqual(kt.get_round_matches(1), red.get_round_matches(1))
+        self.assertEqual(kt.current_round, red.current_round)
+
     def test_sample_all_db_data(self):
         players = [
             Player('Adam', rating=2000),
@@ -190,5 +211,249 @@ class TestDatabase(unittest.TestCase):
             self.__compare_interactive_tournament(it, red_it)
 
 
+class TestCachedDatabase(unittest.TestCase):
+    def setUp(self):
+        if os.path.isfile(DATABASE_TMP_PATH):
+            os.remove(DATABASE_TMP_PATH)
+
+        self.db = database.CachedDatabase(DATABASE_TMP_PATH, {'players': [], 'tournaments': [], 'settings': {}},
+                                          flush_delay=None)
+
+    @staticmethod
+    def __create_tournament(name: str) -> InteractiveTournament:
+        tournament = InteractiveTournament(TournamentData(name))
+        tournament.add_player(Player('Adam', rating=1500))
+        tournament.add_player(Player('Barbara', rating=1400))
+        return tournament
+
+    def test_read_returns_cached_object(self):
+        self.assertIs(self.db.read(), self.db.read())
+        self.assertFalse(self.db.is_dirty)
+
+    def test_commit_writes_only_when_dirty(self):
+        self.assertEqual(0, self.db.add_tournament(self.__create_tournament('first')))
+        self.assertTrue(self.db.is_dirty)
+        self.assertEqual([], database.Database(DATABASE_TMP_PATH).read()['tournaments'])
+
+        self.db.commit()
+        self.assertFalse(self.db.is_dirty)
+
+        red = database.Database(DATABASE_TMP_PATH).read()
+        self.assertEqual('first', red['tournaments'][0].data.name)
+
+    def test_clean_tournaments_are_not_encoded_again(self):
+        for compact_format in (False, True):
+            if os.path.isfile(DATABASE_TMP_PATH):
+                os.remove(DATABASE_TMP_PATH)
+
+            self.__test_clean_tournaments_are_not_encoded_again(compact_format)
+
+    def __test_clean_tournaments_are_not_encoded_again(self, compact_format: bool):
+        db = database.CachedDatabase(DATABASE_TMP_PATH, {'players': [], 'tournaments': [], 'settings': {}},
+                                     compact_format=compact_format, flush_delay=None)
+        db.add_tournament(self.__create_tournament('first'))
+        db.add_tournament(self.__create_tournament('second'))
+        db.commit()
+
+        db = database.CachedDatabase(DATABASE_TMP_PATH, compact_format=compact_format, flush_delay=None)
+        tournaments = db.read_tournaments()
+        encoded_first = getattr(db, '_encoded_tournaments')[0]
+        self.assertIsNotNone(encoded_first)
+
+        tournaments[1].next_round(((0, 1),))
+        tournaments[1].set_result(0, GameResult.DRAW)
+        db.update_tournament(1, tournaments[1])
+        db.update_players([Player('Cezary')])
+        db.commit()
+
+        self.assertIs(encoded_first, getattr(db, '_encoded_tournaments')[0])
+
+        with open(DATABASE_TMP_PATH, 'r') as f:
+            encoded = json.load(f)
+
+        self.assertEqual(compact_format, is_compact(encoded))
+        self.assertEqual(database.Database(DATABASE_TMP_PATH, compact_format=compact_format)._encode_file(db.read()),
+                         encoded)
+
+        red = database.Database(DATABASE_TMP_PATH).read()
+        self.assertEqual([Player('Cezary')], red['players'])
+        self.assertEqual(0, red['tournaments'][0].round_count)
+        self.assertEqual([GameResult.DRAW], red['tournaments'][1].get_round(0).results)
+
+    def test_flush_timer(self):
+        db = database.CachedDatabase(DATABASE_TMP_PATH, {'players': [], 'tournaments': []}, flush_delay=.01)
+        db.update_players([Player('Adam')])
+        db.update_players([Player('Adam'), Player('Barbara')])
+
+        getattr(db, '_flush_timer').join()
+
+        self.assertFalse(db.is_dirty)
+        self.assertEqual(2, len(database.Database(DATABASE_TMP_PATH).read()['players']))
+
+
+class NotDecodingDatabase(database.Database):
+    def read(self):
+        raise AssertionError('Database should not be decoded')
+
+
+class TestTournamentsMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+
+        tournament = InteractiveTournament(TournamentData('first'))
+        tournament.add_player(Player('Adam'))
+        tournament.add_player(Player('Barbara'))
+        tournament.next_round(((0, 1),))
+        self.data = {'players': [], 'tournaments': [tournament, InteractiveTournament(TournamentData('second'))]}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_index_is_written_with_database(self):
+        database.Database(self.path, compact_format=True).write(self.data)
+
+        metadata = NotDecodingDatabase(self.path).read_tournaments_metadata()
+
+        self.assertEqual(['first', 'second'], [m.data.name for m in metadata])
+        self.assertEqual([(2, 1, TournamentState.RUNNING), (0, 0, TournamentState.NOT_STARTED)],
+                         [(m.players_count, m.round_count, m.state) for m in metadata])
+
+    def test_stale_index_is_rebuilt(self):
+        db = database.Database(self.path)
+        db.write(self.data)
+        database.Database(os.path.join(self.tmp_dir.name, 'other.json')).write({'players': [], 'tournaments': []})
+        os.replace(os.path.join(self.tmp_dir.name, 'other.json'), self.path)
+
+        self.assertEqual([], db.read_tournaments_metadata())
+        self.assertEqual([], NotDecodingDatabase(self.path).read_tournaments_metadata())
+
+    def test_cached_database(self):
+        database.Database(self.path).write(self.data)
+        db = database.CachedDatabase(self.path, flush_delay=None)
+
+        self.assertEqual(['first', 'second'], [m.data.name for m in db.read_tournaments_metadata()])
+
+        db.add_tournament(InteractiveTournament(TournamentData('third')))
+        self.assertEqual(3, len(db.read_tournaments_metadata()))
+
+        db.commit()
+        self.assertEqual(3, len(NotDecodingDatabase(self.path).read_tournaments_metadata()))
+
+
+class TestStreamingReads(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'db.json')
+
+        tournament = InteractiveTournament(TournamentData('first'))
+        tournament.add_player(Player('Adam'))
+        tournament.add_player(Player('Barbara'))
+        tournament.next_round(((0, 1),))
+        tournament.set_result(0, GameResult.DRAW)
+
+        self.data = {
+            'players': [Player('Adam', 1200), Player('Barbara', 1300)],
+            'tournaments': [
+                tournament,
+                KnockoutTournament((Player('Adam'), Player('Ewa')), TournamentData('second')),
+                {'not': 'a tournament'},
+            ],
+            'settings': {'language': 'pl'},
+        }
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def __test_format(self, compact_format: bool):
+        database.Database(self.path, compact_format=compact_format).write(self.data)
+        db = NotDecodingDatabase(self.path)
+
+        self.assertEqual(self.data['players'], list(db.iter_players()))
+        self.assertEqual(['first', 'second'], [t.data.name for t in list(db.iter_tournaments())[:2]])
+        self.assertEqual(GameResult.DRAW, db.read_entry('tournaments', 0).get_round(0).results[0])
+        self.assertEqual({'not': 'a tournament'}, db.read_entry('tournaments', 2))
+        self.assertEqual(self.data['players'][1], db.read_entry('players', 1))
+        self.assertEqual({'language': 'pl'}, db.read_entry('settings'))
+        self.assertRaises(KeyError, db.read_entry, 'missing')
+        self.assertRaises(IndexError, db.read_entry, 'tournaments', 3)
+
+    def test_envelope_format(self):
+        self.__test_format(compact_format=False)
+
+    def test_compact_format(self):
+        self.__test_format(compact_format=True)
+
+    def test_cached_database(self):
+        database.Database(self.path).write({'players': [], 'tournaments': []})
+        db = database.CachedDatabase(self.path, flush_delay=None)
+        db.add_tournament(self.data['tournaments'][0])
+
+        self.assertEqual(['first'], [t.data.name for t in db.iter_tournaments()])
+        self.assertEqual([], database.Database(self.path).read_entry('tournaments'))
+
+
+class Point:
+    def __init__(self, x: int, y: int):
+        self.x, self.y = x, y
+
+
+class NamedPoint(Point):
+    pass
+
+
+class PointSerializer(srl.Serializer):
+    def can_serialize(self, value: Any) -> bool:
+        return isinstance(value, Point)
+
+    def encode(self, obj: Point) -> srl.BasicSerializableType:
+        return self.super_encode([obj.x, obj.y])
+
+    def decode(self, data: srl.BasicSerializableType) -> Point:
+        return Point(*self.super_decode(data))
+
+
+class TestSerializerDispatch(unittest.TestCase):
+    def test_fallback_to_can_serialize(self):
+        db = database.Database(DATABASE_TMP_PATH, None, PointSerializer())
+        db.write([Point(1, 2), NamedPoint(3, 4)])
+
+        self.assertEqual([(1, 2), (3, 4)], [(p.x, p.y) for p in db.read()])
+
+    def test_databases_do_not_share_serializers(self):
+        serializer = PointSerializer()
+        first = database.Database(DATABASE_TMP_PATH, None, serializer)
+        database.Database('other.tmp.json', None, serializer)
+
+        self.assertEqual({'__serializer__': '@PointSerializer', '__data__': {
+            '__serializer__': '@NestedSerializer', '__data__': [
+                {'__serializer__': '@DefaultSerializer', '__data__': 1},
+                {'__serializer__': '@DefaultSerializer', '__data__': 2},
+            ]}}, getattr(first, '_encode')(Point(1, 2)))
+
+    def test_invalid_registration(self):
+        self.assertRaises(ValueError, database.Database, DATABASE_TMP_PATH, None, srl.PlayerSerializer())
+        self.assertRaises(TypeError, database.Database, DATABASE_TMP_PATH, None, object())
+
+    def test_unknown_values(self):
+        db = database.Database(DATABASE_TMP_PATH)
+
+        self.assertRaises(ValueError, getattr(db, '_encode'), Point(1, 2))
+        self.assertRaises(ValueError, getattr(db, '_decode'), {'__serializer__': '@Unknown', '__data__': 1})
+
+    def test_exclusive_lock(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'db.json')
+            db = database.CachedDatabase(path, {'players': [], 'tournaments': []}, flush_delay=None)
+            db.lock_exclusively()
+
+            self.assertRaises(LockTimeout, database.Database(path).lock_exclusively)
+
+            db.close()
+            other = database.Database(path)
+            other.lock_exclusively()
+            other.close()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from src.tournament.pairing.color_allocator import allocate_colors, calculate_color_preferences, WHITE, BLACK, \
+    NO_PREFERENCE, MILD_PREFERENCE, STRONG_PREFERENCE, ABSOLUTE_PREFERENCE
+from src.tournament.round import Round, GameResult, Pairs
+from src.tournament.round_stats import RoundStats
+
+
+def create_stats(ratings: tuple[float, ...], rounds_pairs: tuple[Pairs, ...]) -> RoundStats:
+    stats = RoundStats(len(ratings), ratings, 32)
+
+    for pairs in rounds_pairs:
+        round_ = Round(len(ratings), pairs)
+
+        for table in range(len(pairs)):
+            round_.set_result(table, GameResult.DRAW)
+
+        stats.add_round(round_)
+
+    return stats
+
+
+class TestColorPreferences(unittest.TestCase):
+    def test_preferences(self):
+        stats = create_stats((1000,) * 7, (((0, 1), (2, 3), (4, 5)), ((0, 2), (3, 1), (5, 4))))
+
+        colors, strengths = calculate_color_preferences(stats)
+
+        self.assertEqual([BLACK, WHITE, WHITE, BLACK, WHITE, BLACK, 0], colors)
+        self.assertEqual([ABSOLUTE_PREFERENCE, ABSOLUTE_PREFERENCE, MILD_PREFERENCE, MILD_PREFERENCE,
+                          MILD_PREFERENCE, MILD_PREFERENCE, NO_PREFERENCE], strengths)
+
+    def test_strong_preferences(self):
+        _, strengths = calculate_color_preferences(create_stats((1000,) * 2, (((0, 1),),)))
+        self.assertEqual([STRONG_PREFERENCE, STRONG_PREFERENCE], strengths)
+
+
+class TestColorAllocation(unittest.TestCase):
+    def test_first_round_alternates_colors(self):
+        stats = create_stats((1500, 1400, 1300, 1200, 1100, 1000), ())
+
+        self.assertEqual(((0, 3), (4, 1), (2, 5)), allocate_colors(((0, 3), (1, 4), (5, 2)), stats))
+
+    def test_grants_both_preferences(self):
+        stats = create_stats((1000,) * 4, (((0, 1), (2, 3)),))
+
+        self.assertEqual(((1, 0), (3, 2)), allocate_colors(((0, 1), (2, 3)), stats))
+        self.assertEqual(((3, 0), (1, 2)), allocate_colors(((0, 3), (2, 1)), stats))
+
+    def test_stronger_preference_wins(self):
+        stats = create_stats((1000,) * 4, (((0, 1), (2, 3)), ((0, 2), (3, 1))))
+
+        self.assertEqual([2, -2, 0, 0], stats.color_balance)
+        self.assertEqual(((3, 0), (1, 2)), allocate_colors(((0, 3), (2, 1)), stats))
+
+    def test_higher_ranked_player_gets_preference(self):
+        stats = create_stats((1000, 1000, 1200, 1100), (((0, 2), (1, 3)),))
+
+        self.assertEqual(((1, 0), (2, 3)), allocate_colors(((0, 1), (2, 3)), stats, ((1,), (.5,), (.5,), (.5,))))
+        self.assertEqual(((0, 1), (2, 3)), allocate_colors(((0, 1), (2, 3)), stats, ((0,), (1,), (.5,), (.5,))))
+
+    def test_empty_pairs(self):
+        self.assertEqual((), allocate_colors((), create_stats((1000,), ())))
+
+
+if __name__ == '__main__':
+    unittest.main()
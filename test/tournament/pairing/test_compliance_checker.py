@@ -0,0 +1,126 @@
+import unittest
+
+from src.tournament.pairing.compliance_checker import ComplianceChecker, Rule, Violation, PairingRuleViolationError
+from src.tournament.pairing.pair_constraints import ForbiddenPairsIndex
+from src.tournament.pairing.pairer import Pairer
+from src.tournament.player import Player
+from src.tournament.round import Round, GameResult, Pairs
+from src.tournament.round_stats import RoundStats
+from src.tournament.tournament import Tournament
+
+
+class FixedPairer(Pairer):
+    def __init__(self, pairs: Pairs):
+        super().__init__()
+        self.fixed_pairs = pairs
+
+    def _pair(self) -> Pairs:
+        return self.fixed_pairs
+
+
+def create_stats(players_count: int, rounds_pairs: tuple[Pairs, ...]) -> RoundStats:
+    stats = RoundStats(players_count, (1000,) * players_count, 32)
+
+    for pairs in rounds_pairs:
+        round_ = Round(players_count, pairs)
+
+        for table in range(len(pairs)):
+            round_.set_result(table, GameResult.WIN)
+
+        stats.add_round(round_)
+
+    return stats
+
+
+class TestComplianceChecker(unittest.TestCase):
+    def setUp(self):
+        self.stats = create_stats(5, (((0, 1), (2, 3)), ((0, 3), (1, 2))))
+        self.checker = ComplianceChecker()
+
+    def test_correct_pairing(self):
+        self.assertEqual((), self.checker.check(self.stats, ((4, 0), (1, 3))))
+
+    def test_structural_violations(self):
+        self.assertEqual((Violation(Rule.UNKNOWN_PLAYER, 0, (0, 5)), Violation(Rule.TOO_MANY_PAUSES, None, (0, 2, 3))),
+                         self.checker.check(self.stats, ((0, 5), (1, 4))))
+        self.assertEqual((Violation(Rule.DUPLICATED_PLAYER, 1, (4, 1)), Violation(Rule.TOO_MANY_PAUSES, None, (0, 2))),
+                         self.checker.check(self.stats, ((1, 3), (4, 1))))
+
+    def test_repeated_pair(self):
+        self.assertEqual((Violation(Rule.REPEATED_PAIR, 1, (3, 0)),),
+                         self.checker.check(self.stats, ((4, 1), (3, 0))))
+
+    def test_color_limits(self):
+        stats = create_stats(4, (((0, 1), (2, 3)), ((0, 1), (2, 3))))
+
+        self.assertEqual([2, -2, 2, -2], stats.color_repetition)
+        self.assertEqual((Violation(Rule.COLOR_LIMIT, 0, (0, 2)), Violation(Rule.COLOR_LIMIT, 1, (1, 3))),
+                         self.checker.check(stats, ((0, 2), (1, 3))))
+        self.assertEqual((), ComplianceChecker(max_color_repetition=None).check(stats, ((0, 2), (1, 3))))
+
+        orientation_checker = ComplianceChecker(check_orientation=True)
+        self.assertEqual((), orientation_checker.check(stats, ((3, 0), (1, 2))))
+        self.assertEqual((Violation(Rule.COLOR_ORIENTATION, 0, (0, 3)), Violation(Rule.COLOR_ORIENTATION, 1, (2, 1))),
+                         orientation_checker.check(stats, ((0, 3), (2, 1))))
+
+    def test_color_balance(self):
+        checker = ComplianceChecker(max_color_repetition=None, max_color_balance=2, check_orientation=True)
+        stats = create_stats(4, (((0, 1), (2, 3)), ((0, 2), (1, 3))))
+
+        self.assertEqual([2, 0, 0, -2], stats.color_balance)
+        self.assertEqual((), checker.check(stats, ((3, 0), (1, 2))))
+        self.assertEqual((Violation(Rule.COLOR_ORIENTATION, 0, (0, 3)),), checker.check(stats, ((0, 3), (1, 2))))
+
+    def test_forbidden_pairs(self):
+        forbidden = ForbiddenPairsIndex(5)
+        forbidden.add_group({1, 3})
+
+        self.assertEqual((Violation(Rule.FORBIDDEN_PAIR, 1, (1, 3)),),
+                         self.checker.check(self.stats, ((4, 0), (1, 3)), forbidden=forbidden))
+
+    def test_pauses(self):
+        self.assertEqual((Violation(Rule.TOO_MANY_PAUSES, None, (1, 2, 3)),),
+                         self.checker.check(self.stats, ((4, 0),)))
+
+        pause_checker = ComplianceChecker(check_repeated_pause=True)
+        self.assertEqual((Violation(Rule.REPEATED_PAUSE, None, (4,)),),
+                         pause_checker.check(self.stats, ((1, 3), (0, 2)))[-1:])
+
+    def test_score_difference(self):
+        checker = ComplianceChecker(max_score_difference=.5)
+        scores = ((2,), (1,), (1,), (0,), (2,))
+
+        self.assertEqual((Violation(Rule.SCORE_DIFFERENCE, 1, (1, 3)),),
+                         checker.check(self.stats, ((4, 0), (1, 3)), scores))
+
+    def test_check_many(self):
+        results = self.checker.check_many([
+            (self.stats, ((4, 0), (1, 3))),
+            (self.stats, ((4, 1), (3, 0))),
+        ] * 1000)
+
+        self.assertEqual(2000, len(results))
+        self.assertEqual((), results[0])
+        self.assertEqual(Rule.REPEATED_PAIR, results[1][0].rule)
+
+
+class TestTournamentGuard(unittest.TestCase):
+    def test_guard(self):
+        t = Tournament(tuple(Player(name) for name in ('Adam', 'Borys', 'Celina', 'Damian')))
+        t.next_round(FixedPairer(((0, 1), (2, 3))))
+        t.set_result(0, GameResult.WIN)
+        t.set_result(1, GameResult.WIN)
+
+        with self.assertRaises(PairingRuleViolationError) as context:
+            t.next_round(FixedPairer(((1, 0), (2, 3))))
+
+        self.assertEqual((Violation(Rule.REPEATED_PAIR, 0, (1, 0)), Violation(Rule.REPEATED_PAIR, 1, (2, 3))),
+                         context.exception.violations)
+        self.assertEqual(1, t.get_round_count())
+
+        t.next_round(FixedPairer(((0, 2), (1, 3))))
+        self.assertEqual(2, t.get_round_count())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import time
+import unittest
+
+from src.tournament.pairing.dutch_pairer import DutchPairer
+from src.tournament.pairing.group_monrad_pairer import GroupMonradPairer
+from src.tournament.pairing.pair_constraints import PairConstraints, ForbiddenPairsIndex
+from src.tournament.round import Round, GameResult
+from src.tournament.round_stats import RoundStats
+from src.tournament.scoring.points_scorer import PointsScorer
+
+
+class TestForbiddenPairsIndex(unittest.TestCase):
+    def test_groups(self):
+        index = ForbiddenPairsIndex(6)
+        self.assertFalse(index)
+
+        index.add_group({0, 2, 4})
+        index.add_group({4, 5})
+
+        self.assertTrue(index)
+        self.assertTrue(index.is_forbidden(0, 2))
+        self.assertTrue(index.is_forbidden(4, 0))
+        self.assertTrue(index.is_forbidden(5, 4))
+        self.assertFalse(index.is_forbidden(0, 5))
+        self.assertFalse(index.is_forbidden(0, 0))
+        self.assertEqual({0, 2, 5}, index.get_forbidden(4))
+
+    def test_ignores_unknown_players(self):
+        index = ForbiddenPairsIndex(3)
+        index.add_group({1, 7})
+        self.assertFalse(index)
+
+
+class TestPairConstraints(unittest.TestCase):
+    def test_round_ranges(self):
+        constraints = PairConstraints()
+        constraints.add_group({0, 1, 2}, rounds=range(0, 2))
+        constraints.forbid_pair(3, 4)
+
+        self.assertTrue(constraints.compile(5, 1).is_forbidden(0, 1))
+        self.assertFalse(constraints.compile(5, 2).is_forbidden(0, 1))
+        self.assertTrue(constraints.compile(5, 2).is_forbidden(3, 4))
+        self.assertRaises(ValueError, constraints.forbid_pair, 2, 2)
+
+    def test_compiled_index_is_reused(self):
+        constraints = PairConstraints()
+        constraints.forbid_pair(0, 1)
+
+        self.assertIs(constraints.compile(4, 0), constraints.compile(4, 0))
+
+        constraints.forbid_pair(2, 3)
+        self.assertTrue(constraints.compile(4, 0).is_forbidden(2, 3))
+
+
+class TestDutchPairerWithConstraints(unittest.TestCase):
+    @staticmethod
+    def __pair(constraints: PairConstraints, rounds: list[Round], players_count: int):
+        stats = RoundStats(players_count, tuple(1000 for _ in range(players_count)), 32)
+
+        for round_ in rounds:
+            stats.add_round(round_)
+
+        scores = PointsScorer().calculate_scores(players_count, rounds, stats)
+        return DutchPairer(constraints).pair(tuple(range(players_count)), stats, scores)
+
+    def test_first_round(self):
+        constraints = PairConstraints()
+        constraints.forbid_pair(0, 4)
+        constraints.forbid_pair(1, 5)
+
+        pairs = self.__pair(constraints, [], 8)
+
+        self.assertEqual(4, len(pairs))
+        self.assertNotIn((0, 4), pairs)
+        self.assertNotIn((1, 5), pairs)
+
+    def test_middle_round(self):
+        round_ = Round(6, ((0, 3), (1, 4), (2, 5)))
+        round_.set_result(0, GameResult.WIN)
+        round_.set_result(1, GameResult.WIN)
+        round_.set_result(2, GameResult.WIN)
+
+        constraints = PairConstraints()
+        constraints.add_group({0, 1, 2}, rounds=range(1, 2))
+
+        pairs = self.__pair(constraints, [round_], 6)
+
+        self.assertEqual(3, len(pairs))
+
+        for player_a, player_b in pairs:
+            self.assertFalse({player_a, player_b} <= {0, 1, 2})
+
+
+class TestGroupMonradPairerWithConstraints(unittest.TestCase):
+    @staticmethod
+    def __pair(constraints: PairConstraints, players_count: int):
+        stats = RoundStats(players_count, tuple(1000 for _ in range(players_count)), 32)
+        scores = PointsScorer().calculate_scores(players_count, [], stats)
+        return GroupMonradPairer(constraints).pair(tuple(range(players_count)), stats, scores)
+
+    def test_first_round(self):
+        self.assertEqual([{0, 1}, {2, 3}, {4, 5}], [set(pair) for pair in self.__pair(PairConstraints(), 6)])
+
+        constraints = PairConstraints()
+        constraints.forbid_pair(0, 1)
+        constraints.forbid_pair(2, 3)
+
+        pairs = self.__pair(constraints, 6)
+
+        self.assertEqual(3, len(pairs))
+        self.assertNotIn({0, 1}, [set(pair) for pair in pairs])
+        self.assertNotIn({2, 3}, [set(pair) for pair in pairs])
+
+        constraints.add_group({0, 1, 2})
+        self.assertRaises(Exception, self.__pair, constraints, 4)
+
+    def test_first_round_of_large_field(self):
+        constraints = PairConstraints()
+        constraints.forbid_pair(0, 1)
+        constraints.add_group({20, 21, 22, 23})
+
+        start = time.perf_counter()
+        pairs = self.__pair(constraints, 30)
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(15, len(pairs))
+        self.assertEqual(set(range(30)), {player for pair in pairs for player in pair})
+        self.assertFalse(any(constraints.compile(30, 0).is_forbidden(*pair) for pair in pairs))
+
+
+if __name__ == '__main__':
+    unittest.main()
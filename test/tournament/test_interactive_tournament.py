@@ -1,8 +1,9 @@
 import unittest
 
-from src.tournament.interactive_tournament import InteractiveTournament
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData, TournamentSettings
 from src.tournament.player import Player
-from src.tournament.round import GameResult
+from src.tournament.round import GameResult, Round
+from src.tournament.tournament import RoundNotCompletedError
 
 
 class TestSimple(unittest.TestCase):
@@ -65,6 +66,62 @@ class TestSimple(unittest.TestCase):
 
         self.assertEqual([.5, .5, 1], [p[0] for p in self.it.get_scores()])
 
+    def test_fingerprint_follows_content(self):
+        self.__add_sample_players()
+        fingerprint = self.it.get_fingerprint()
+
+        self.it.remove_player(Player('Borys Kowalski'))
+        self.it.add_player(Player('Borys Kowalski', 1500))
+        self.assertEqual(fingerprint, self.it.get_fingerprint())
+
+        self.it.next_round(((0, 1),))
+        started = self.it.get_fingerprint()
+        self.assertNotEqual(fingerprint, started)
+
+        self.it.set_result(0, GameResult.WIN)
+        self.assertNotEqual(started, self.it.get_fingerprint())
+
+        self.it.set_result(0, None)
+        self.assertEqual(started, self.it.get_fingerprint())
+
+
+class TestFromState(unittest.TestCase):
+    def setUp(self):
+        self.players = (Player('Borys Kowalski', 1500), Player('Adam Nowak', 1200), Player('Celina Cebula', 900))
+
+    def test_same_as_played(self):
+        played = InteractiveTournament(TournamentData('played'))
+
+        for player in self.players:
+            played.add_player(player)
+
+        played.next_round(((0, 1),))
+        played.set_result(0, GameResult.DRAW)
+        played.next_round(((2, 0),))
+        played.set_result(0, GameResult.WIN)
+        played.finish()
+
+        built = InteractiveTournament.from_state(TournamentData('played'), self.players, TournamentSettings(), [
+            Round.from_results(3, ((0, 1),), [GameResult.DRAW]),
+            Round.from_results(3, ((2, 0),), [GameResult.WIN]),
+        ], is_finished=True)
+
+        self.assertTrue(built.is_finished())
+        self.assertEqual(played.get_scores(), built.get_scores())
+        self.assertEqual(played.players, built.players)
+
+    def test_invalid_state(self):
+        settings = TournamentSettings()
+        unfinished = Round(3, ((0, 1),))
+
+        self.assertRaises(ValueError, InteractiveTournament.from_state, TournamentData(), self.players[::-1],
+                          settings, [], False)
+        self.assertRaises(ValueError, Round.from_results, 3, ((0, 1),), [])
+        self.assertRaises(RoundNotCompletedError, InteractiveTournament.from_state, TournamentData(), self.players,
+                          settings, [unfinished, Round(3, ((0, 2),))], False)
+        self.assertRaises(RoundNotCompletedError, InteractiveTournament.from_state, TournamentData(), self.players,
+                          settings, [unfinished], True)
+
 
 if __name__ == '__main__':
     unittest.main()
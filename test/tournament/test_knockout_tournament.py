@@ -0,0 +1,102 @@
+import unittest
+
+from src.tournament.knockout_tournament import KnockoutTournament, KnockoutException, create_seeding_order
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+
+
+class TestSeeding(unittest.TestCase):
+    def test_seeding_order(self):
+        self.assertEqual([0], create_seeding_order(1))
+        self.assertEqual([0, 1], create_seeding_order(2))
+        self.assertEqual([0, 3, 1, 2], create_seeding_order(4))
+        self.assertEqual([0, 7, 3, 4, 1, 6, 2, 5], create_seeding_order(8))
+
+    def test_seeding_order_is_permutation(self):
+        self.assertEqual(list(range(512)), sorted(create_seeding_order(512)))
+
+
+class TestKnockout(unittest.TestCase):
+    def setUp(self):
+        self.players = tuple(Player(f'Player {chr(ord("A") + i)}', rating=1000 + 100 * i) for i in range(6))
+        self.kt = KnockoutTournament(self.players)
+
+    def test_structure(self):
+        self.assertEqual(8, self.kt.size)
+        self.assertEqual(3, self.kt.round_count)
+        self.assertEqual(Player('Player F'), self.kt.players[0])
+        self.assertEqual(((0, None), (3, 4), (1, None), (2, 5)), self.kt.get_round_matches(0))
+        self.assertEqual(((0, None), (1, None)), self.kt.get_round_matches(1))
+        self.assertEqual(0, self.kt.current_round)
+
+    def test_byes(self):
+        self.assertTrue(self.kt.is_bye(4))
+        self.assertFalse(self.kt.is_bye(5))
+        self.assertEqual(0, self.kt.get_winner(4))
+        self.assertRaises(KnockoutException, self.kt.set_result, 4, GameResult.WIN)
+
+    def test_advancing_to_champion(self):
+        self.kt.set_result(5, GameResult.LOSE)
+        self.kt.set_result(7, GameResult.WIN)
+        self.assertEqual(1, self.kt.current_round)
+        self.assertEqual(((0, 4), (1, 2)), self.kt.get_round_matches(1))
+
+        self.kt.set_result(2, GameResult.WIN)
+        self.kt.set_result(3, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME)
+        self.assertEqual(2, self.kt.current_round)
+        self.assertFalse(self.kt.is_finished())
+
+        self.kt.set_result(1, GameResult.LOSE)
+        self.assertTrue(self.kt.is_finished())
+        self.assertEqual(2, self.kt.champion)
+
+        self.assertTrue(self.kt.is_eliminated(0))
+        self.assertFalse(self.kt.is_eliminated(2))
+        self.assertEqual(((0, 5, GameResult.WIN), (1, 1, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME),
+                          (2, 0, GameResult.LOSE)), self.kt.get_player_path(2))
+
+    def test_changing_result_clears_later_rounds(self):
+        self.kt.set_result(5, GameResult.WIN)
+        self.kt.set_result(2, GameResult.WIN)
+        self.assertEqual(0, self.kt.get_winner(2))
+
+        self.kt.set_result(5, GameResult.LOSE)
+        self.assertEqual((0, 4), self.kt.get_match(2))
+        self.assertIsNone(self.kt.get_winner(2))
+        self.assertIsNone(self.kt.get_result(2))
+        self.assertEqual(0, self.kt.current_round)
+
+        self.kt.set_result(5, None)
+        self.assertEqual((0, None), self.kt.get_match(2))
+
+    def test_invalid_results(self):
+        self.assertRaises(KnockoutException, self.kt.set_result, 5, GameResult.DRAW)
+        self.assertRaises(KnockoutException, self.kt.set_result, 5, GameResult.BOTH_PLAYERS_NOT_SHOWED_IN_TIME)
+        self.assertRaises(KnockoutException, self.kt.set_result, 1, GameResult.WIN)
+        self.assertRaises(IndexError, self.kt.set_result, 8, GameResult.WIN)
+        self.assertRaises(IndexError, self.kt.get_node, 3, 0)
+
+    def test_render_path(self):
+        self.kt.set_result(5, GameResult.WIN)
+        rendered = self.kt.render_path(3)
+
+        self.assertIn('Player C', rendered)
+        self.assertIn('Round 1: vs <Player B(1100)> [WIN]', rendered)
+        self.assertIn('Round 2: vs <Player F(1500)> [-]', rendered)
+
+    def test_too_few_players(self):
+        self.assertRaises(KnockoutException, KnockoutTournament, (Player('Adam'),))
+
+    def test_big_bracket(self):
+        kt = KnockoutTournament(tuple(Player(f'Player {i}', rating=i) for i in range(512)))
+
+        for round_no in range(kt.round_count):
+            for match_no in range(len(kt.get_round_matches(round_no))):
+                kt.set_result(kt.get_node(round_no, match_no), GameResult.WIN)
+
+        self.assertEqual(0, kt.champion)
+        self.assertEqual(9, len(kt.get_player_path(0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from src.tournament.pairing.dutch_pairer import DutchPairer
+from src.tournament.player import Player
+from src.tournament.round import Round, GameResult
+from src.tournament.score_group_index import ScoreGroupIndex
+from src.tournament.scoring.points_scorer import PointsScorer
+from src.tournament.tournament import Tournament, TournamentSettings
+
+
+class TestScoreGroupIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ScoreGroupIndex(5)
+
+    def test_initial_groups(self):
+        self.assertEqual([(0, {0, 1, 2, 3, 4})], self.index.get_groups())
+        self.assertEqual([], ScoreGroupIndex(0).get_groups())
+
+    def test_adding_and_changing_results(self):
+        round_ = Round(5, ((0, 1), (2, 3)))
+        self.index.add_round(round_, 1)
+        self.assertEqual([(1, {4}), (0, {0, 1, 2, 3})], self.index.get_groups())
+
+        self.index.change_result((0, 1), None, GameResult.WIN)
+        self.index.change_result((2, 3), None, GameResult.DRAW)
+        self.assertEqual([(1, {0, 4}), (.5, {2, 3}), (0, {1})], self.index.get_groups())
+
+        self.index.change_result((0, 1), GameResult.WIN, GameResult.LOSE)
+        self.assertEqual([(1, {1, 4}), (.5, {2, 3}), (0, {0})], self.index.get_groups())
+        self.assertEqual((0, 1, .5, .5, 1), self.index.scores)
+
+    def test_removing_round(self):
+        round_ = Round(5, ((0, 1), (2, 3)))
+        round_.set_result(0, GameResult.WIN)
+        round_.set_result(1, GameResult.PLAYER_A_NOT_SHOWED_IN_TIME)
+
+        self.index.add_round(round_, .5)
+        self.assertEqual([(1, {0, 3}), (.5, {4}), (0, {1, 2})], self.index.get_groups())
+        self.assertEqual([(1, [0, 3]), (.5, [4]), (0, [1, 2])], self.index.get_sorted_groups())
+
+        self.index.remove_round(round_, .5)
+        self.assertEqual([(0, {0, 1, 2, 3, 4})], self.index.get_groups())
+
+    def test_groups_are_copies(self):
+        self.index.get_groups()[0][1].clear()
+        self.assertEqual([(0, {0, 1, 2, 3, 4})], self.index.get_groups())
+
+
+class TestTournamentScoreGroups(unittest.TestCase):
+    def test_matches_scorer(self):
+        t = Tournament(tuple(Player(f'Player {i}', rating=1000 + 50 * i) for i in range(9)),
+                       TournamentSettings(scorer=PointsScorer(pause_points=.5)))
+        results = (GameResult.WIN, GameResult.DRAW, GameResult.LOSE, GameResult.PLAYER_B_NOT_SHOWED_IN_TIME)
+
+        for round_no in range(4):
+            t.next_round(DutchPairer())
+
+            for table in range(len(t.get_round().pairs)):
+                t.set_result(table, results[(table + round_no) % len(results)])
+
+            t.set_result(0, GameResult.DRAW)
+            self.__assert_groups_match_scores(t)
+
+        t.remove_last_round()
+        self.__assert_groups_match_scores(t)
+
+    def __assert_groups_match_scores(self, t: Tournament):
+        expected: dict[float, set[int]] = {}
+
+        for player, score in enumerate(t.get_scores()):
+            expected.setdefault(score[0], set()).add(player)
+
+        self.assertEqual(sorted(expected.items(), reverse=True), t.get_score_groups())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -118,6 +118,33 @@ class TestSimple(unittest.TestCase):
         self.assertEqual({(5, 2, (.5,)), (5, 5, (.5,))}, set(scoreboard[4:6]))
         self.assertEqual({(7, 4, (0,))}, set(scoreboard[6:]))
 
+    def test_stats_cache_follows_results(self):
+        self._add_sample_round_0()
+        self._add_sample_round_1()
+        round_0 = self.t.get_stats(0)
+        _ = self.t.stats
+
+        self.t.set_result(2, GameResult.WIN)
+
+        self.assertIs(round_0, self.t.get_stats(0))
+        self.assertEqual([6], self.t.stats.wins[5])
+
+    def test_adopt_stats(self):
+        self._add_sample_round_0()
+        self._add_sample_round_1()
+        checksum, stats = self.t.get_stats_checksum(), self.t.stats.deepcopy()
+
+        replayed = Tournament(self.t.players)
+        replayed._rounds.extend(self.t.iter_rounds())
+        self.assertEqual(checksum, replayed.get_stats_checksum())
+
+        replayed.adopt_stats(stats)
+        self.assertIs(stats, replayed.stats)
+        self.assertEqual(self.t.get_stats(0), replayed.get_stats(0))
+
+        self.t.set_result(2, GameResult.WIN)
+        self.assertNotEqual(checksum, self.t.get_stats_checksum())
+        self.assertRaises(ValueError, Tournament(self.t.players).adopt_stats, stats)
 
 
 
@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime
+
+from src.tournament.interactive_tournament import InteractiveTournament, TournamentData, TournamentState
+from src.tournament.knockout_tournament import KnockoutTournament
+from src.tournament.player import Player
+from src.tournament.round import GameResult
+from src.tournament.tournament_metadata import TournamentMetadata
+
+
+class TestTournamentMetadata(unittest.TestCase):
+    def test_interactive_tournament(self):
+        tournament = InteractiveTournament(TournamentData('first', 'open'))
+        tournament.add_player(Player('Adam'))
+        tournament.add_player(Player('Barbara'))
+        tournament.add_player(Player('Cezary'))
+        self.assertEqual(TournamentState.NOT_STARTED, TournamentMetadata.of(tournament).state)
+
+        tournament.next_round(((0, 1),))
+        metadata = TournamentMetadata.of(tournament)
+
+        self.assertEqual((3, 1, TournamentState.RUNNING), (metadata.players_count, metadata.round_count,
+                                                           metadata.state))
+        self.assertEqual(tournament.data, metadata.data)
+        self.assertIsNot(tournament.data, metadata.data)
+
+    def test_knockout_tournament(self):
+        tournament = KnockoutTournament(tuple(Player(f'Player {i}') for i in range(4)))
+        self.assertEqual(TournamentState.NOT_STARTED, TournamentMetadata.of(tournament).state)
+
+        tournament.set_result(tournament.get_node(0, 0), GameResult.WIN)
+        metadata = TournamentMetadata.of(tournament)
+
+        self.assertEqual((4, 2, TournamentState.RUNNING), (metadata.players_count, metadata.round_count,
+                                                           metadata.state))
+
+    def test_list_round_trip(self):
+        metadata = TournamentMetadata(TournamentData('first', 'open', datetime(2025, 1, 2, 3, 4), None), 10, 5,
+                                      TournamentState.RUNNING)
+
+        self.assertEqual(metadata, TournamentMetadata.from_list(metadata.to_list()))
+
+    def test_unknown_type(self):
+        self.assertRaises(ValueError, TournamentMetadata.of, object())
+
+
+if __name__ == '__main__':
+    unittest.main()